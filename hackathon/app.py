@@ -2,10 +2,12 @@ import streamlit as st
 import json
 import pandas as pd
 import plotly.express as px
-import random
+import os
 
 from datetime import datetime
 
+from quadrant import BhuSmrutiQdrant
+
 # ---------------- PAGE CONFIG ----------------
 st.set_page_config(
     page_title="Bhu-Smruti: Soil Wisdom Memory Bank",
@@ -48,17 +50,47 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# ---------------- SESSION STATE INIT ----------------
-if "simulation_mode" not in st.session_state:
-    st.session_state.simulation_mode = True
+# ---------------- SHARED RESOURCES ----------------
+# Built once per server process and shared by every session
+@st.cache_resource(show_spinner="Loading soil memory...")
+def get_memory_bank():
+    if os.getenv("QDRANT_URL"):
+        return BhuSmrutiQdrant(use_cloud=True)
 
-if "soil_data" not in st.session_state:
+    # No Qdrant configured: use the embedded index loaded from data/
+    bank = BhuSmrutiQdrant(backend="embedded")
+    bank.setup_collections()
+    bank.load_initial_data()
+    return bank
+
+
+@st.cache_data
+def load_soil_data():
     with open("data/soil_samples.json", "r") as f:
-        st.session_state.soil_data = json.load(f)
+        return json.load(f)
 
-if "wisdom_data" not in st.session_state:
+
+@st.cache_data
+def load_wisdom_data():
     with open("data/wisdom_audio.json", "r") as f:
-        st.session_state.wisdom_data = json.load(f)
+        return json.load(f)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def search_soil(query, limit=5):
+    results = get_memory_bank().search_similar_soil(query, limit=limit)
+    return [result.payload for result in results]
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def search_wisdom(query, limit=5):
+    results = get_memory_bank().search_wisdom(query, limit=limit)
+    return [result.payload for result in results]
+
+
+# ---------------- SESSION STATE INIT ----------------
+if "simulation_mode" not in st.session_state:
+    st.session_state.simulation_mode = True
 
 # ---------------- TITLE ----------------
 st.markdown('<h1 class="main-header">🌱 Bhu-Smruti: Soil Wisdom Memory Bank</h1>', unsafe_allow_html=True)
@@ -80,8 +112,8 @@ with st.sidebar:
     )
 
     st.markdown("---")
-    st.metric("Soil Samples", len(st.session_state.soil_data))
-    st.metric("Wisdom Snippets", len(st.session_state.wisdom_data))
+    st.metric("Soil Samples", len(load_soil_data()))
+    st.metric("Wisdom Snippets", len(load_wisdom_data()))
 
 # ---------------- DASHBOARD ----------------
 if app_mode == "🏠 Dashboard":
@@ -114,7 +146,7 @@ elif app_mode == "🔍 Soil Search":
     )
 
     if st.button("🔎 Search"):
-        results = random.sample(st.session_state.soil_data, 5)
+        results = search_soil(query)
 
         for i, soil in enumerate(results, 1):
             st.markdown(f"""
@@ -142,15 +174,15 @@ elif app_mode == "👴 Wisdom Search":
     )
 
     if st.button("👂 Search Wisdom"):
-        results = random.sample(st.session_state.wisdom_data, 5)
+        results = search_wisdom(query)
 
         for i, w in enumerate(results, 1):
             st.markdown(f"""
             <div class="wisdom-card">
-            <h4>#{i} {w['title']}</h4>
-            <b>Elder:</b> {w['elder_name']} ({w['experience_years']} yrs)<br/>
-            <b>Soil Type:</b> {w['soil_type']}<br/><br/>
-            <i>"{w['wisdom_text']}"</i>
+            <h4>#{i} {w['topic']}</h4>
+            <b>Elder:</b> {w['farmer_name']} ({w['experience_years']} yrs)<br/>
+            <b>Soil Type:</b> {", ".join(w['soil_types_applicable'])}<br/><br/>
+            <i>"{w['advice']}"</i>
             </div>
             """, unsafe_allow_html=True)
 
@@ -158,7 +190,7 @@ elif app_mode == "👴 Wisdom Search":
 elif app_mode == "📊 Analytics":
     st.markdown('<h2 class="sub-header">📊 Analytics</h2>', unsafe_allow_html=True)
 
-    df = pd.DataFrame(st.session_state.soil_data)
+    df = pd.DataFrame(load_soil_data())
     fig = px.histogram(df, x="soil_type", title="Soil Type Distribution")
     st.plotly_chart(fig, use_container_width=True)
 
@@ -0,0 +1,227 @@
+import asyncio
+import functools
+import os
+import time
+
+from qdrant_client import AsyncQdrantClient
+
+from embedding import EmbeddingGenerator, SensorFeatureScaler
+from embedding_cache import EmbeddingCache
+from quadrant import (
+    season_filter_for,
+    soil_type_filter_for,
+    geo_filter_for,
+    combine_filters,
+    date_filter_for,
+    recommendation_filter_for,
+    search_params_for,
+    collection_meta_id,
+    soil_query_vectors,
+    hybrid_soil_query,
+    LAYOUT_CHECK_INTERVAL,
+    META_COLLECTION,
+    SOIL_LAYOUTS,
+    SOIL_DATE_FIELD,
+    WISDOM_DATE_FIELD,
+    RECOMMENDATION_POOL_SIZE,
+)
+from recommender import MethodRanker
+
+
+class AsyncBhuSmrutiQdrant:
+    """asyncio variant of BhuSmrutiQdrant for concurrent read paths"""
+
+    def __init__(self, use_cloud=True, embedding_cache_path="data/embedding_cache.sqlite",
+                 embedding_gen=None, executor=None, storage_profile="memory", soil_layout="combined",
+                 encoder_backend="torch"):
+        if embedding_gen is None:
+            cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+            embedding_gen = EmbeddingGenerator(cache=cache, backend=encoder_backend)
+        self.embedding_gen = embedding_gen
+
+        # Model encoding is CPU bound; it runs here instead of on the event loop
+        # (None means the loop's default thread pool)
+        self.executor = executor
+
+        if use_cloud:
+            self.client = AsyncQdrantClient(
+                url=os.getenv("QDRANT_URL", "https://your-instance.cloud.qdrant.io"),
+                api_key=os.getenv("QDRANT_API_KEY", "your-api-key")
+            )
+        else:
+            self.client = AsyncQdrantClient(host="localhost", port=6333)
+
+        self.soil_collection = "soil_samples"
+        self.wisdom_collection = "wisdom_audio"
+        # Must match the profile the collections were set up with
+        self.search_params = search_params_for(storage_profile)
+        if soil_layout not in SOIL_LAYOUTS:
+            raise ValueError(f"Unknown soil layout: {soil_layout}")
+        self.soil_layout = soil_layout
+        self.ranker = MethodRanker()
+
+        self.meta_collection = META_COLLECTION
+        self._scaler_loaded = False
+        self._layout_version = None
+        self._layout_checked_at = 0.0
+
+    async def _run_blocking(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def embed_query(self, query_text):
+        """Encode a wisdom query off the event loop"""
+        return await self._run_blocking(self.embedding_gen.generate_query_embedding, query_text)
+
+    async def _load_feature_scaler(self):
+        """Install the soil collection's stored feature scaler and layout (re-checked as in BhuSmrutiQdrant)"""
+        now = time.monotonic()
+        if self._scaler_loaded and now - self._layout_checked_at < LAYOUT_CHECK_INTERVAL:
+            return
+        self._layout_checked_at = now
+        try:
+            records = await self.client.retrieve(
+                collection_name=self.meta_collection,
+                ids=[collection_meta_id(self.soil_collection)],
+                with_payload=True
+            )
+        except Exception:
+            records = []
+        meta = records[0].payload if records else {}
+        if self._scaler_loaded and meta.get("layout_version") == self._layout_version:
+            return
+        self._layout_version = meta.get("layout_version")
+        scaler = meta.get("feature_scaler")
+        self.embedding_gen.feature_scaler = SensorFeatureScaler.from_dict(scaler) if scaler else None
+        if meta.get("soil_layout"):
+            self.soil_layout = meta["soil_layout"]
+        self._scaler_loaded = True
+
+    async def embed_soil_query(self, query_text, sensor_data=None, weights=None):
+        """Encode a soil query (text + sensor features) off the event loop
+
+        With the named layout this is a {vector name: vector} dict for hybrid_soil_query.
+        """
+        await self._load_feature_scaler()
+        if self.soil_layout == "named":
+            return await self._run_blocking(soil_query_vectors, self.embedding_gen, query_text, sensor_data)
+        return await self._run_blocking(
+            self.embedding_gen.generate_soil_query_embedding, query_text, sensor_data, weights
+        )
+
+    async def _query_soil(self, query_vector, query_filter, limit, weights=None):
+        if isinstance(query_vector, dict):
+            response = await self.client.query_points(
+                collection_name=self.soil_collection,
+                **hybrid_soil_query(query_vector, query_filter, limit, weights, self.search_params)
+            )
+            return response.points
+        return await self.client.search(
+            collection_name=self.soil_collection,
+            query_vector=query_vector,
+            query_filter=query_filter,
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+            search_params=self.search_params
+        )
+
+    async def search_soil_by_vector(self, query_vector, season_filter=None, limit=5, weights=None, near=None,
+                                    since=None, until=None):
+        query_filter = combine_filters(
+            season_filter_for(season_filter), geo_filter_for(near), date_filter_for(SOIL_DATE_FIELD, since, until)
+        )
+        return await self._query_soil(query_vector, query_filter, limit, weights)
+
+    async def search_wisdom_by_vector(self, query_vector, soil_type_filter=None, limit=5, near=None,
+                                      since=None, until=None):
+        return await self.client.search(
+            collection_name=self.wisdom_collection,
+            query_vector=query_vector,
+            query_filter=combine_filters(
+                soil_type_filter_for(soil_type_filter), geo_filter_for(near),
+                date_filter_for(WISDOM_DATE_FIELD, since, until)
+            ),
+            limit=limit,
+            with_payload=True,
+            with_vectors=False,
+            search_params=self.search_params
+        )
+
+    async def recommend_for_vector(self, query_vector, soil_type=None, limit=5, exclude_id=None,
+                                   pool_size=RECOMMENDATION_POOL_SIZE, with_scores=False):
+        """Methods ranked over the pool of soils most similar to a vector"""
+        await self._load_feature_scaler()
+        results = await self._query_soil(
+            query_vector, recommendation_filter_for(soil_type, good_yield_only=False), pool_size
+        )
+        # Ranking a few thousand candidates takes milliseconds; no need to leave the loop
+        ranked = self.ranker.rank(results, exclude_id=exclude_id, max_methods=limit)
+        return ranked if with_scores else [method for method, _ in ranked]
+
+    async def search_similar_soil(self, query_text, sensor_data=None, season_filter=None, limit=5, weights=None,
+                                  near=None, since=None, until=None):
+        """Search for similar soil samples (near=(lat, lon, radius_km) filters by distance, since / until by date)"""
+        query_vector = await self.embed_soil_query(query_text, sensor_data, weights)
+        return await self.search_soil_by_vector(
+            query_vector, season_filter=season_filter, limit=limit, weights=weights, near=near,
+            since=since, until=until
+        )
+
+    async def search_wisdom(self, query_text, soil_type_filter=None, limit=5, near=None, since=None, until=None):
+        """Search for relevant wisdom snippets"""
+        query_vector = await self.embed_query(query_text)
+        return await self.search_wisdom_by_vector(
+            query_vector, soil_type_filter=soil_type_filter, limit=limit, near=near, since=since, until=until
+        )
+
+    async def get_recommendations(self, soil_sample_id, limit=5, pool_size=RECOMMENDATION_POOL_SIZE, with_scores=False):
+        """Get up to limit methods ranked over pool_size similar soils ([(method, score)] with_scores)
+
+        limit is the number of methods returned. It used to be the number of good-yield
+        neighbours searched (default 3), with at most 5 methods returned; a call without
+        limit still returns up to 5 methods. pool_size (default RECOMMENDATION_POOL_SIZE)
+        same-type neighbours of any yield are scored, so a larger pool costs one bigger
+        search, not more requests.
+        """
+        soil_sample = (await self.client.retrieve(
+            collection_name=self.soil_collection,
+            ids=[int(soil_sample_id.split("_")[1])],
+            with_payload=True,
+            with_vectors=True
+        ))[0]
+
+        return await self.recommend_for_vector(
+            soil_sample.vector,
+            soil_type=soil_sample.payload["soil_type"],
+            limit=limit,
+            exclude_id=soil_sample_id,
+            pool_size=pool_size,
+            with_scores=with_scores
+        )
+
+    async def advise(self, query, sensor_data=None, season_filter=None, soil_type_filter=None, limit=5):
+        """Soil matches, wisdom and recommended methods for one farmer query, fetched concurrently"""
+
+        async def soil_branch():
+            query_vector = await self.embed_soil_query(query, sensor_data)
+            # Recommendations reuse the soil query vector, so no extra retrieve round-trip
+            return await asyncio.gather(
+                self.search_soil_by_vector(query_vector, season_filter=season_filter, limit=limit),
+                self.recommend_for_vector(query_vector, soil_type=soil_type_filter, limit=limit)
+            )
+
+        async def wisdom_branch():
+            query_vector = await self.embed_query(query)
+            return await self.search_wisdom_by_vector(query_vector, soil_type_filter=soil_type_filter, limit=limit)
+
+        (soil_matches, recommendations), wisdom = await asyncio.gather(soil_branch(), wisdom_branch())
+
+        return {
+            "soil_matches": soil_matches,
+            "wisdom": wisdom,
+            "recommendations": recommendations
+        }
+
+    async def close(self):
+        await self.client.close()
@@ -0,0 +1,214 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from data_stream import iter_records, iter_chunks, find_data_file
+from embedding import EmbeddingGenerator
+from onnx_encoder import ENCODER_BACKENDS, export_onnx
+
+# Per-process state of backfill workers
+_worker_gen = None
+_worker_dir = None
+
+
+def _init_worker(model_name, backend, work_dir, threads_per_worker):
+    """Load one model per worker process, limited to its share of the CPU threads
+
+    ONNX backends only load here: run_backfill exports and validates the model beforehand.
+    """
+    global _worker_gen, _worker_dir
+    os.environ["OMP_NUM_THREADS"] = str(threads_per_worker)
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _worker_gen = EmbeddingGenerator(model_name=model_name, backend=backend, threads=threads_per_worker, warm_up=True)
+    _worker_dir = work_dir
+
+
+def _encode_shard(shard_number, texts, batch_size):
+    """Encode one shard into a memory-mapped .npy file; returns (shard_number, rows)"""
+    embeddings = _worker_gen.encode_texts(texts, batch_size=batch_size)
+    path = shard_path(_worker_dir, shard_number)
+    out = np.lib.format.open_memmap(f"{path}.tmp", mode="w+", dtype=np.float32, shape=embeddings.shape)
+    out[:] = embeddings
+    out.flush()
+    del out
+    # Only complete files carry the final name
+    os.replace(f"{path}.tmp", path)
+    return shard_number, len(texts)
+
+
+def shard_path(work_dir, shard_number):
+    return os.path.join(work_dir, f"shard_{shard_number:06d}.npy")
+
+
+class BackfillCheckpoint:
+    """Completed shards of one backfill, saved atomically after every shard"""
+
+    def __init__(self, path, source, kind, model_name, shard_size):
+        self.path = path
+        self.identity = {"source": os.path.abspath(source), "kind": kind, "model": model_name, "shard_size": shard_size}
+        self.completed = set()
+        self.records = 0
+
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data["identity"] != self.identity:
+                raise ValueError(
+                    f"Checkpoint '{path}' belongs to another backfill ({data['identity']}); "
+                    "remove it or pass --restart"
+                )
+            self.completed = set(data["completed_shards"])
+            self.records = data["records"]
+
+    def mark_done(self, shard_number, rows):
+        self.completed.add(shard_number)
+        self.records += rows
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "identity": self.identity,
+                "completed_shards": sorted(self.completed),
+                "records": self.records
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def run_backfill(bank, path, kind="soil", workers=None, shard_size=2048, batch_size=64,
+                 upsert_workers=4, upsert_batch_size=256, checkpoint_path=None, work_dir="data/backfill",
+                 on_points=None):
+    """Re-embed a JSON/JSON Lines file into the bank's collection with a process pool
+
+    Shards (shard_size records, in file order) are encoded by worker processes that each load
+    the bank's model and encoder backend once and hand back vectors through memory-mapped .npy files. The main process
+    builds points from them and upserts in upsert_batch_size batches on upsert_workers threads.
+    A shard is checkpointed once all of its upserts are acknowledged, so a rerun with the same
+    checkpoint skips it. on_points, if given, is called in the main process with each shard's
+    upserted points.
+    """
+    if kind not in ("soil", "wisdom"):
+        raise ValueError(f"Unknown record kind: {kind}")
+    workers = workers or os.cpu_count() or 1
+    embedding_gen = bank.embedding_gen
+    threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(work_dir, exist_ok=True)
+
+    checkpoint = BackfillCheckpoint(checkpoint_path, path, kind, embedding_gen.cache_namespace, shard_size)
+    if checkpoint.completed:
+        print(f"Resuming: {len(checkpoint.completed)} shards ({checkpoint.records} records) already done")
+
+    if kind == "soil":
+        texts_for, build_points, upsert = embedding_gen.soil_texts, bank._soil_points, bank._upsert_soil_points
+    else:
+        texts_for, build_points, upsert = embedding_gen.wisdom_texts, bank._wisdom_points, bank._upsert_wisdom_points
+
+    started = time.perf_counter()
+    done = 0
+    pending = {}   # future -> shard records
+    # Limit in-flight shards so memory stays bounded on large sources
+    max_in_flight = workers * 2
+
+    if embedding_gen.backend != "torch":
+        # Export and validate once here, not concurrently in every worker into the same directory
+        export_onnx(embedding_gen.model_name, quantize=embedding_gen.backend == "onnx-int8")
+
+    # Spawned workers don't inherit the parent's model or thread pools
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(embedding_gen.model_name, embedding_gen.backend, work_dir,
+                                       threads_per_worker)) as encoders, \
+            ThreadPoolExecutor(max_workers=upsert_workers) as upserters:
+
+        def finish(future):
+            nonlocal done
+            records = pending.pop(future)
+            shard_number, rows = future.result()
+            shard_file = shard_path(work_dir, shard_number)
+            embeddings = np.load(shard_file, mmap_mode="r")
+
+            # Points are built here so the feature scaler is fit once, on the first shard
+            points = build_points(records, batch_size=batch_size, text_embeddings=embeddings)
+            batches = [points[i:i + upsert_batch_size] for i in range(0, len(points), upsert_batch_size)]
+            list(upserters.map(upsert, batches))  # re-raises the first failed batch
+            if on_points is not None:
+                on_points(points)
+            del embeddings
+            os.remove(shard_file)
+
+            checkpoint.mark_done(shard_number, rows)
+            done += rows
+            elapsed = time.perf_counter() - started
+            print(f"[{kind}] shard {shard_number}: {rows} records, {done} this run ({done / elapsed:.1f} rec/s)")
+
+        for shard_number, records in enumerate(iter_chunks(iter_records(path), shard_size)):
+            if shard_number in checkpoint.completed:
+                continue
+            while len(pending) >= max_in_flight:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    finish(future)
+            pending[encoders.submit(_encode_shard, shard_number, texts_for(records), batch_size)] = records
+
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                finish(future)
+
+    bank.stats_store.save()
+    elapsed = time.perf_counter() - started
+    print(f"Backfilled {done} {kind} records in {elapsed:.1f}s with {workers} workers "
+          f"({done / elapsed if elapsed else 0:.1f} rec/s); {checkpoint.records} total")
+    return done
+
+
+if __name__ == "__main__":
+    from quadrant import BhuSmrutiQdrant
+
+    parser = argparse.ArgumentParser(description="Re-embed a data file into Qdrant with a process pool")
+    parser.add_argument("--kind", choices=["soil", "wisdom"], default="soil")
+    parser.add_argument("--data", default=None, help="JSON array or JSON Lines file (default: data/<kind> file)")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--encoder-backend", choices=ENCODER_BACKENDS, default="torch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=2048)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--upsert-workers", type=int, default=4)
+    parser.add_argument("--upsert-batch-size", type=int, default=256)
+    parser.add_argument("--checkpoint", default=None, help="default: data/backfill_<kind>.json")
+    parser.add_argument("--work-dir", default="data/backfill")
+    parser.add_argument("--restart", action="store_true", help="Ignore and replace an existing checkpoint")
+    parser.add_argument("--local", action="store_true", help="Use the local Qdrant server instead of Qdrant Cloud")
+    args = parser.parse_args()
+
+    data_path = args.data or find_data_file("data", {"soil": "soil_samples", "wisdom": "wisdom_audio"}[args.kind])
+    checkpoint_path = args.checkpoint or f"data/backfill_{args.kind}.json"
+    if args.restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    bank = BhuSmrutiQdrant(
+        use_cloud=not args.local,
+        embedding_cache_path=None,
+        embedding_gen=EmbeddingGenerator(model_name=args.model, backend=args.encoder_backend)
+    )
+    bank.setup_collections()
+    try:
+        run_backfill(
+            bank, data_path, kind=args.kind, workers=args.workers, shard_size=args.shard_size,
+            batch_size=args.batch_size, upsert_workers=args.upsert_workers,
+            upsert_batch_size=args.upsert_batch_size, checkpoint_path=checkpoint_path, work_dir=args.work_dir
+        )
+    finally:
+        bank.close()
@@ -0,0 +1,51 @@
+import argparse
+import json
+import time
+
+from embedding import EmbeddingGenerator
+
+
+def load_records(path, count):
+    """Load records from a JSON file, repeating them to reach `count`"""
+    with open(path, "r") as f:
+        records = json.load(f)
+    return [records[i % len(records)] for i in range(count)]
+
+
+def time_call(fn):
+    """Return the wall time of a single call in seconds"""
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run_benchmark(count=2000, batch_size=64):
+    """Compare per-record and batched embedding throughput"""
+    embedding_gen = EmbeddingGenerator()
+
+    soil_samples = load_records("data/soil_samples.json", count)
+    wisdom_data = load_records("data/wisdom_audio.json", count)
+
+    # Warm up the model so the first timed call is not penalised
+    embedding_gen.generate_soil_embeddings(soil_samples[:batch_size], batch_size=batch_size)
+
+    cases = [
+        ("soil per-record", lambda: [embedding_gen.generate_soil_embedding(s) for s in soil_samples]),
+        ("soil batched", lambda: embedding_gen.generate_soil_embeddings(soil_samples, batch_size=batch_size)),
+        ("wisdom per-record", lambda: [embedding_gen.generate_wisdom_embedding(w) for w in wisdom_data]),
+        ("wisdom batched", lambda: embedding_gen.generate_wisdom_embeddings(wisdom_data, batch_size=batch_size)),
+    ]
+
+    print(f"Embedding {count} records per case (batch_size={batch_size})")
+    for name, fn in cases:
+        elapsed = time_call(fn)
+        print(f"  {name:<18} {elapsed:8.2f}s  {count / elapsed:10.1f} records/sec")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-record embedding")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    run_benchmark(count=args.count, batch_size=args.batch_size)
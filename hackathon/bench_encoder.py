@@ -0,0 +1,69 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from bench_embedding import load_records
+from embedding import EmbeddingGenerator
+from onnx_encoder import ENCODER_BACKENDS, MIN_COSINE_AGREEMENT, cosine_agreement
+
+QUERIES = [
+    "black cotton soil low moisture",
+    "how to keep pests off paddy without chemicals",
+    "red loam millet summer mulching",
+    "saline soil near the coast, what to grow",
+]
+
+
+def run_benchmark(backends=ENCODER_BACKENDS, count=1000, batch_size=64, single_queries=200, threads=None,
+                  min_cosine=MIN_COSINE_AGREEMENT):
+    """Single-query latency, batch throughput and cosine agreement with PyTorch per encoder backend"""
+    soil_samples = load_records("data/soil_samples.json", count)
+    reference_gen = EmbeddingGenerator(backend="torch")
+    texts = reference_gen.soil_texts(soil_samples)
+    reference = reference_gen.encode_texts(texts, batch_size=batch_size)
+
+    print(f"{single_queries} single queries, {count} soil texts batched by {batch_size}, threads={threads}")
+    failed = []
+    for backend in backends:
+        embedding_gen = EmbeddingGenerator(backend=backend, threads=threads, warm_up=True)
+
+        latencies = []
+        for i in range(single_queries):
+            start = time.perf_counter()
+            embedding_gen.generate_query_embedding(QUERIES[i % len(QUERIES)])
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        vectors = embedding_gen.encode_texts(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        agreement = cosine_agreement(reference, vectors)
+        print(
+            f"  {backend:<10} query p50={np.percentile(latencies, 50):6.2f}ms p95={np.percentile(latencies, 95):6.2f}ms  "
+            f"batch {count / elapsed:8.1f} texts/s  cosine vs torch mean={agreement.mean():.4f} min={agreement.min():.4f}"
+        )
+        if agreement.mean() < min_cosine:
+            failed.append(backend)
+
+    if failed:
+        print(f"Cosine agreement below {min_cosine}: {', '.join(failed)}")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency, throughput and agreement of the encoder backends")
+    parser.add_argument("--backends", nargs="+", choices=ENCODER_BACKENDS, default=list(ENCODER_BACKENDS))
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--single-queries", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--min-cosine", type=float, default=MIN_COSINE_AGREEMENT)
+    args = parser.parse_args()
+
+    ok = run_benchmark(
+        backends=args.backends, count=args.count, batch_size=args.batch_size,
+        single_queries=args.single_queries, threads=args.threads, min_cosine=args.min_cosine
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,55 @@
+import argparse
+import contextlib
+import os
+import threading
+import time
+
+from qdrant_client.http.models import Distance, VectorParams, PointStruct
+
+from quadrant import BhuSmrutiQdrant
+
+
+def run_stress(threads=32, events_per_thread=200, sync=True):
+    """Hammer one soil sample from many threads and check no increment is lost"""
+    bank = BhuSmrutiQdrant(backend="embedded", embedding_cache_path=None)
+    bank.client.create_collection(
+        collection_name=bank.soil_collection,
+        vectors_config=VectorParams(size=388, distance=Distance.COSINE)
+    )
+    bank.client.upsert(
+        collection_name=bank.soil_collection,
+        points=[PointStruct(id=1, vector=[1.0] * 388, payload={"id": "soil_001", "success_count": 5})]
+    )
+
+    def worker():
+        for _ in range(events_per_thread):
+            bank.reinforce_memory("soil_001", sync=sync)
+
+    start = time.perf_counter()
+    # Silence the per-event progress prints while the threads run
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        bank.close()
+    elapsed = time.perf_counter() - start
+
+    expected = 5 + threads * events_per_thread
+    actual = bank.client.retrieve(bank.soil_collection, ids=[1], with_payload=True)[0].payload["success_count"]
+    events = threads * events_per_thread
+    mode = "sync" if sync else "deferred"
+    print(f"{mode:<9} {events} events in {elapsed:.2f}s ({events / elapsed:.0f} events/sec): "
+          f"success_count = {actual}, expected {expected}")
+    assert actual == expected, "Lost reinforcement increments"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent reinforce_memory stress test")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    run_stress(args.threads, args.events, sync=True)
+    run_stress(args.threads, args.events, sync=False)
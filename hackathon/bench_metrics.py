@@ -0,0 +1,62 @@
+import argparse
+import contextlib
+import os
+import time
+
+from metrics import METRICS, MetricsRegistry
+from quadrant import BhuSmrutiQdrant
+
+
+class _Noop:
+    def call(self):
+        with REGISTRY.stage("work"):
+            return None
+
+
+REGISTRY = MetricsRegistry()
+
+
+def per_call_ns(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def run_benchmark(calls=200_000, searches=500):
+    """Overhead of the instrumentation per call, disabled and enabled"""
+    plain = _Noop().call
+    wrapped = REGISTRY.instrument(_Noop.call, "noop.call").__get__(_Noop())
+
+    baseline = per_call_ns(plain, calls)
+    REGISTRY.disable()
+    disabled = per_call_ns(wrapped, calls)
+    REGISTRY.enable()
+    enabled = per_call_ns(wrapped, calls)
+    print(f"Empty method with one stage, {calls} calls:")
+    print(f"  uninstrumented {baseline:8.0f} ns/call")
+    print(f"  disabled       {disabled:8.0f} ns/call (+{disabled - baseline:.0f} ns)")
+    print(f"  enabled        {enabled:8.0f} ns/call (+{enabled - baseline:.0f} ns)")
+
+    bank = BhuSmrutiQdrant(backend="embedded", embedding_cache_path=None, result_cache_size=0)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        bank.setup_collections()
+        bank.load_initial_data()
+    query = ("black cotton soil low moisture", {"moisture": 0.3, "pH": 7.5, "temperature": 31})
+    bank.search_similar_soil(*query)
+
+    print(f"search_similar_soil on the embedded index, {searches} calls:")
+    for enabled in (False, True):
+        METRICS.enabled = enabled
+        elapsed = per_call_ns(lambda: bank.search_similar_soil(*query), searches) / 1e6
+        print(f"  metrics {'enabled ' if enabled else 'disabled'} {elapsed:8.3f} ms/call")
+    METRICS.disable()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overhead of the metrics instrumentation")
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--searches", type=int, default=500)
+    args = parser.parse_args()
+
+    run_benchmark(calls=args.calls, searches=args.searches)
@@ -0,0 +1,115 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams, Filter, FieldCondition, MatchValue
+
+from quadrant import SOIL_PAYLOAD_INDEXES
+
+SOIL_TYPES = ["Red Loam", "Black Cotton", "Alluvial", "Laterite", "Mountain",
+              "Desert", "Peaty", "Saline", "Clay", "Sandy"]
+SEASONS = ["pre-monsoon", "monsoon", "post-monsoon", "winter", "summer"]
+YIELDS = ["good", "average", "poor"]
+
+
+def fill_collection(client, name, vectors, payloads, indexed, batch_size=1000):
+    """Create a soil-shaped collection, optionally with the payload indexes, and load it"""
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(size=vectors.shape[1], distance=Distance.COSINE)
+    )
+    if indexed:
+        # Declared before loading so HNSW builds the filter-aware links
+        for field_name, field_schema in SOIL_PAYLOAD_INDEXES.items():
+            client.create_payload_index(name, field_name=field_name, field_schema=field_schema, wait=True)
+
+    client.upload_collection(
+        collection_name=name,
+        vectors=vectors,
+        payload=payloads,
+        ids=range(len(payloads)),
+        batch_size=batch_size,
+        wait=True
+    )
+
+    # Let the optimizer finish building the index before timing searches
+    while client.get_collection(name).status != models.CollectionStatus.GREEN:
+        time.sleep(0.5)
+
+
+def measure(client, name, queries, filters, limit=5):
+    latencies = []
+    for query, query_filter in zip(queries, filters):
+        start = time.perf_counter()
+        client.search(collection_name=name, query_vector=query, query_filter=query_filter, limit=limit)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, [50, 95, 99])
+
+
+def run_benchmark(points=200000, queries=200, seed=7, host="localhost", port=6333):
+    """Filtered search latency with and without payload indexes on a Qdrant server"""
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY")) \
+        if os.getenv("QDRANT_URL") else QdrantClient(host=host, port=port)
+    rng = np.random.default_rng(seed)
+
+    vectors = rng.standard_normal((points, 388)).astype(np.float32)
+    payloads = [
+        {
+            "soil_type": SOIL_TYPES[s],
+            "season": SEASONS[t],
+            "yield_quality": YIELDS[y],
+            "success_count": int(c)
+        }
+        for s, t, y, c in zip(
+            rng.integers(0, len(SOIL_TYPES), points),
+            rng.integers(0, len(SEASONS), points),
+            rng.integers(0, len(YIELDS), points),
+            rng.integers(1, 16, points)
+        )
+    ]
+
+    query_vectors = rng.standard_normal((queries, 388)).astype(np.float32)
+    cases = {
+        # search_similar_soil(season_filter=...) - 20% selectivity
+        "season": [
+            Filter(must=[FieldCondition(key="season", match=MatchValue(value=SEASONS[i % len(SEASONS)]))])
+            for i in range(queries)
+        ],
+        # get_recommendations - good yield + soil type, ~3% selectivity
+        "yield+soil_type": [
+            Filter(must=[
+                FieldCondition(key="yield_quality", match=MatchValue(value="good")),
+                FieldCondition(key="soil_type", match=MatchValue(value=SOIL_TYPES[i % len(SOIL_TYPES)]))
+            ])
+            for i in range(queries)
+        ],
+    }
+
+    print(f"{points} points, {queries} queries per case")
+    for indexed in (False, True):
+        name = "bench_soil_indexed" if indexed else "bench_soil_plain"
+        start = time.perf_counter()
+        fill_collection(client, name, vectors, payloads, indexed)
+        print(f"Loaded '{name}' in {time.perf_counter() - start:.1f}s")
+
+        for case, filters in cases.items():
+            p50, p95, p99 = measure(client, name, query_vectors, filters)
+            label = "indexed" if indexed else "no index"
+            print(f"  {label:<9} {case:<16} p50={p50:7.2f}ms p95={p95:7.2f}ms p99={p99:7.2f}ms")
+
+        client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtered search latency with and without payload indexes")
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    run_benchmark(points=args.points, queries=args.queries, seed=args.seed)
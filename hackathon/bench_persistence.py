@@ -0,0 +1,74 @@
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+import numpy as np
+from qdrant_client.http.models import PointStruct
+
+from quadrant import BhuSmrutiQdrant
+from setup import generate_soil_samples
+
+
+def open_bank(directory):
+    return BhuSmrutiQdrant(
+        backend="embedded",
+        local_path=os.path.join(directory, "index"),
+        stats_path=os.path.join(directory, "soil_stats.json"),
+        embedding_cache_path=None
+    )
+
+
+def run_round_trip(soil_count=1000, seed=42):
+    """Write through an embedded bank with a local_path, reopen it and check nothing was lost"""
+    rng = np.random.default_rng(seed)
+    samples = generate_soil_samples(rng, 0, soil_count, "2026-01-01")
+    vectors = rng.random((soil_count, 388), dtype=np.float32)
+
+    with tempfile.TemporaryDirectory() as directory:
+        bank = open_bank(directory)
+        # Silence the setup and reinforcement prints
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            bank.setup_collections()
+            scaler = bank.embedding_gen.fit_feature_scaler(samples)
+            bank.save_collection_meta(bank.soil_collection, feature_scaler=scaler.to_dict())
+            # Vectors don't need the model here; the payloads and stats are the real write path
+            bank._upsert_soil_points([
+                PointStruct(id=int(sample["id"].split("_")[1]), vector=vector.tolist(),
+                            payload=bank._soil_payload(sample))
+                for sample, vector in zip(samples, vectors)
+            ])
+            bank.reinforce_memory(samples[0]["id"], sync=True)
+            stats = bank.get_soil_stats()
+
+            started = time.perf_counter()
+            bank.close()
+            closed = time.perf_counter() - started
+
+            started = time.perf_counter()
+            reopened = open_bank(directory)
+            # Indexes and storage settings come back too, so this must not rebuild anything
+            reopened.setup_collections()
+            count = reopened.client.count(collection_name=reopened.soil_collection, exact=True).count
+            reloaded_scaler = reopened.load_collection_meta(reopened.soil_collection).get("feature_scaler")
+            first = reopened.client.retrieve(reopened.soil_collection, ids=[1], with_payload=True)[0].payload
+            reloaded_stats = reopened.get_soil_stats()
+            differences = reopened.check_soil_stats()
+            loaded = time.perf_counter() - started
+
+    print(f"{soil_count} soil samples: persisted in {closed:.2f}s, reloaded in {loaded:.2f}s")
+    assert count == soil_count, f"Reloaded {count} points, expected {soil_count}"
+    assert reloaded_scaler == scaler.to_dict(), "Feature scaler lost on reload"
+    assert first["success_count"] == samples[0]["success_count"] + 1, "Reinforcement lost on reload"
+    assert reloaded_stats == stats, "Materialized stats differ after reload"
+    assert not differences, f"Reloaded stats don't match the reloaded points: {differences}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedded backend persist / reload round trip")
+    parser.add_argument("--soil", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run_round_trip(args.soil, args.seed)
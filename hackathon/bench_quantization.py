@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, VectorParams
+
+from quadrant import STORAGE_PROFILES, quantization_config_for, search_params_for
+
+
+def generate_vectors(points, queries, dim=388, clusters=64, seed=11):
+    """Clustered unit vectors, closer to real embeddings than isotropic noise"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+
+    def sample(count):
+        vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.standard_normal((count, dim)).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return sample(points), sample(queries)
+
+
+def exact_top_k(vectors, queries, k):
+    """Ground-truth neighbours from a brute-force float32 scan"""
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def ram_bytes_per_point(storage_profile, dim, hnsw_m=16):
+    """Approximate resident bytes per point (vectors + level-0 HNSW links, payload excluded)"""
+    profile = STORAGE_PROFILES[storage_profile]
+    quantized = {None: 0, "int8": dim + 8, "binary": (dim + 7) // 8}[profile["quantization"]]
+    original = 0 if profile["on_disk"] else 4 * dim
+    return original + quantized + 2 * hnsw_m * 4
+
+
+def run_benchmark(points=100000, queries=200, k=10, seed=11, host="localhost", port=6333):
+    """Recall@k and estimated RAM per point for every storage profile"""
+    client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY")) \
+        if os.getenv("QDRANT_URL") else QdrantClient(host=host, port=port)
+
+    vectors, query_vectors = generate_vectors(points, queries, seed=seed)
+    truth = exact_top_k(vectors, query_vectors, k)
+    dim = vectors.shape[1]
+
+    print(f"{points} points x {dim} dims, {queries} queries, recall@{k} vs exact float32")
+    for storage_profile, profile in STORAGE_PROFILES.items():
+        name = f"bench_storage_{storage_profile.replace('-', '_')}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        client.create_collection(
+            collection_name=name,
+            vectors_config=VectorParams(size=dim, distance=Distance.COSINE, on_disk=profile["on_disk"]),
+            quantization_config=quantization_config_for(storage_profile),
+            on_disk_payload=profile["on_disk"]
+        )
+        client.upload_collection(collection_name=name, vectors=vectors, ids=range(points), batch_size=1000, wait=True)
+        while client.get_collection(name).status != models.CollectionStatus.GREEN:
+            time.sleep(0.5)
+
+        search_params = search_params_for(storage_profile)
+        hits = 0
+        latencies = []
+        for query, expected in zip(query_vectors, truth):
+            start = time.perf_counter()
+            results = client.search(collection_name=name, query_vector=query, limit=k, search_params=search_params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len(expected.intersection(result.id for result in results))
+
+        ram = ram_bytes_per_point(storage_profile, dim)
+        print(
+            f"  {storage_profile:<12} recall@{k}={hits / (queries * k):.3f}  "
+            f"~{ram:5d} B/point RAM ({ram * points / 2**20:8.1f} MiB)  "
+            f"p50={np.percentile(latencies, 50):6.2f}ms p95={np.percentile(latencies, 95):6.2f}ms"
+        )
+        client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs memory for the soil storage profiles")
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    run_benchmark(points=args.points, queries=args.queries, k=args.k, seed=args.seed)
@@ -0,0 +1,83 @@
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.http.models import Distance, VectorParams, PointStruct
+
+from bench_payload_index import SOIL_TYPES, SEASONS, YIELDS
+from bench_recommender import METHODS
+from embedding import EmbeddingGenerator
+from quadrant import BhuSmrutiQdrant, SOIL_PAYLOAD_INDEXES
+
+
+def fill_collection(client, name, points, seed=5, batch_size=1000):
+    """Soil-shaped collection with random vectors and payloads"""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    if client.collection_exists(name):
+        client.delete_collection(name)
+    client.create_collection(collection_name=name, vectors_config=VectorParams(size=388, distance=Distance.COSINE))
+    for field_name, field_schema in SOIL_PAYLOAD_INDEXES.items():
+        client.create_payload_index(name, field_name=field_name, field_schema=field_schema, wait=True)
+
+    for start in range(0, points, batch_size):
+        ids = range(start + 1, min(start + batch_size, points) + 1)
+        vectors = rng.standard_normal((len(ids), 388)).astype(np.float32)
+        client.upsert(collection_name=name, wait=True, points=[
+            PointStruct(id=i, vector=vector.tolist(), payload={
+                "id": f"soil_{i:03d}",
+                "soil_type": SOIL_TYPES[rng.integers(0, len(SOIL_TYPES))],
+                "season": SEASONS[rng.integers(0, len(SEASONS))],
+                "traditional_methods": rng.choice(METHODS, size=rng.integers(2, 5), replace=False).tolist(),
+                "yield_quality": YIELDS[rng.integers(0, len(YIELDS))],
+                "success_count": int(rng.integers(1, 16)),
+                "date": (today - timedelta(days=int(rng.integers(0, 1825)))).isoformat(),
+            })
+            for i, vector in zip(ids, vectors)
+        ])
+
+
+def run_benchmark(points=20000, samples=1000, pool_size=100, embedded=False, host="localhost", port=6333):
+    """Samples/s of get_recommendations_bulk vs a loop over get_recommendations"""
+    if embedded:
+        bank = BhuSmrutiQdrant(backend="embedded", embedding_gen=EmbeddingGenerator(), stats_path=None)
+    else:
+        client = QdrantClient(url=os.getenv("QDRANT_URL"), api_key=os.getenv("QDRANT_API_KEY")) \
+            if os.getenv("QDRANT_URL") else QdrantClient(host=host, port=port)
+        bank = BhuSmrutiQdrant(client=client, embedding_gen=EmbeddingGenerator(), stats_path=None)
+    bank.soil_collection = "bench_soil_bulk"
+    fill_collection(bank.client, bank.soil_collection, points)
+
+    sample_ids = [f"soil_{i:03d}" for i in np.random.default_rng(1).choice(points, samples, replace=False) + 1]
+    print(f"{points} points, {samples} samples, pool of {pool_size} per sample")
+
+    start = time.perf_counter()
+    single = {sample_id: bank.get_recommendations(sample_id, pool_size=pool_size) for sample_id in sample_ids}
+    single_elapsed = time.perf_counter() - start
+    print(f"  single   {single_elapsed:7.2f}s  {samples / single_elapsed:8.1f} samples/s")
+
+    for chunk_size, max_workers in ((64, 1), (64, 4), (256, 4)):
+        start = time.perf_counter()
+        bulk = bank.get_recommendations_bulk(sample_ids, pool_size=pool_size, chunk_size=chunk_size,
+                                             max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+        print(
+            f"  bulk chunk={chunk_size:<4} workers={max_workers}  {elapsed:7.2f}s  {samples / elapsed:8.1f} samples/s  "
+            f"x{single_elapsed / elapsed:.1f}  same results: {bulk == single}"
+        )
+
+    bank.client.delete_collection(bank.soil_collection)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput of bulk vs per-sample recommendations")
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--embedded", action="store_true", help="Use the in-process index instead of a Qdrant server")
+    args = parser.parse_args()
+
+    run_benchmark(points=args.points, samples=args.samples, pool_size=args.pool_size, embedded=args.embedded)
@@ -0,0 +1,60 @@
+import argparse
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from quadrant import extract_methods
+from recommender import MethodRanker
+
+METHODS = ["Mulching", "Crop Rotation", "Natural Compost", "Terrace Farming", "Rainwater Harvesting",
+           "Biodynamic Preparation", "Green Manure", "Intercropping", "Neem Pest Control", "Zero Tillage",
+           "Cow Dung Slurry", "Contour Bunding"]
+
+
+def generate_pool(size, seed=3):
+    """Fake search results shaped like soil ScoredPoints"""
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    return [
+        SimpleNamespace(
+            score=float(score),
+            payload={
+                "id": f"soil_{i:06d}",
+                "traditional_methods": rng.choice(METHODS, size=rng.integers(2, 5), replace=False).tolist(),
+                "success_count": int(rng.integers(1, 16)),
+                "yield_quality": ["good", "average", "poor"][rng.integers(0, 3)],
+                "date": (today - timedelta(days=int(rng.integers(0, 1825)))).isoformat(),
+            }
+        )
+        for i, score in enumerate(np.sort(rng.uniform(0.2, 0.95, size))[::-1])
+    ]
+
+
+def run_benchmark(pool_sizes=(100, 1000, 5000), repeats=50):
+    """Ranking latency per pool size, next to the first-seen dedupe it replaces"""
+    ranker = MethodRanker()
+    for size in pool_sizes:
+        pool = generate_pool(size)
+        timings = {}
+        for name, fn in (("dedupe", lambda: extract_methods(pool)), ("ranker", lambda: ranker.rank(pool))):
+            latencies = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                fn()
+                latencies.append((time.perf_counter() - start) * 1000)
+            timings[name] = np.percentile(latencies, [50, 95])
+        print(
+            f"  pool={size:<6} ranker p50={timings['ranker'][0]:6.2f}ms p95={timings['ranker'][1]:6.2f}ms  "
+            f"(dedupe p50={timings['dedupe'][0]:6.2f}ms)  top={ranker.rank(pool, max_methods=3)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of the method ranker over candidate pools")
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    run_benchmark(pool_sizes=args.pool_sizes, repeats=args.repeats)
@@ -0,0 +1,254 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+from quadrant import BhuSmrutiQdrant
+from setup import generate_synthetic_data
+
+BACKENDS = ("embedded", "memory", "server")
+# Collections, including the meta collection, are prefixed so a run against a real server
+# never touches the app's data or its stored feature scaler
+COLLECTION_PREFIX = "bench_"
+# Untimed calls per case, on arguments that don't appear in the timed calls
+WARMUP_CALLS = 5
+# Metrics where a higher value is a regression (latencies) and where a lower one is (throughput)
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRIC = "ops_per_sec"
+
+SOIL_QUERIES = [
+    "black cotton soil low moisture",
+    "red loam millet summer mulching",
+    "acidic laterite soil in monsoon",
+    "sandy desert soil water retention",
+    "alluvial wheat crop rotation good yield",
+]
+WISDOM_QUERIES = [
+    "how to keep pests off without chemicals",
+    "save water in summer",
+    "prepare soil before monsoon",
+    "revive tired soil",
+]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def make_bank(backend, result_cache=False):
+    if backend == "embedded":
+        kwargs = {"backend": "embedded"}
+    elif backend == "memory":
+        kwargs = {"client": QdrantClient(":memory:")}
+    else:
+        kwargs = {"use_cloud": False}  # local Qdrant server
+    bank = BhuSmrutiQdrant(
+        embedding_cache_path=None,
+        stats_path=None,
+        result_cache_size=1024 if result_cache else 0,
+        **kwargs
+    )
+    bank.soil_collection = COLLECTION_PREFIX + bank.soil_collection
+    bank.wisdom_collection = COLLECTION_PREFIX + bank.wisdom_collection
+    bank.meta_collection = COLLECTION_PREFIX + bank.meta_collection
+    bank.feedback.collection_name = bank.soil_collection
+    return bank
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) of one case"""
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "calls": len(latencies),
+        THROUGHPUT_METRIC: round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+
+def time_calls(fn, args_list, warmup_args=()):
+    """Call fn once per args tuple (after untimed warm-up calls on warmup_args); returns its summary
+
+    Warm-up arguments must differ from the timed ones, or a result cache would turn the
+    first timed calls into hits.
+    """
+    for args in warmup_args:
+        fn(*args)
+    latencies = []
+    started = time.perf_counter()
+    for args in args_list:
+        call_started = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_benchmark(backend="embedded", soil_count=1000, wisdom_count=200, iterations=200, seed=42,
+                  result_cache=False, batch_size=64):
+    """Time the main BhuSmrutiQdrant code paths on generated data; returns the results document"""
+    rng = np.random.default_rng(seed)
+    bank = make_bank(backend, result_cache=result_cache)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as data_dir, open(os.devnull, "w") as devnull:
+        # The app prints per call; keep the report readable
+        with contextlib.redirect_stdout(devnull):
+            generate_synthetic_data(soil_count, wisdom_count, seed=seed, out_dir=data_dir, today="2026-01-01")
+            for name in (bank.soil_collection, bank.wisdom_collection, bank.meta_collection):
+                if bank.client.collection_exists(name):
+                    bank.client.delete_collection(name)
+            bank.setup_collections()
+
+            started = time.perf_counter()
+            bank.load_initial_data(batch_size=batch_size, data_dir=data_dir)
+            elapsed = time.perf_counter() - started
+            with open(os.path.join(data_dir, "soil_samples.json"), "r") as f:
+                soil_samples = json.load(f)
+
+        results["load_initial_data"] = {
+            "calls": 1,
+            "records": soil_count + wisdom_count,
+            "records_per_sec": round((soil_count + wisdom_count) / elapsed, 2),
+            "seconds": round(elapsed, 3),
+        }
+
+        samples = [soil_samples[i] for i in rng.integers(0, len(soil_samples), iterations)]
+        queries = [SOIL_QUERIES[i % len(SOIL_QUERIES)] for i in range(iterations)]
+        seasons = [sample["season"] for sample in samples]
+        # Warm-up queries and samples outside the timed set
+        timed_ids = {sample["id"] for sample in samples}
+        spare = [sample for sample in soil_samples if sample["id"] not in timed_ids] or soil_samples
+        warmup_samples = spare[:WARMUP_CALLS]
+        warmup_queries = [f"warm-up query {i}" for i in range(len(warmup_samples))]
+        warmup_ids = [(s["id"],) for s in warmup_samples]
+        cases = [
+            ("search_similar_soil", bank.search_similar_soil,
+             [(q, s["sensor_data"]) for q, s in zip(queries, samples)],
+             [(q, s["sensor_data"]) for q, s in zip(warmup_queries, warmup_samples)]),
+            ("search_similar_soil_season", bank.search_similar_soil,
+             [(q, s["sensor_data"], season) for q, s, season in zip(queries, samples, seasons)],
+             [(q, s["sensor_data"], s["season"]) for q, s in zip(warmup_queries, warmup_samples)]),
+            ("search_wisdom", bank.search_wisdom,
+             [(WISDOM_QUERIES[i % len(WISDOM_QUERIES)],) for i in range(iterations)],
+             [(q,) for q in warmup_queries]),
+            ("get_recommendations", bank.get_recommendations, [(s["id"],) for s in samples], warmup_ids),
+            ("reinforce_memory", bank.reinforce_memory, [(s["id"],) for s in samples], warmup_ids),
+            ("reinforce_memory_deferred", lambda sample_id: bank.reinforce_memory(sample_id, sync=False),
+             [(s["id"],) for s in samples], warmup_ids),
+            ("get_soil_stats", bank.get_soil_stats, [()] * iterations, [()] * WARMUP_CALLS),
+            ("get_soil_stats_scan", lambda: bank.get_soil_stats(materialized=False),
+             [()] * max(iterations // 5, 20), [()] * WARMUP_CALLS),
+        ]
+        with contextlib.redirect_stdout(devnull):
+            for name, fn, args_list, warmup_args in cases:
+                results[name] = time_calls(fn, args_list, warmup_args)
+            bank.close()
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "backend": backend,
+            "soil_count": soil_count,
+            "wisdom_count": wisdom_count,
+            "iterations": iterations,
+            "seed": seed,
+            "result_cache": result_cache,
+            "encoder_backend": bank.embedding_gen.backend,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.2, min_delta_ms=0.05):
+    """Regressions of current vs baseline: latency up or throughput down by more than threshold
+
+    Latency changes smaller than min_delta_ms are timer noise on sub-millisecond cases and are ignored.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if metric in result and metric in previous and result[metric] > previous[metric] * (1 + threshold) \
+                    and result[metric] - previous[metric] > min_delta_ms:
+                regressions.append((name, metric, previous[metric], result[metric]))
+        if "mean_ms" in result and result["mean_ms"] - previous.get("mean_ms", 0) <= min_delta_ms:
+            continue
+        for metric in (THROUGHPUT_METRIC, "records_per_sec"):
+            if result.get(metric) and previous.get(metric) and result[metric] < previous[metric] * (1 - threshold):
+                regressions.append((name, metric, previous[metric], result[metric]))
+    return regressions
+
+
+def print_report(document):
+    meta = document["meta"]
+    print(f"Backend {meta['backend']}, {meta['soil_count']} soil / {meta['wisdom_count']} wisdom records, "
+          f"{meta['iterations']} calls per case (commit {meta['commit']})")
+    for name, result in document["results"].items():
+        if "records_per_sec" in result:
+            print(f"  {name:<28} {result['seconds']:8.2f}s  {result['records_per_sec']:10.1f} records/s")
+        else:
+            print(f"  {name:<28} {result[THROUGHPUT_METRIC]:8.1f} ops/s  p50={result['p50_ms']:8.2f}ms  "
+                  f"p95={result['p95_ms']:8.2f}ms  p99={result['p99_ms']:8.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of ingest, search, recommendation and feedback")
+    parser.add_argument("--backend", choices=BACKENDS, default="embedded",
+                        help="embedded index, in-memory qdrant-client, or a local Qdrant server")
+    parser.add_argument("--soil", type=int, default=1000)
+    parser.add_argument("--wisdom", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--result-cache", action="store_true", help="Keep the read result cache enabled")
+    parser.add_argument("--output", default=None, help="Write the results as JSON")
+    parser.add_argument("--baseline", default=None, help="Results JSON of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="Ignore latency changes below this")
+    args = parser.parse_args()
+
+    document = run_benchmark(
+        backend=args.backend, soil_count=args.soil, wisdom_count=args.wisdom, iterations=args.iterations,
+        seed=args.seed, result_cache=args.result_cache
+    )
+    print_report(document)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        differing = [key for key in ("backend", "soil_count", "wisdom_count", "result_cache")
+                     if baseline["meta"].get(key) != document["meta"][key]]
+        if differing:
+            print(f"Warning: baseline differs in {', '.join(differing)}; numbers may not be comparable")
+        regressions = compare(document, baseline, args.threshold, args.min_delta_ms)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name}.{metric}: {before} -> {after}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} vs {args.baseline}")
@@ -0,0 +1,126 @@
+import json
+import os
+
+_decoder = json.JSONDecoder()
+# Characters that may follow a complete number inside an array
+_NUMBER_END = " \t\r\n,]"
+# Data file extensions iter_records reads, in the order find_data_file tries them
+DATA_EXTENSIONS = (".json", ".jsonl", ".parquet")
+
+
+def _iter_json_array(f, read_size):
+    """Yield items of a top-level JSON array without loading the whole file"""
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace, the opening bracket and separators between items
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer):
+                if not started:
+                    if buffer[pos] != "[":
+                        raise ValueError("Expected a JSON array")
+                    started = True
+                    pos += 1
+                    continue
+                break
+            if eof:
+                return
+            chunk = f.read(read_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+            if isinstance(item, (int, float)) and not isinstance(item, bool):
+                # "2." or "1e" at the buffer edge decodes as a shorter number; wait for its delimiter
+                complete = eof or (end < len(buffer) and buffer[end] in _NUMBER_END)
+            else:
+                # A scalar ending exactly at the buffer edge may be truncated
+                complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if not complete:
+            # Item is split across reads - pull in more data and retry
+            chunk = f.read(read_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+
+        yield item
+        pos = end
+
+
+def _iter_json_lines(f):
+    """Yield one record per non-empty line of a JSON Lines file"""
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _iter_parquet(path, batch_size=10_000):
+    """Yield rows of a Parquet file one record batch at a time"""
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def iter_records(path, read_size=1 << 20):
+    """Incrementally parse records from a JSON array, JSON Lines or Parquet file"""
+    if path.endswith(".parquet"):
+        yield from _iter_parquet(path)
+        return
+
+    with open(path, "r") as f:
+        # Detect the format from the first non-whitespace character
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+
+        if first == "[":
+            yield from _iter_json_array(f, read_size)
+        else:
+            yield from _iter_json_lines(f)
+
+
+def find_data_file(data_dir, name):
+    """Path of data_dir/name.json, .jsonl or .parquet, whichever exists first"""
+    for extension in DATA_EXTENSIONS:
+        path = os.path.join(data_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No {name}.json, .jsonl or .parquet in '{data_dir}'")
+
+
+def load_records(path):
+    """Every record of a data file as a list"""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return json.load(f)
+    return list(iter_records(path))
+
+
+def iter_chunks(records, chunk_size):
+    """Group an iterable of records into lists of at most chunk_size"""
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
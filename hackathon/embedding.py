@@ -1,16 +1,168 @@
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import json
+import re
+import threading
+import zlib
 
+from metrics import METRICS, instrumented
+from onnx_encoder import ENCODER_BACKENDS, get_shared_onnx_encoder
+
+# Process-wide model registry so every EmbeddingGenerator shares one copy
+_MODEL_REGISTRY = {}
+_MODEL_LOCK = threading.Lock()
+
+
+def get_shared_model(model_name):
+    """Load a SentenceTransformer once per process and reuse it"""
+    model = _MODEL_REGISTRY.get(model_name)
+    if model is None:
+        with _MODEL_LOCK:
+            model = _MODEL_REGISTRY.get(model_name)
+            if model is None:
+                # Imported here so tools that never encode don't pay for torch
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(model_name)
+                _MODEL_REGISTRY[model_name] = model
+    return model
+
+
+def keyword_terms(texts, phrases=True):
+    """Lowercase words plus whole phrases (documents) or word bigrams (queries)"""
+    terms = set()
+    for text in texts:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        terms.update(words)
+        if phrases:
+            terms.add(" ".join(words))
+        else:
+            terms.update(f"{a} {b}" for a, b in zip(words, words[1:]))
+    terms.discard("")
+    return terms
+
+
+def sparse_keyword_vector(terms):
+    """Hashed bag-of-terms as (indices, values) for a Qdrant sparse vector"""
+    indices = sorted({zlib.crc32(term.encode("utf-8")) for term in terms})
+    return indices, [1.0] * len(indices)
+
+
+class SensorFeatureScaler:
+    """Normalization + per-feature weights for the sensor part of soil vectors"""
+
+    # moisture, pH, temperature, success_count / 20
+    DEFAULT_WEIGHTS = (0.15, 0.15, 0.15, 0.1)
+
+    def __init__(self, method="zscore", weights=DEFAULT_WEIGHTS, center=None, scale=None):
+        if method not in ("zscore", "minmax"):
+            raise ValueError(f"Unknown scaling method: {method}")
+        self.method = method
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.center = None if center is None else np.asarray(center, dtype=np.float32)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @property
+    def fitted(self):
+        return self.center is not None
+
+    def fit(self, features):
+        """Learn the normalization parameters from a (n, 4) matrix of raw features"""
+        features = np.asarray(features, dtype=np.float32)
+        if self.method == "zscore":
+            self.center = features.mean(axis=0)
+            scale = features.std(axis=0)
+        else:
+            self.center = features.min(axis=0)
+            scale = features.max(axis=0) - self.center
+        # Constant features would divide by zero; leave them centred at 0
+        self.scale = np.where(scale > 0, scale, 1).astype(np.float32)
+        return self
+
+    def normalize(self, features):
+        """Scale raw features (rows or a single vector) without weighting"""
+        features = np.asarray(features, dtype=np.float32)
+        return (features - self.center) / self.scale
+
+    def transform(self, features):
+        """Scale and weight raw features (rows or a single vector)"""
+        return self.normalize(features) * self.weights
+
+    def to_dict(self):
+        return {
+            "method": self.method,
+            "weights": self.weights.tolist(),
+            "center": self.center.tolist(),
+            "scale": self.scale.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["method"], data["weights"], data["center"], data["scale"])
+
+
+@instrumented(count_results=False)
 class EmbeddingGenerator:
-    def __init__(self):
-        # Use lightweight model for demo
-        self.text_model = SentenceTransformer('all-MiniLM-L6-v2')
-        
-    def generate_soil_embedding(self, soil_data):
-        """Generate embedding vector for soil sample"""
-        # Create text description for embedding
-        text_description = f"""
+    def __init__(self, model_name='all-MiniLM-L6-v2', cache=None, warm_up=False, backend="torch", threads=None):
+        # Use lightweight model for demo; loaded lazily on first encode
+        self.model_name = model_name
+        # "torch" (SentenceTransformer), or an ONNX Runtime export: "onnx" / "onnx-int8"
+        if backend not in ENCODER_BACKENDS:
+            raise ValueError(f"Unknown encoder backend: {backend}")
+        self.backend = backend
+        # Intra-op threads for the ONNX session (None: ONNX Runtime's default)
+        self.threads = threads
+        # Backends produce slightly different vectors, so each caches under its own name
+        self.cache_namespace = model_name if backend == "torch" else f"{model_name}@{backend}"
+        # Optional EmbeddingCache; texts found there never reach the model
+        self.cache = cache
+        # Optional SensorFeatureScaler; must match the one the collection was built with
+        self.feature_scaler = None
+
+        if warm_up:
+            self.warm_up()
+
+    @property
+    def text_model(self):
+        """Shared encoder for the selected backend, loaded on first use"""
+        if self.backend == "torch":
+            return get_shared_model(self.model_name)
+        return get_shared_onnx_encoder(self.model_name, quantize=self.backend == "onnx-int8", threads=self.threads)
+
+    def warm_up(self):
+        """Load the model and run one encode so the first real request is fast"""
+        self.text_model.encode(["warm up"])
+
+    def _encode(self, texts, batch_size=64):
+        """Encode texts into a float32 matrix, consulting the cache first"""
+        if self.cache is None:
+            METRICS.batch("encode", len(texts))
+            with METRICS.stage("encode"):
+                return np.asarray(self.text_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+
+        with METRICS.stage("embedding_cache"):
+            cached = self.cache.get_many(self.cache_namespace, texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+
+        encoded = {}
+        if missing:
+            METRICS.batch("encode", len(missing))
+            with METRICS.stage("encode"):
+                vectors = np.asarray(self.text_model.encode(missing, batch_size=batch_size), dtype=np.float32)
+            with METRICS.stage("embedding_cache"):
+                self.cache.put_many(self.cache_namespace, missing, vectors)
+            encoded = dict(zip(missing, vectors))
+
+        return np.stack([
+            vector if vector is not None else encoded[text]
+            for text, vector in zip(texts, cached)
+        ])
+
+    def _encode_one(self, text):
+        """Encode a single text into a float32 vector"""
+        return self._encode([text])[0]
+
+    def _soil_text(self, soil_data):
+        """Build the text description used to embed a soil sample"""
+        return f"""
         Soil type: {soil_data['soil_type']}
         Location: {soil_data['location']['state']}
         Crop: {soil_data['crop_grown']}
@@ -21,51 +173,176 @@ class EmbeddingGenerator:
         Season: {soil_data['season']}
         Yield: {soil_data['yield_quality']}
         """
-        
-        # Generate embedding
-        embedding = self.text_model.encode(text_description)
-        
-        # Add sensor data to embedding (simple concatenation)
-        sensor_features = np.array([
+
+    def _soil_sensor_features(self, soil_data):
+        """Sensor features appended to the soil text embedding"""
+        return [
             soil_data['sensor_data']['moisture'],
             soil_data['sensor_data']['pH'],
             soil_data['sensor_data']['temperature'],
             soil_data['success_count'] / 20,  # Normalized
-        ])
-        
-        # Combine text embedding with sensor features
-        combined = np.concatenate([embedding, sensor_features])
-        
-        return combined.tolist()
-    
-    def generate_wisdom_embedding(self, wisdom_data):
-        """Generate embedding for wisdom audio snippet"""
-        text_for_embedding = f"""
+        ]
+
+    def _scale_sensor_features(self, features):
+        """Apply the fitted feature scaler, if any, to raw sensor features"""
+        if self.feature_scaler is None:
+            return np.asarray(features, dtype=np.float32)
+        return self.feature_scaler.transform(features)
+
+    def fit_feature_scaler(self, soil_samples, method="zscore", weights=SensorFeatureScaler.DEFAULT_WEIGHTS):
+        """Fit and install a sensor feature scaler on a corpus of soil samples"""
+        features = [self._soil_sensor_features(sample) for sample in soil_samples]
+        self.feature_scaler = SensorFeatureScaler(method, weights).fit(features)
+        return self.feature_scaler
+
+    def _wisdom_text(self, wisdom_data):
+        """Build the text description used to embed a wisdom snippet"""
+        return f"""
         Topic: {wisdom_data['topic']}
         Advice: {wisdom_data['advice']}
         Farmer: {wisdom_data['farmer_name']} with {wisdom_data['experience_years']} years experience
         Season: {wisdom_data['season_applicable']}
         Soil types: {', '.join(wisdom_data['soil_types_applicable'])}
         """
-        
-        embedding = self.text_model.encode(text_for_embedding)
+
+    def generate_soil_embedding(self, soil_data):
+        """Generate embedding vector for soil sample"""
+        # Generate embedding
+        embedding = self._encode_one(self._soil_text(soil_data))
+
+        # Add sensor data to embedding (simple concatenation)
+        sensor_features = self._scale_sensor_features(self._soil_sensor_features(soil_data))
+
+        # Combine text embedding with sensor features
+        combined = np.concatenate([embedding, sensor_features])
+
+        return combined.tolist()
+
+    def generate_soil_embeddings(self, soil_samples, batch_size=64, text_embeddings=None):
+        """Generate embedding matrix for many soil samples in one encode call
+
+        text_embeddings skips the encode with vectors computed elsewhere (e.g. backfill workers).
+        """
+        soil_samples = list(soil_samples)
+        if not soil_samples:
+            return np.zeros((0, 388), dtype=np.float32)
+
+        if text_embeddings is None:
+            with METRICS.stage("prompt"):
+                texts = [self._soil_text(sample) for sample in soil_samples]
+            text_embeddings = self._encode(texts, batch_size=batch_size)
+        embeddings = np.asarray(text_embeddings, dtype=np.float32)
+
+        sensor_features = self._scale_sensor_features(
+            [self._soil_sensor_features(sample) for sample in soil_samples]
+        )
+
+        return np.hstack([embeddings, sensor_features])
+
+    def generate_soil_named_vectors(self, soil_samples, batch_size=64, text_embeddings=None):
+        """Separate text, sensor and keyword vectors for the named-vector soil layout"""
+        soil_samples = list(soil_samples)
+        if text_embeddings is not None:
+            text_vectors = np.asarray(text_embeddings, dtype=np.float32)
+        elif soil_samples:
+            with METRICS.stage("prompt"):
+                texts = [self._soil_text(sample) for sample in soil_samples]
+            text_vectors = self._encode(texts, batch_size=batch_size)
+        else:
+            text_vectors = np.zeros((0, 384), dtype=np.float32)
+
+        # Sensors are normalized but not weighted; weights are chosen per query at fusion time
+        sensor_features = np.asarray(
+            [self._soil_sensor_features(sample) for sample in soil_samples], dtype=np.float32
+        ).reshape(len(soil_samples), 4)
+        if self.feature_scaler is not None:
+            sensor_features = self.feature_scaler.normalize(sensor_features)
+
+        keywords = [
+            sparse_keyword_vector(keyword_terms(sample['traditional_methods'] + [sample['crop_grown']]))
+            for sample in soil_samples
+        ]
+        return text_vectors, sensor_features, keywords
+
+    def generate_sensor_query_vector(self, sensor_data):
+        """Normalized sensor vector for a query against the named-vector layout"""
+        success_placeholder = 0 if self.feature_scaler is None else self.feature_scaler.center[3]
+        features = np.array([
+            sensor_data.get('moisture', 0.3),
+            sensor_data.get('pH', 7.0),
+            sensor_data.get('temperature', 30),
+            success_placeholder
+        ], dtype=np.float32)
+        if self.feature_scaler is not None:
+            features = self.feature_scaler.normalize(features)
+        return features.tolist()
+
+    def generate_keyword_query_vector(self, query_text):
+        """Sparse keyword vector (words and bigrams) for a query"""
+        return sparse_keyword_vector(keyword_terms([query_text], phrases=False))
+
+    def generate_wisdom_embedding(self, wisdom_data):
+        """Generate embedding for wisdom audio snippet"""
+        embedding = self._encode_one(self._wisdom_text(wisdom_data))
         return embedding.tolist()
-    
+
+    def soil_texts(self, soil_samples):
+        """Texts the model encodes for soil samples"""
+        return [self._soil_text(sample) for sample in soil_samples]
+
+    def wisdom_texts(self, wisdom_list):
+        """Texts the model encodes for wisdom snippets"""
+        return [self._wisdom_text(wisdom) for wisdom in wisdom_list]
+
+    def encode_texts(self, texts, batch_size=64):
+        """Raw (n, 384) text embeddings, cache-aware"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 384), dtype=np.float32)
+        return self._encode(texts, batch_size=batch_size)
+
+    def generate_wisdom_embeddings(self, wisdom_list, batch_size=64):
+        """Generate embedding matrix for many wisdom snippets in one encode call"""
+        wisdom_list = list(wisdom_list)
+        if not wisdom_list:
+            return np.zeros((0, 384), dtype=np.float32)
+
+        with METRICS.stage("prompt"):
+            texts = [self._wisdom_text(wisdom) for wisdom in wisdom_list]
+        return self._encode(texts, batch_size=batch_size)
+
+    def generate_soil_query_embedding(self, query_text, sensor_data=None, weights=None):
+        """Generate a query embedding shaped like soil vectors (text + sensor features)"""
+        if sensor_data:
+            combined = np.asarray(self.generate_query_embedding(query_text, sensor_data), dtype=np.float32)
+        else:
+            # No readings: zero sensor features leave the score to the text part
+            embedding = self._encode_one(query_text)
+            combined = np.concatenate([embedding, np.zeros(4, dtype=np.float32)])
+
+        if weights:
+            # Scaling the query halves scales their share of the dot product with stored vectors
+            combined[:384] *= weights.get("text", 1.0)
+            combined[384:] *= weights.get("sensors", 1.0)
+        return combined.tolist()
+
     def generate_query_embedding(self, query_text, sensor_data=None):
         """Generate embedding for user query"""
         if sensor_data:
             query_with_sensors = f"{query_text} Moisture: {sensor_data.get('moisture', 0)} pH: {sensor_data.get('pH', 7)}"
-            embedding = self.text_model.encode(query_with_sensors)
-            
+            embedding = self._encode_one(query_with_sensors)
+
             if sensor_data:
-                sensor_features = np.array([
+                # Placeholder for success count (the corpus centre once scaled)
+                success_placeholder = 0 if self.feature_scaler is None else self.feature_scaler.center[3]
+                sensor_features = self._scale_sensor_features([
                     sensor_data.get('moisture', 0.3),
                     sensor_data.get('pH', 7.0),
                     sensor_data.get('temperature', 30),
-                    0  # Placeholder for success count
+                    success_placeholder
                 ])
                 combined = np.concatenate([embedding, sensor_features])
                 return combined.tolist()
-        
-        embedding = self.text_model.encode(query_text)
-        return embedding.tolist()
\ No newline at end of file
+
+        embedding = self._encode_one(query_text)
+        return embedding.tolist()
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-process LRU in front of SQLite
+
+    Disk rows carry the time they were last read or written, and max_disk_items evicts the
+    least recently used ones. Hits served by the in-process layer don't touch the disk.
+    """
+
+    def __init__(self, path="data/embedding_cache.sqlite", max_memory_items=10000, max_disk_items=None):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        self._conn = None
+        # Rows on disk, counted once at open and kept up to date by put_many / eviction
+        self._disk_items = 0
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")}
+            if "accessed_at" not in columns:
+                # Caches from before LRU eviction: their rows count as least recently used
+                self._conn.execute("ALTER TABLE embeddings ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_accessed_at ON embeddings (accessed_at)")
+            self._conn.commit()
+            self._disk_items = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(model_name, text):
+        """Hash of the model name and the exact text sent to the model"""
+        return hashlib.sha256(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        """Insert into the LRU layer, evicting the least recently used entries"""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def get_many(self, model_name, texts):
+        """Return cached vectors for texts (None where missing)"""
+        keys = [self.make_key(model_name, text) for text in texts]
+        found = [None] * len(keys)
+
+        with self._lock:
+            disk_lookup = {}
+            for i, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[i] = vector
+                    self.memory_hits += 1
+                else:
+                    disk_lookup.setdefault(key, []).append(i)
+
+            if disk_lookup and self._conn is not None:
+                pending = list(disk_lookup)
+                for start in range(0, len(pending), 500):
+                    batch = pending[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(key, vector)
+                        for i in disk_lookup.pop(key):
+                            found[i] = vector
+                            self.disk_hits += 1
+                    if rows:
+                        # Mark the hits as recently used so eviction keeps them
+                        hit_keys = [key for key, _ in rows]
+                        self._conn.execute(
+                            f"UPDATE embeddings SET accessed_at = ? WHERE key IN ({','.join('?' * len(hit_keys))})",
+                            [time.time()] + hit_keys
+                        )
+                self._conn.commit()
+
+            self.misses += sum(len(positions) for positions in disk_lookup.values())
+
+        return found
+
+    def put_many(self, model_name, texts, vectors):
+        """Store freshly encoded vectors for texts"""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(model_name, text)
+                vector = np.ascontiguousarray(vector, dtype=np.float32)
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+
+            if self._conn is not None and rows:
+                now = time.time()
+                # Keys are content hashes, so an existing row already holds the same vector
+                inserted = self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                    [(key, blob, now) for key, blob in rows]
+                ).rowcount
+                self._disk_items += max(inserted, 0)
+                if self.max_disk_items and self._disk_items > self.max_disk_items:
+                    # Drop the least recently used rows once the on-disk store outgrows its limit
+                    evicted = self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)",
+                        (self._disk_items - self.max_disk_items,)
+                    ).rowcount
+                    self._disk_items -= evicted
+                    self.disk_evictions += evicted
+                self._conn.commit()
+
+    def stats(self):
+        """Hit/miss and eviction counters"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": self._disk_items,
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk_evictions,
+            }
+
+    def clear(self):
+        """Drop every cached vector"""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings")
+                self._conn.commit()
+            self._disk_items = 0
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,73 @@
+import argparse
+import json
+
+import numpy as np
+
+from embedding import EmbeddingGenerator, SensorFeatureScaler
+
+
+def relevant_sets(soil_samples, moisture_tol=0.05, ph_tol=0.5, temp_tol=3.0):
+    """Ground truth: same soil type and sensor readings within tolerance"""
+    soil_types = np.array([s["soil_type"] for s in soil_samples])
+    sensors = np.array([
+        [s["sensor_data"]["moisture"], s["sensor_data"]["pH"], s["sensor_data"]["temperature"]]
+        for s in soil_samples
+    ])
+    tolerance = np.array([moisture_tol, ph_tol, temp_tol])
+
+    relevant = []
+    for i in range(len(soil_samples)):
+        close = np.all(np.abs(sensors - sensors[i]) <= tolerance, axis=1) & (soil_types == soil_types[i])
+        close[i] = False
+        relevant.append(set(np.flatnonzero(close)))
+    return relevant
+
+
+def recall_at_k(embedding_gen, soil_samples, relevant, k):
+    """Mean recall@k of farmer-style queries against the soil vectors (exact cosine)"""
+    vectors = embedding_gen.generate_soil_embeddings(soil_samples)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    recalls = []
+    for i, sample in enumerate(soil_samples):
+        if not relevant[i]:
+            continue
+        query = np.asarray(embedding_gen.generate_query_embedding(
+            f"{sample['soil_type']} soil growing {sample['crop_grown']}",
+            sample["sensor_data"]
+        ), dtype=np.float32)
+        scores = vectors @ (query / np.linalg.norm(query))
+        scores[i] = -np.inf  # the query's own sample is not a result
+        top = np.argpartition(-scores, k - 1)[:k]
+        recalls.append(len(relevant[i].intersection(top)) / min(k, len(relevant[i])))
+    return float(np.mean(recalls)) if recalls else 0.0, len(recalls)
+
+
+def run_evaluation(path="data/soil_samples.json", k=5, method="zscore", weights=SensorFeatureScaler.DEFAULT_WEIGHTS):
+    """Compare raw sensor features with the fitted normalization"""
+    with open(path, "r") as f:
+        soil_samples = json.load(f)
+    relevant = relevant_sets(soil_samples)
+
+    embedding_gen = EmbeddingGenerator()
+
+    embedding_gen.feature_scaler = None
+    raw_recall, queries = recall_at_k(embedding_gen, soil_samples, relevant, k)
+
+    embedding_gen.fit_feature_scaler(soil_samples, method=method, weights=weights)
+    scaled_recall, _ = recall_at_k(embedding_gen, soil_samples, relevant, k)
+
+    print(f"{len(soil_samples)} samples, {queries} queries with at least one relevant match")
+    print(f"  {'raw features':<18} recall@{k} = {raw_recall:.3f}")
+    print(f"  {method + ' + weights':<18} recall@{k} = {scaled_recall:.3f}  (weights={list(weights)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="recall@k of soil search with raw vs normalized sensor features")
+    parser.add_argument("--data", default="data/soil_samples.json")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--method", choices=["zscore", "minmax"], default="zscore")
+    parser.add_argument("--weights", type=float, nargs=4, default=list(SensorFeatureScaler.DEFAULT_WEIGHTS))
+    args = parser.parse_args()
+
+    run_evaluation(args.data, k=args.k, method=args.method, weights=tuple(args.weights))
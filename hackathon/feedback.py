@@ -0,0 +1,188 @@
+import atexit
+import threading
+import time
+
+import numpy as np
+from qdrant_client.http import models
+
+# A success counts half as much after this many days
+DECAY_HALF_LIFE_DAYS = 365
+# anchored_score sums each success weighted by anchor_weight(time it happened); dividing by
+# anchor_weight(now) at read time decays them all, so stored scores never need rewriting
+DECAY_EPOCH = 1577836800  # 2020-01-01 UTC
+
+
+def anchor_weight(timestamp):
+    """2 ** ((timestamp - DECAY_EPOCH) / half-life) for unix seconds (scalar or array)"""
+    return np.exp2((np.asarray(timestamp, dtype=np.float64) - DECAY_EPOCH) / (DECAY_HALF_LIFE_DAYS * 86400.0))
+
+
+def decayed_score(anchored_score, now):
+    """Successes of an anchored_score (scalar or array) decayed to now"""
+    return np.asarray(anchored_score, dtype=np.float64) / anchor_weight(now)
+
+
+class FeedbackAggregator:
+    """Queues reinforcement events and writes coalesced per-point updates in batches
+
+    Besides success_count every point keeps anchored_score, its successes weighted by when they
+    happened (see DECAY_EPOCH). A flush adds new successes at the current weight; readers get
+    decayed values with decayed_score(anchored_score, now), so no job rewrites scores over time.
+
+    Increments are never lost between threads sharing one aggregator: flushes are serialized,
+    so each read-modify-write sees the previous one. Separate processes each have their own
+    aggregator and are not coordinated with each other.
+    """
+
+    def __init__(self, client, collection_name, flush_interval=2.0, max_pending=500, on_flush=None,
+                 clock=time.time):
+        self.client = client
+        self.collection_name = collection_name
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.clock = clock
+        # Called with [(point_id, old_reinforcement_score, new_reinforcement_score)] after each write
+        self.on_flush = on_flush
+
+        # point_id -> {"successes": int, "feedback": str}
+        self._pending = {}
+        self._lock = threading.Lock()
+        # Only one flush at a time, so each read-modify-write sees the previous write
+        self._flush_lock = threading.Lock()
+
+        # Latest success_count written for each point
+        self.last_counts = {}
+
+        self._stop = threading.Event()
+        self._worker = None
+
+    def record(self, point_id, worked_well=True):
+        """Queue one feedback event; flushes early once max_pending points are waiting"""
+        with self._lock:
+            entry = self._pending.setdefault(point_id, {"successes": 0, "feedback": None})
+            if worked_well:
+                entry["successes"] += 1
+            entry["feedback"] = "Method confirmed effective" if worked_well else "Needs adjustment"
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            self.flush()
+        else:
+            self._ensure_worker()
+
+    def flush(self):
+        """Apply all queued deltas; returns {point_id: new success_count}"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return {}
+
+            try:
+                new_counts, changes = self._write(pending)
+            except Exception:
+                # Put the events back so a failed write loses nothing
+                with self._lock:
+                    for point_id, entry in pending.items():
+                        current = self._pending.setdefault(point_id, {"successes": 0, "feedback": entry["feedback"]})
+                        current["successes"] += entry["successes"]
+                raise
+
+            self.last_counts.update(new_counts)
+            if self.on_flush is not None and changes:
+                try:
+                    self.on_flush(changes)
+                except Exception as e:
+                    # The events are written; queueing them again would count them twice
+                    print(f"Feedback flush callback failed: {e}")
+            return new_counts
+
+    def _write(self, pending):
+        """Write pending deltas; returns ({point_id: new count}, [(point_id, old score, new score)])"""
+        # One retrieve for every touched point...
+        records = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=list(pending),
+            with_payload=["success_count", "reinforcement_score", "anchored_score", "date_ts"]
+        )
+        current_counts = {record.id: record.payload.get("success_count", 0) for record in records}
+        current_scores = {record.id: record.payload.get("reinforcement_score", 0) for record in records}
+        now = int(self.clock())
+        weight = float(anchor_weight(now))
+        # Points loaded before anchored scores existed count their successes as of their date
+        current_anchored = {
+            record.id: record.payload.get(
+                "anchored_score",
+                current_counts[record.id] * float(anchor_weight(record.payload.get("date_ts", now)))
+            )
+            for record in records
+        }
+
+        # ...then points that end up with identical payloads share one operation
+        grouped = {}
+        new_counts = {}
+        for point_id, entry in pending.items():
+            if point_id not in current_counts:
+                continue
+            new_count = current_counts[point_id] + entry["successes"]
+            new_counts[point_id] = new_count
+            anchored = round(current_anchored[point_id] + entry["successes"] * weight, 6)
+            grouped.setdefault((new_count, anchored, entry["feedback"]), []).append(point_id)
+
+        operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={
+                        "success_count": new_count,
+                        "reinforcement_score": round(new_count / 20, 2),
+                        "anchored_score": anchored,
+                        "farmer_feedback": feedback
+                    },
+                    points=point_ids
+                )
+            )
+            for (new_count, anchored, feedback), point_ids in grouped.items()
+        ]
+        if operations:
+            self.client.batch_update_points(
+                collection_name=self.collection_name,
+                update_operations=operations,
+                wait=True
+            )
+
+        return new_counts, [
+            (point_id, current_scores[point_id], round(new_count / 20, 2))
+            for point_id, new_count in new_counts.items()
+        ]
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="feedback-flusher", daemon=True)
+                self._worker.start()
+                # Processes that never call close() (e.g. a cached Streamlit bank) still write queued events
+                atexit.register(self._flush_at_exit)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Feedback flush at exit failed, {len(self._pending)} points not written: {e}")
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Feedback flush failed, will retry: {e}")
+
+    def close(self):
+        """Stop the background flusher and write anything still queued"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+            atexit.unregister(self._flush_at_exit)
+        self.flush()
@@ -0,0 +1,702 @@
+"""Embedded in-process vector index usable in place of QdrantClient.
+
+LocalVectorIndex implements the subset of the QdrantClient interface that
+BhuSmrutiQdrant relies on (collections, upsert, search, retrieve,
+set_payload, scroll, count), so offline deployments and tests can run
+without a Qdrant server.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, ScoredPoint, Record
+
+# Mean Earth radius used by Qdrant's geo conditions
+EARTH_RADIUS_M = 6371008.8
+
+
+class LocalCollection:
+    """Vectors in a contiguous float32 matrix, payloads in per-field columns"""
+
+    def __init__(self, size, distance=Distance.COSINE, capacity=1024):
+        self.size = size
+        self.distance = distance
+        self.count = 0
+        self.vectors = np.zeros((capacity, size), dtype=np.float32)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.id_to_row = {}
+        self.columns = {}
+        # Fields that hold lists somewhere; matched per element instead of by equality
+        self.list_columns = set()
+        self._numeric_cache = {}
+        # Index declarations are recorded for schema checks; filters are mask scans either way
+        self.payload_schema = {}
+        self.hnsw_config = models.HnswConfigDiff(m=16, ef_construct=100, on_disk=False)
+        # Storage settings are recorded only; vectors always stay exact float32 in RAM
+        self.quantization_config = None
+        self.on_disk = False
+        self.on_disk_payload = False
+
+    def _grow(self, needed):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        vectors = np.zeros((capacity, self.size), dtype=np.float32)
+        vectors[:self.count] = self.vectors[:self.count]
+        ids = np.zeros(capacity, dtype=np.int64)
+        ids[:self.count] = self.ids[:self.count]
+        self.vectors, self.ids = vectors, ids
+        for field, column in self.columns.items():
+            grown = np.empty(capacity, dtype=object)
+            grown[:self.count] = column[:self.count]
+            self.columns[field] = grown
+
+    def _column(self, field):
+        column = self.columns.get(field)
+        if column is None:
+            column = np.empty(len(self.ids), dtype=object)
+            self.columns[field] = column
+        return column
+
+    def prepare_vector(self, vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        if vector.shape != (self.size,):
+            raise ValueError(f"Expected vector of size {self.size}, got {vector.shape}")
+        if self.distance == Distance.COSINE:
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+        return vector
+
+    def set_fields(self, row, payload, replace=False):
+        if replace:
+            for column in self.columns.values():
+                column[row] = None
+        for field, value in payload.items():
+            self._column(field)[row] = value
+            if isinstance(value, list):
+                self.list_columns.add(field)
+        if self._numeric_cache:
+            self._numeric_cache.clear()
+
+    def upsert_many(self, point_ids, vectors, payloads):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(point_ids), self.size)
+        if self.distance == Distance.COSINE:
+            # Normalize the whole batch at once so search is a plain dot product
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms > 0, norms, 1)
+
+        self._grow(self.count + len(point_ids))
+        rows = np.empty(len(point_ids), dtype=np.int64)
+        for i, point_id in enumerate(point_ids):
+            row = self.id_to_row.get(point_id)
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.id_to_row[point_id] = row
+                self.ids[row] = point_id
+            rows[i] = row
+            self.set_fields(row, payloads[i] or {}, replace=True)
+        self.vectors[rows] = vectors
+
+    def payload(self, row, with_payload=True):
+        if not with_payload:
+            return None
+        fields = self.columns if with_payload is True else with_payload
+        payload = {}
+        for field in fields:
+            column = self.columns.get(field)
+            if column is not None and column[row] is not None:
+                payload[field] = column[row]
+        return payload
+
+    def values(self, key):
+        """Column values for a (possibly dotted) payload key over all rows"""
+        field, _, rest = key.partition(".")
+        column = self.columns.get(field)
+        if column is None:
+            return np.full(self.count, None, dtype=object)
+        values = column[:self.count]
+        if rest:
+            values = _object_array([_nested(value, rest) for value in values])
+        return values
+
+    def numeric_values(self, key):
+        """Float view of a payload key (NaN where missing), cached until the field changes"""
+        cached = self._numeric_cache.get(key)
+        if cached is None:
+            cached = np.array(
+                [value if isinstance(value, (int, float)) else np.nan for value in self.values(key)],
+                dtype=np.float64
+            )
+            self._numeric_cache[key] = cached
+        return cached
+
+    def scores(self, query_vector):
+        vectors = self.vectors[:self.count]
+        if self.distance == Distance.EUCLID:
+            query = np.asarray(query_vector, dtype=np.float32)
+            return -np.linalg.norm(vectors - query, axis=1)
+        return vectors @ self.prepare_vector(query_vector)
+
+    def scores_many(self, query_vectors):
+        """(rows x queries) scores; one matrix product for all queries"""
+        if self.distance == Distance.EUCLID:
+            return np.column_stack([self.scores(query_vector) for query_vector in query_vectors])
+        queries = np.stack([self.prepare_vector(query_vector) for query_vector in query_vectors])
+        return self.vectors[:self.count] @ queries.T
+
+
+def _object_array(items):
+    """1-D object array that keeps lists and dicts as single elements"""
+    array = np.empty(len(items), dtype=object)
+    for i, item in enumerate(items):
+        array[i] = item
+    return array
+
+
+def _nested(value, path):
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def geo_distance_m(lat, lon, lats, lons):
+    """Haversine distance in metres from (lat, lon) to arrays of points"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _match_mask(collection, key, values, expected):
+    """Rows whose value (or any list element) is in expected"""
+    field = key.partition(".")[0]
+    if field in collection.list_columns or len(expected) > 1:
+        expected = set(expected)
+        return np.fromiter(
+            (
+                bool(expected.intersection(value)) if isinstance(value, list) else value in expected
+                for value in values
+            ),
+            dtype=bool,
+            count=len(values)
+        )
+    return values == expected[0]
+
+
+def _condition_mask(collection, condition):
+    if isinstance(condition, models.Filter):
+        return filter_mask(collection, condition)
+
+    if isinstance(condition, models.HasIdCondition):
+        wanted = np.array(list(condition.has_id), dtype=np.int64)
+        return np.isin(collection.ids[:collection.count], wanted)
+
+    if isinstance(condition, models.IsEmptyCondition):
+        values = collection.values(condition.is_empty.key)
+        return np.fromiter((value is None or value == [] for value in values), dtype=bool, count=len(values))
+
+    if not isinstance(condition, models.FieldCondition):
+        raise NotImplementedError(f"Unsupported filter condition: {type(condition).__name__}")
+
+    key = condition.key
+    if condition.match is not None:
+        match = condition.match
+        values = collection.values(key)
+        if isinstance(match, models.MatchValue):
+            return _match_mask(collection, key, values, [match.value])
+        if isinstance(match, models.MatchAny):
+            return _match_mask(collection, key, values, list(match.any))
+        if isinstance(match, models.MatchExcept):
+            return ~_match_mask(collection, key, values, list(match.except_))
+        raise NotImplementedError(f"Unsupported match: {type(match).__name__}")
+
+    if condition.range is not None:
+        numeric = collection.numeric_values(key)
+        mask = ~np.isnan(numeric)
+        bounds = condition.range
+        if bounds.gt is not None:
+            mask &= numeric > bounds.gt
+        if bounds.gte is not None:
+            mask &= numeric >= bounds.gte
+        if bounds.lt is not None:
+            mask &= numeric < bounds.lt
+        if bounds.lte is not None:
+            mask &= numeric <= bounds.lte
+        return mask
+
+    if condition.geo_radius is not None:
+        center = condition.geo_radius.center
+        distances = geo_distance_m(
+            center.lat, center.lon,
+            collection.numeric_values(f"{key}.lat"), collection.numeric_values(f"{key}.lon")
+        )
+        # NaN (no location) compares False
+        return distances <= condition.geo_radius.radius
+
+    raise NotImplementedError(f"Unsupported field condition on '{key}'")
+
+
+def filter_mask(collection, query_filter):
+    """Evaluate a Qdrant Filter as a boolean mask over the collection rows"""
+    mask = np.ones(collection.count, dtype=bool)
+    if query_filter is None:
+        return mask
+
+    for condition in _as_list(query_filter.must):
+        mask &= _condition_mask(collection, condition)
+    for condition in _as_list(query_filter.must_not):
+        mask &= ~_condition_mask(collection, condition)
+
+    should = _as_list(query_filter.should)
+    if should:
+        any_mask = np.zeros(collection.count, dtype=bool)
+        for condition in should:
+            any_mask |= _condition_mask(collection, condition)
+        mask &= any_mask
+    return mask
+
+
+def _as_list(conditions):
+    if conditions is None:
+        return []
+    if isinstance(conditions, list):
+        return conditions
+    return [conditions]
+
+
+# Suffixes of a collection directory being written and of the copy it replaces
+TMP_SUFFIX = ".tmp"
+OLD_SUFFIX = ".old"
+
+
+def _collection_dir_name(entry):
+    """Collection name of a directory under the index path"""
+    for suffix in (TMP_SUFFIX, OLD_SUFFIX):
+        if entry.endswith(suffix):
+            return entry[:-len(suffix)]
+    return entry
+
+
+def _collection_config(collection):
+    """JSON-safe vector params, payload indexes, HNSW, quantization and storage settings"""
+    quantization = collection.quantization_config
+    return {
+        "size": collection.size,
+        "distance": collection.distance,
+        "payload_schema": {field: index.data_type.value for field, index in collection.payload_schema.items()},
+        "hnsw_config": collection.hnsw_config.model_dump(mode="json", exclude_none=True),
+        "quantization_config": None if quantization is None else {
+            "type": type(quantization).__name__,
+            "config": quantization.model_dump(mode="json", exclude_none=True)
+        },
+        "on_disk": collection.on_disk,
+        "on_disk_payload": collection.on_disk_payload,
+    }
+
+
+def _apply_collection_config(collection, config):
+    """Restore the settings written by _collection_config (older files only have size / distance)"""
+    collection.payload_schema = {
+        field: SimpleNamespace(data_type=models.PayloadSchemaType(data_type))
+        for field, data_type in config.get("payload_schema", {}).items()
+    }
+    if "hnsw_config" in config:
+        collection.hnsw_config = models.HnswConfigDiff(**config["hnsw_config"])
+    quantization = config.get("quantization_config")
+    if quantization is not None:
+        collection.quantization_config = getattr(models, quantization["type"]).model_validate(quantization["config"])
+    collection.on_disk = config.get("on_disk", False)
+    collection.on_disk_payload = config.get("on_disk_payload", False)
+
+
+class LocalVectorIndex:
+    """QdrantClient-compatible embedded vector index"""
+
+    def __init__(self, path=None, persist_interval=5.0):
+        self.path = path
+        self._collections = {}
+        # alias name -> collection name
+        self._aliases = {}
+        self._lock = threading.RLock()
+
+        # With a path, writes are persisted at most every persist_interval seconds (None: only
+        # on persist() / close()), and never spend more than about a tenth of the time writing
+        self.persist_interval = persist_interval
+        self._dirty = set()              # LocalCollection objects changed since the last persist
+        self._structure_dirty = False    # collections or aliases created / deleted
+        self._next_persist = time.monotonic() + (persist_interval or 0)
+
+        if path and os.path.isdir(path):
+            self._load()
+
+    # ---------------- collections ----------------
+    def _get(self, collection_name):
+        collection = self._collections.get(self._aliases.get(collection_name, collection_name))
+        if collection is None:
+            raise ValueError(f"Collection {collection_name} not found")
+        return collection
+
+    def get_collection(self, collection_name):
+        collection = self._get(collection_name)
+        return SimpleNamespace(
+            status="green",
+            points_count=collection.count,
+            vectors_count=collection.count,
+            config=SimpleNamespace(
+                params=SimpleNamespace(
+                    vectors=models.VectorParams(
+                        size=collection.size, distance=collection.distance, on_disk=collection.on_disk
+                    ),
+                    sparse_vectors=None,
+                    on_disk_payload=collection.on_disk_payload
+                ),
+                hnsw_config=collection.hnsw_config,
+                quantization_config=collection.quantization_config
+            ),
+            payload_schema=dict(collection.payload_schema)
+        )
+
+    def get_collections(self):
+        return SimpleNamespace(
+            collections=[SimpleNamespace(name=name) for name in self._collections]
+        )
+
+    def collection_exists(self, collection_name):
+        return self._aliases.get(collection_name, collection_name) in self._collections
+
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[
+            models.AliasDescription(alias_name=alias, collection_name=name) for alias, name in self._aliases.items()
+        ])
+
+    def get_collection_aliases(self, collection_name):
+        return SimpleNamespace(aliases=[
+            models.AliasDescription(alias_name=alias, collection_name=name)
+            for alias, name in self._aliases.items() if name == collection_name
+        ])
+
+    def update_collection_aliases(self, change_aliases_operations, **kwargs):
+        """Apply create/delete/rename alias operations all at once"""
+        with self._lock:
+            aliases = dict(self._aliases)
+            for operation in change_aliases_operations:
+                if isinstance(operation, models.CreateAliasOperation):
+                    create = operation.create_alias
+                    if create.collection_name not in self._collections:
+                        raise ValueError(f"Collection {create.collection_name} not found")
+                    aliases[create.alias_name] = create.collection_name
+                elif isinstance(operation, models.DeleteAliasOperation):
+                    aliases.pop(operation.delete_alias.alias_name, None)
+                elif isinstance(operation, models.RenameAliasOperation):
+                    rename = operation.rename_alias
+                    aliases[rename.new_alias_name] = aliases.pop(rename.old_alias_name)
+                else:
+                    raise NotImplementedError(f"Unsupported alias operation: {type(operation).__name__}")
+            self._aliases = aliases
+            self._changed()
+        return True
+
+    def create_collection(self, collection_name, vectors_config, hnsw_config=None,
+                          quantization_config=None, on_disk_payload=None, **kwargs):
+        if not isinstance(vectors_config, models.VectorParams) or kwargs.get("sparse_vectors_config"):
+            raise NotImplementedError("LocalVectorIndex supports a single unnamed vector per collection")
+        with self._lock:
+            if collection_name in self._aliases:
+                raise ValueError(f"{collection_name} is already an alias")
+            collection = LocalCollection(vectors_config.size, vectors_config.distance)
+            if hnsw_config is not None:
+                collection.hnsw_config = hnsw_config
+            collection.quantization_config = quantization_config
+            collection.on_disk = bool(vectors_config.on_disk)
+            collection.on_disk_payload = bool(on_disk_payload)
+            self._collections[collection_name] = collection
+            self._changed(collection)
+        return True
+
+    def update_collection(self, collection_name, hnsw_config=None, quantization_config=None,
+                          vectors_config=None, collection_params=None, **kwargs):
+        collection = self._get(collection_name)
+        if hnsw_config is not None:
+            collection.hnsw_config = hnsw_config
+        if quantization_config is not None:
+            collection.quantization_config = None if quantization_config == models.Disabled.DISABLED \
+                else quantization_config
+        if vectors_config is not None and "" in vectors_config:
+            collection.on_disk = bool(vectors_config[""].on_disk)
+        if collection_params is not None and collection_params.on_disk_payload is not None:
+            collection.on_disk_payload = collection_params.on_disk_payload
+        with self._lock:
+            self._changed(collection)
+        return True
+
+    def create_payload_index(self, collection_name, field_name, field_schema, wait=True, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            collection.payload_schema[field_name] = SimpleNamespace(data_type=models.PayloadSchemaType(field_schema))
+            self._changed(collection)
+        return SimpleNamespace(status="completed")
+
+    def delete_payload_index(self, collection_name, field_name, wait=True, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            collection.payload_schema.pop(field_name, None)
+            self._changed(collection)
+        return SimpleNamespace(status="completed")
+
+    def delete_collection(self, collection_name, **kwargs):
+        with self._lock:
+            # Like Qdrant, deleting a collection drops the aliases pointing at it
+            self._aliases = {alias: name for alias, name in self._aliases.items() if name != collection_name}
+            deleted = self._collections.pop(collection_name, None)
+            self._dirty.discard(deleted)
+            self._changed()
+            return deleted is not None
+
+    # ---------------- points ----------------
+    def upsert(self, collection_name, points, wait=True, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            points = list(points)
+            if points:
+                collection.upsert_many(
+                    [point.id for point in points],
+                    [point.vector for point in points],
+                    [point.payload for point in points]
+                )
+                self._changed(collection)
+        return SimpleNamespace(status="completed")
+
+    def retrieve(self, collection_name, ids, with_payload=True, with_vectors=False, **kwargs):
+        collection = self._get(collection_name)
+        records = []
+        with self._lock:
+            for point_id in ids:
+                row = collection.id_to_row.get(point_id)
+                if row is None:
+                    continue
+                records.append(Record(
+                    id=point_id,
+                    payload=collection.payload(row, with_payload),
+                    vector=collection.vectors[row].tolist() if with_vectors else None
+                ))
+        return records
+
+    def set_payload(self, collection_name, payload, points, wait=True, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            for point_id in points:
+                row = collection.id_to_row.get(point_id)
+                if row is not None:
+                    collection.set_fields(row, payload)
+            self._changed(collection)
+        return SimpleNamespace(status="completed")
+
+    def batch_update_points(self, collection_name, update_operations, wait=True, **kwargs):
+        """Apply several payload updates under one lock acquisition"""
+        collection = self._get(collection_name)
+        with self._lock:
+            for operation in update_operations:
+                if not isinstance(operation, models.SetPayloadOperation):
+                    raise NotImplementedError(f"Unsupported update operation: {type(operation).__name__}")
+                for point_id in operation.set_payload.points:
+                    row = collection.id_to_row.get(point_id)
+                    if row is not None:
+                        collection.set_fields(row, operation.set_payload.payload)
+            self._changed(collection)
+        return [SimpleNamespace(status="completed") for _ in update_operations]
+
+    def search(self, collection_name, query_vector, query_filter=None, limit=10, offset=0,
+               with_payload=True, with_vectors=False, score_threshold=None, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            if collection.count == 0:
+                return []
+            return self._top_points(
+                collection, collection.scores(query_vector), query_filter, limit, offset,
+                with_payload, with_vectors, score_threshold
+            )
+
+    def search_batch(self, collection_name, requests, **kwargs):
+        """One result list per models.SearchRequest, scored with a single matrix product"""
+        collection = self._get(collection_name)
+        with self._lock:
+            if collection.count == 0 or not requests:
+                return [[] for _ in requests]
+            scores = collection.scores_many([request.vector for request in requests])
+            return [
+                self._top_points(
+                    collection, scores[:, i], request.filter, request.limit, request.offset or 0,
+                    True if request.with_payload is None else request.with_payload,
+                    bool(request.with_vector), request.score_threshold
+                )
+                for i, request in enumerate(requests)
+            ]
+
+    @staticmethod
+    def _top_points(collection, scores, query_filter, limit, offset, with_payload, with_vectors, score_threshold):
+        mask = filter_mask(collection, query_filter)
+        if score_threshold is not None:
+            mask &= scores >= score_threshold
+
+        candidates = np.flatnonzero(mask)
+        wanted = min(offset + limit, len(candidates))
+        if wanted == 0:
+            return []
+
+        candidate_scores = scores[candidates]
+        if wanted < len(candidates):
+            # Partial selection of the top-k, then sort only those
+            top = np.argpartition(-candidate_scores, wanted - 1)[:wanted]
+        else:
+            top = np.arange(len(candidates))
+        top = top[np.argsort(-candidate_scores[top], kind="stable")][offset:]
+
+        return [
+            ScoredPoint(
+                id=int(collection.ids[row]),
+                version=0,
+                score=float(scores[row]),
+                payload=collection.payload(row, with_payload),
+                vector=collection.vectors[row].tolist() if with_vectors else None
+            )
+            for row in candidates[top]
+        ]
+
+    def scroll(self, collection_name, scroll_filter=None, limit=10, offset=None,
+               with_payload=True, with_vectors=False, **kwargs):
+        """Page through points; offsets are opaque row cursors"""
+        collection = self._get(collection_name)
+        with self._lock:
+            start = offset or 0
+            rows = np.flatnonzero(filter_mask(collection, scroll_filter)[start:]) + start
+            page = rows[:limit]
+            next_offset = int(rows[limit]) if len(rows) > limit else None
+
+            records = [
+                Record(
+                    id=int(collection.ids[row]),
+                    payload=collection.payload(row, with_payload),
+                    vector=collection.vectors[row].tolist() if with_vectors else None
+                )
+                for row in page
+            ]
+            return records, next_offset
+
+    def count(self, collection_name, count_filter=None, exact=True, **kwargs):
+        collection = self._get(collection_name)
+        with self._lock:
+            return SimpleNamespace(count=int(filter_mask(collection, count_filter).sum()))
+
+    # ---------------- persistence ----------------
+    def _changed(self, collection=None):
+        """Record a write (to one collection, or to the set of collections / aliases); call with the lock held"""
+        if collection is not None:
+            self._dirty.add(collection)
+        else:
+            self._structure_dirty = True
+        if self.path and self.persist_interval is not None and time.monotonic() >= self._next_persist:
+            self.persist()
+
+    def persist(self):
+        """Write changed collections under self.path (vectors as .npy, payloads as JSON Lines)
+
+        Each collection is written to a temporary directory that then replaces the old one,
+        and aliases.json goes through a temporary file, so a crash mid-write leaves the
+        previous copy loadable.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            started = time.monotonic()
+            os.makedirs(self.path, exist_ok=True)
+            for name, collection in self._collections.items():
+                if collection in self._dirty or not os.path.isdir(os.path.join(self.path, name)):
+                    self._write_collection(name, collection)
+            self._dirty.clear()
+
+            if self._structure_dirty or not os.path.exists(os.path.join(self.path, "aliases.json")):
+                # Directories of deleted collections must not come back on the next load
+                for entry in os.listdir(self.path):
+                    name = _collection_dir_name(entry)
+                    if name not in self._collections and os.path.isdir(os.path.join(self.path, entry)):
+                        shutil.rmtree(os.path.join(self.path, entry))
+                tmp_path = os.path.join(self.path, "aliases.json.tmp")
+                with open(tmp_path, "w") as f:
+                    json.dump(self._aliases, f)
+                os.replace(tmp_path, os.path.join(self.path, "aliases.json"))
+                self._structure_dirty = False
+
+            now = time.monotonic()
+            self._next_persist = now + max(self.persist_interval or 0, 10 * (now - started))
+
+    def _write_collection(self, name, collection):
+        directory = os.path.join(self.path, name)
+        tmp_directory, old_directory = directory + TMP_SUFFIX, directory + OLD_SUFFIX
+        for leftover in (tmp_directory, old_directory):
+            if os.path.exists(leftover):
+                shutil.rmtree(leftover)
+
+        os.makedirs(tmp_directory)
+        np.save(os.path.join(tmp_directory, "vectors.npy"), collection.vectors[:collection.count])
+        np.save(os.path.join(tmp_directory, "ids.npy"), collection.ids[:collection.count])
+        with open(os.path.join(tmp_directory, "payloads.jsonl"), "w") as f:
+            for row in range(collection.count):
+                f.write(json.dumps(collection.payload(row)) + "\n")
+        with open(os.path.join(tmp_directory, "config.json"), "w") as f:
+            json.dump(_collection_config(collection), f)
+
+        # Until the second rename, the previous copy stays loadable as <name>.old
+        if os.path.exists(directory):
+            os.rename(directory, old_directory)
+        os.rename(tmp_directory, directory)
+        if os.path.exists(old_directory):
+            shutil.rmtree(old_directory)
+
+    def _load(self):
+        aliases_path = os.path.join(self.path, "aliases.json")
+        if os.path.exists(aliases_path):
+            with open(aliases_path, "r") as f:
+                self._aliases = json.load(f)
+
+        entries = set(os.listdir(self.path))
+        for entry in entries:
+            if entry.endswith(TMP_SUFFIX):
+                continue  # an interrupted write
+            name = _collection_dir_name(entry)
+            if entry.endswith(OLD_SUFFIX) and name in entries:
+                continue  # the new copy was fully written
+            directory = os.path.join(self.path, entry)
+            config_path = os.path.join(directory, "config.json")
+            if not os.path.exists(config_path):
+                continue
+            with open(config_path, "r") as f:
+                config = json.load(f)
+
+            vectors = np.load(os.path.join(directory, "vectors.npy"))
+            ids = np.load(os.path.join(directory, "ids.npy"))
+            collection = LocalCollection(config["size"], config["distance"], capacity=max(len(ids), 1))
+            collection.vectors[:len(ids)] = vectors
+            collection.ids[:len(ids)] = ids
+            collection.count = len(ids)
+            collection.id_to_row = {int(point_id): row for row, point_id in enumerate(ids)}
+
+            with open(os.path.join(directory, "payloads.jsonl"), "r") as f:
+                for row, line in enumerate(f):
+                    collection.set_fields(row, json.loads(line))
+
+            _apply_collection_config(collection, config)
+            self._collections[name] = collection
+
+    def close(self):
+        self.persist()
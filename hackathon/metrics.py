@@ -0,0 +1,324 @@
+import bisect
+import contextvars
+import cProfile
+import functools
+import inspect
+import multiprocessing
+import os
+import pstats
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds: seconds for timings, item counts for batch and result sizes
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+HELP = {
+    "bhu_call_seconds": "Wall time of public BhuSmrutiQdrant / EmbeddingGenerator methods",
+    "bhu_stage_seconds": "Wall time of a stage (embed, encode, qdrant, rank, ...) inside a method",
+    "bhu_batch_size": "Items per batch handed to the model or Qdrant",
+    "bhu_result_count": "Items returned by a method",
+    "bhu_errors_total": "Exceptions raised by a method",
+    "bhu_result_cache_hits_total": "Read results served from the result cache",
+    "bhu_result_cache_misses_total": "Result cache lookups that had to run the read",
+    "bhu_result_cache_hit_rate": "Share of result cache lookups served from the cache",
+    "bhu_result_cache_evictions_total": "Result cache entries dropped to stay within max_items",
+    "bhu_result_cache_expirations_total": "Result cache entries dropped after their TTL",
+    "bhu_result_cache_invalidations_total": "Result cache entries dropped by a write's tags",
+    "bhu_result_cache_stale_puts_total": "Read results not cached because a write invalidated their tags meanwhile",
+    "bhu_result_cache_size": "Entries held in the result cache",
+}
+
+# Outermost instrumented method running in this thread / task; stages are labelled with it
+_current_method = contextvars.ContextVar("bhu_current_method", default=None)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Stage:
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = (("method", _current_method.get() or ""), ("stage", self.name))
+        self.registry.observe("bhu_stage_seconds", labels, time.perf_counter() - self.started, LATENCY_BUCKETS)
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class MetricsRegistry:
+    """Histograms and counters of instrumented calls, rendered in the Prometheus text format
+
+    Disabled, an instrumented method costs one attribute check and stage() returns a shared
+    no-op context manager, so instrumentation can stay in the code paths permanently.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        # (metric name, labels) -> Histogram / count
+        self._histograms = {}
+        self._counters = {}
+        # Callables read at render time for values kept elsewhere (e.g. result cache stats)
+        self._collectors = []
+
+        # Sampling profiler: a share of outermost calls runs under cProfile
+        self.profile_rate = 0.0
+        self.profile_hook = None
+        self._profile_lock = threading.Lock()
+        self._profiles = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._profiles.clear()
+
+    def observe(self, name, labels, value, buckets):
+        key = (name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, collector):
+        """Render collector() -> [(metric name, "counter" | "gauge", labels, value)] with the other metrics"""
+        self._collectors.append(collector)
+
+    def stage(self, name):
+        """Context manager timing one stage of the current method"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def batch(self, name, size):
+        """Record the size of a batch sent to the model or Qdrant"""
+        if self.enabled:
+            labels = (("method", _current_method.get() or ""), ("batch", name))
+            self.observe("bhu_batch_size", labels, size, SIZE_BUCKETS)
+
+    def instrument(self, fn, name, count_results=True):
+        """Wrap fn to record its latency, result count and errors under name"""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return fn(*args, **kwargs)
+            return self._call(fn, name, count_results, args, kwargs)
+        return wrapper
+
+    def _call(self, fn, name, count_results, args, kwargs):
+        outermost = _current_method.get() is None
+        # Stages belong to the outermost method, e.g. the encode inside a soil search
+        token = _current_method.set(name) if outermost else None
+        profiler = self._start_profile() if outermost and self.profile_rate else None
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.inc("bhu_errors_total", (("method", name), ("error", type(e).__name__)))
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                self._finish_profile(name, elapsed, profiler)
+            if token is not None:
+                _current_method.reset(token)
+            self.observe("bhu_call_seconds", (("method", name),), elapsed, LATENCY_BUCKETS)
+
+        if count_results and hasattr(result, "__len__") and not isinstance(result, str):
+            self.observe("bhu_result_count", (("method", name),), len(result), SIZE_BUCKETS)
+        return result
+
+    def set_profiling(self, sample_rate, hook=None):
+        """Profile about sample_rate of outermost calls with cProfile
+
+        hook(method, elapsed, profiler) receives each sampled profile; without one they are
+        aggregated per method for dump_profiles.
+        """
+        self.profile_rate = sample_rate
+        self.profile_hook = hook
+
+    def _start_profile(self):
+        # One profiler may be active per process; concurrent samples are skipped
+        if random.random() >= self.profile_rate or not self._profile_lock.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiling tool is active
+            self._profile_lock.release()
+            return None
+        return profiler
+
+    def _finish_profile(self, name, elapsed, profiler):
+        profiler.disable()
+        self._profile_lock.release()
+        if self.profile_hook is not None:
+            self.profile_hook(name, elapsed, profiler)
+            return
+        with self._lock:
+            stats = self._profiles.get(name)
+            if stats is None:
+                self._profiles[name] = pstats.Stats(profiler)
+            else:
+                stats.add(profiler)
+
+    def dump_profiles(self, directory):
+        """Write aggregated profiles as <method>.prof files (pstats / snakeviz format)"""
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            profiles = dict(self._profiles)
+        paths = []
+        for name, stats in profiles.items():
+            path = os.path.join(directory, f"{name}.prof")
+            stats.dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for metric in sorted({name for name, _ in histograms}):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for metric in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        collected = {}
+        for collector in list(self._collectors):
+            for name, kind, labels, value in collector():
+                collected.setdefault((name, kind), []).append((labels, value))
+        for (metric, kind), samples in sorted(collected.items()):
+            lines.append(f"# HELP {metric} {HELP.get(metric, metric)}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in sorted(samples):
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def start_http_server(self, port=9464, addr="0.0.0.0"):
+        """Serve render() at /metrics from a daemon thread; returns the server"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((addr, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving metrics on http://{addr}:{server.server_address[1]}/metrics")
+        return server
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+# Process-wide registry used by the instrumented classes
+METRICS = MetricsRegistry()
+
+
+def instrumented(cls=None, count_results=True):
+    """Class decorator: record every public method of cls in METRICS as <Class>.<method>
+
+    count_results=False skips result counts for classes whose methods return single vectors.
+    """
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.isfunction(attr):
+                setattr(cls, name, METRICS.instrument(attr, f"{cls.__name__}.{name}", count_results))
+        return cls
+    return decorate if cls is None else decorate(cls)
+
+
+def configure_from_env():
+    """BHU_METRICS=1 enables metrics, BHU_METRICS_PORT serves them, BHU_PROFILE_RATE samples profiles"""
+    if os.getenv("BHU_METRICS", "") not in ("", "0"):
+        METRICS.enable()
+        if os.getenv("BHU_PROFILE_RATE"):
+            METRICS.set_profiling(float(os.getenv("BHU_PROFILE_RATE")))
+        # Worker processes (backfill) record but don't serve
+        if os.getenv("BHU_METRICS_PORT") and multiprocessing.parent_process() is None:
+            METRICS.start_http_server(int(os.getenv("BHU_METRICS_PORT")))
+
+
+configure_from_env()
@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+# Encoder backends selectable on EmbeddingGenerator
+ENCODER_BACKENDS = ("torch", "onnx", "onnx-int8")
+# Exported models live under <ONNX_MODEL_DIR>/<model name>/
+ONNX_MODEL_DIR = "models/onnx"
+# Minimum mean cosine between ONNX and PyTorch vectors for an export to be used
+MIN_COSINE_AGREEMENT = 0.99
+
+VALIDATION_TEXTS = [
+    "Black cotton soil with low moisture in summer",
+    "Red loam soil growing millet, mulching and natural compost",
+    "Soil type: Alluvial Location: Punjab Crop: Wheat Methods: Crop Rotation Season: winter Yield: good",
+    "How do I protect my paddy from pests without chemicals?",
+    "Neem leaves mixed with cow urine keep insects away from vegetables",
+    "pH 8.2, temperature 34, saline soil near the coast",
+]
+
+_ENCODERS = {}
+_ENCODERS_LOCK = threading.Lock()
+
+
+def cosine_agreement(reference, candidate):
+    """Row-wise cosine similarity between two embedding matrices"""
+    reference = np.asarray(reference, dtype=np.float32)
+    candidate = np.asarray(candidate, dtype=np.float32)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return np.sum(reference * candidate, axis=1) / np.maximum(norms, 1e-12)
+
+
+def check_agreement(reference, candidate, min_cosine=MIN_COSINE_AGREEMENT, label="ONNX export"):
+    """Row-wise cosine of candidate vs reference vectors; ValueError if the mean is below min_cosine"""
+    agreement = cosine_agreement(reference, candidate)
+    if agreement.mean() < min_cosine:
+        raise ValueError(f"{label} agrees with PyTorch at {agreement.mean():.4f} < {min_cosine}")
+    return agreement
+
+
+def export_onnx(model_name, model_dir=ONNX_MODEL_DIR, quantize=False, validation_texts=VALIDATION_TEXTS,
+                min_cosine=MIN_COSINE_AGREEMENT):
+    """Export a SentenceTransformer's transformer to ONNX (optionally int8) and validate it
+
+    Returns the model path. The export is rejected (ValueError) when its vectors agree with the
+    PyTorch ones by less than min_cosine on average. Files are written and validated in a
+    private temporary directory and only then moved into place, so concurrent exporters never
+    see each other's partial files and a rejected export leaves nothing behind.
+    """
+    import torch
+    from embedding import get_shared_model
+
+    name = model_name.replace("/", "__")
+    directory = os.path.join(model_dir, name)
+    model_file = "model-int8.onnx" if quantize else "model.onnx"
+    model_path = os.path.join(directory, model_file)
+    if os.path.exists(model_path):
+        return model_path
+
+    os.makedirs(model_dir, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f".{name}-", dir=model_dir)
+    try:
+        if os.path.isdir(directory):
+            # Reuse a published fp32 export (e.g. when adding the int8 model)
+            shutil.copytree(directory, work_dir, dirs_exist_ok=True)
+        fp32_path = os.path.join(work_dir, "model.onnx")
+        work_model_path = os.path.join(work_dir, model_file)
+
+        model = get_shared_model(model_name)
+        if not os.path.exists(fp32_path):
+            transformer = model[0]
+            normalize = any(type(module).__name__ == "Normalize" for module in model)
+            pooling = "cls" if getattr(model[1], "pooling_mode_cls_token", False) else "mean"
+            tokenizer = transformer.tokenizer
+            sample = tokenizer(["warm up"], return_tensors="pt", padding=True, truncation=True)
+            input_names = list(sample.keys())
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+            with torch.no_grad():
+                torch.onnx.export(
+                    transformer.auto_model,
+                    tuple(sample[name] for name in input_names),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=14
+                )
+            tokenizer.save_pretrained(work_dir)
+            with open(os.path.join(work_dir, "encoder.json"), "w") as f:
+                json.dump({
+                    "model_name": model_name,
+                    "input_names": input_names,
+                    "max_seq_length": model.max_seq_length,
+                    "pooling": pooling,
+                    "normalize": normalize
+                }, f)
+
+        if quantize:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            # Dynamic quantization: int8 weights, activations quantized on the fly
+            quantize_dynamic(fp32_path, work_model_path, weight_type=QuantType.QInt8)
+
+        reference = model.encode(validation_texts)
+        candidate = OnnxEncoder(work_model_path).encode(validation_texts)
+        agreement = check_agreement(reference, candidate, min_cosine, label=f"ONNX export of '{model_name}'")
+        print(f"Exported {model_path}: cosine vs PyTorch mean={agreement.mean():.4f} min={agreement.min():.4f}")
+
+        _publish(work_dir, directory, model_file)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return model_path
+
+
+def _publish(work_dir, directory, model_file):
+    """Move a validated export into directory; the model file goes last, as the completion marker"""
+    if not os.path.exists(directory):
+        try:
+            os.rename(work_dir, directory)
+            return
+        except OSError:
+            pass  # another process published first; fill in whatever it lacks
+    os.makedirs(directory, exist_ok=True)
+    for entry in sorted(os.listdir(work_dir), key=lambda entry: entry == model_file):
+        target = os.path.join(directory, entry)
+        if entry == model_file or not os.path.exists(target):
+            os.replace(os.path.join(work_dir, entry), target)
+
+
+class OnnxEncoder:
+    """ONNX Runtime sentence encoder with SentenceTransformer-style pooling"""
+
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        directory = os.path.dirname(model_path)
+        with open(os.path.join(directory, "encoder.json"), "r") as f:
+            self.config = json.load(f)
+        self.tokenizer = AutoTokenizer.from_pretrained(directory)
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def encode(self, texts, batch_size=64, **kwargs):
+        """(n, dim) float32 embeddings; same call shape as SentenceTransformer.encode"""
+        if isinstance(texts, str):
+            texts = [texts]
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                list(texts[start:start + batch_size]),
+                padding=True,
+                truncation=True,
+                max_length=self.config["max_seq_length"],
+                return_tensors="np"
+            )
+            feed = {name: batch[name].astype(np.int64) for name in self.config["input_names"]}
+            hidden = self.session.run(["last_hidden_state"], feed)[0]
+
+            if self.config.get("pooling", "mean") == "cls":
+                pooled = hidden[:, 0]
+            else:
+                # Mean over real tokens only
+                mask = feed["attention_mask"][:, :, None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if self.config["normalize"]:
+                pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+            outputs.append(pooled.astype(np.float32))
+        return np.vstack(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+
+def get_shared_onnx_encoder(model_name, quantize=False, threads=None, model_dir=ONNX_MODEL_DIR):
+    """Export (first time only) and load an ONNX encoder once per process"""
+    key = (model_name, quantize, threads, model_dir)
+    encoder = _ENCODERS.get(key)
+    if encoder is None:
+        with _ENCODERS_LOCK:
+            encoder = _ENCODERS.get(key)
+            if encoder is None:
+                directory = os.path.join(model_dir, model_name.replace("/", "__"))
+                model_path = os.path.join(directory, "model-int8.onnx" if quantize else "model.onnx")
+                if not os.path.exists(model_path):
+                    model_path = export_onnx(model_name, model_dir=model_dir, quantize=quantize)
+                encoder = OnnxEncoder(model_path, threads=threads)
+                _ENCODERS[key] = encoder
+    return encoder
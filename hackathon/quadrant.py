@@ -4,13 +4,418 @@ from qdrant_client.http.models import Distance, VectorParams
 from qdrant_client.http.models import PointStruct, Filter, FieldCondition, MatchValue
 import json
 import os
-from models.embeddings import EmbeddingGenerator
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from data_stream import iter_records, iter_chunks, find_data_file, load_records
+from embedding import EmbeddingGenerator, SensorFeatureScaler
+from embedding_cache import EmbeddingCache
+from feedback import FeedbackAggregator, anchor_weight
+from stats_store import SoilStatsStore, STATS_FIELDS
+from local_index import LocalVectorIndex, geo_distance_m
+from metrics import METRICS, instrumented
+from recommender import MethodRanker
+from result_cache import ResultCache
 
+# Payload fields used in filters, indexed by setup_collections
+SOIL_PAYLOAD_INDEXES = {
+    "season": models.PayloadSchemaType.KEYWORD,           # search_similar_soil
+    "soil_type": models.PayloadSchemaType.KEYWORD,        # get_recommendations
+    "yield_quality": models.PayloadSchemaType.KEYWORD,    # get_recommendations
+    "success_count": models.PayloadSchemaType.INTEGER,
+    "location": models.PayloadSchemaType.GEO,             # near=(lat, lon, radius_km)
+    "date_ts": models.PayloadSchemaType.INTEGER,          # since= / until=
+}
+WISDOM_PAYLOAD_INDEXES = {
+    "soil_types_applicable": models.PayloadSchemaType.KEYWORD,  # search_wisdom
+    "season_applicable": models.PayloadSchemaType.KEYWORD,
+    "location": models.PayloadSchemaType.GEO,
+    "date_recorded_ts": models.PayloadSchemaType.INTEGER,
+}
+
+# Storage profiles: vector quantization, and whether original vectors + payloads live on disk
+STORAGE_PROFILES = {
+    "memory": {"quantization": None, "on_disk": False},        # exact float32, everything in RAM
+    "int8": {"quantization": "int8", "on_disk": False},
+    "binary": {"quantization": "binary", "on_disk": False},
+    "int8-disk": {"quantization": "int8", "on_disk": True},     # only quantized vectors stay in RAM
+    "binary-disk": {"quantization": "binary", "on_disk": True},
+}
+# Candidates fetched per result with quantized vectors, then rescored with the originals
+QUANTIZATION_OVERSAMPLING = {"int8": 2.0, "binary": 3.0}
+
+
+def quantization_config_for(storage_profile):
+    """Quantization config for create/update_collection (None for exact vectors)"""
+    kind = STORAGE_PROFILES[storage_profile]["quantization"]
+    if kind == "int8":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if kind == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def search_params_for(storage_profile):
+    """Search params that rescore quantized candidates with the original vectors"""
+    kind = STORAGE_PROFILES[storage_profile]["quantization"]
+    if kind is None:
+        return None
+    return models.SearchParams(
+        quantization=models.QuantizationSearchParams(rescore=True, oversampling=QUANTIZATION_OVERSAMPLING[kind])
+    )
+
+
+# Soil vector layouts: one concatenated vector, or named text/sensor vectors + sparse keywords
+SOIL_LAYOUTS = ("combined", "named")
+SOIL_TEXT_VECTOR = "text"
+SOIL_SENSOR_VECTOR = "sensors"
+SOIL_KEYWORD_VECTOR = "keywords"
+# Candidates each prefetch contributes to the fusion, per requested result
+HYBRID_PREFETCH_FACTOR = 4
+# Sensor distance (normalized readings) at which the weighted fusion's sensor similarity is 0.5
+SENSOR_DISTANCE_SCALE = 1.0
+# Distance assumed for candidates the sensor prefetch didn't return: similarity ~0
+SENSOR_MISSING_DISTANCE = 1e6
+
+
+def soil_vectors_config(soil_layout, on_disk=False):
+    """(vectors_config, sparse_vectors_config) of the soil collection for a layout"""
+    if soil_layout == "combined":
+        # 384 (MiniLM) + 4 (sensor features)
+        return VectorParams(size=388, distance=Distance.COSINE, on_disk=on_disk), None
+    vectors_config = {
+        SOIL_TEXT_VECTOR: VectorParams(size=384, distance=Distance.COSINE, on_disk=on_disk),
+        # Four normalized readings compared by Euclidean distance; tiny, so always in RAM
+        SOIL_SENSOR_VECTOR: VectorParams(size=4, distance=Distance.EUCLID, on_disk=False),
+    }
+    return vectors_config, {SOIL_KEYWORD_VECTOR: models.SparseVectorParams()}
+
+
+def soil_query_vectors(embedding_gen, query_text, sensor_data=None):
+    """Per-name query vectors for the named soil layout (sensors only with readings)"""
+    indices, values = embedding_gen.generate_keyword_query_vector(query_text)
+    return {
+        SOIL_TEXT_VECTOR: embedding_gen.generate_query_embedding(query_text),
+        SOIL_SENSOR_VECTOR: embedding_gen.generate_sensor_query_vector(sensor_data) if sensor_data else None,
+        SOIL_KEYWORD_VECTOR: models.SparseVector(indices=indices, values=values) if indices else None,
+    }
+
+
+def hybrid_soil_query(query_vectors, query_filter=None, limit=5, weights=None, search_params=None):
+    """query_points arguments fusing one prefetch per named vector in a single request
+
+    Without weights the prefetches are combined with reciprocal rank fusion. With weights
+    ({"text": 1.0, "sensors": 0.5, "keywords": 0.2}) the fused score is their weighted sum
+    when the client supports formula queries, otherwise RRF over the non-zero weights.
+    Each term is a similarity in [0, 1] where higher is better (cosine for text, exp decay
+    of the Euclidean distance for sensors, fraction of query terms matched for keywords);
+    a candidate missing from a prefetch scores 0 on that term.
+    """
+    weights = weights or {}
+    prefetch = []
+    for name, vector in query_vectors.items():
+        if vector is None or weights.get(name, 1.0) == 0:
+            continue
+        prefetch.append(models.Prefetch(
+            query=vector,
+            using=name,
+            filter=query_filter,
+            limit=limit * HYBRID_PREFETCH_FACTOR,
+            # Sparse vectors are never quantized
+            params=None if name == SOIL_KEYWORD_VECTOR else search_params
+        ))
+
+    if weights and hasattr(models, "FormulaQuery"):
+        terms = []
+        defaults = {}
+        for i, item in enumerate(prefetch):
+            weight = weights.get(item.using, 1.0)
+            score = f"$score[{i}]"
+            defaults[score] = 0.0
+            if item.using == SOIL_SENSOR_VECTOR:
+                # Euclidean scores are distances: turn them into a similarity, worst when missing
+                score = models.ExpDecayExpression(exp_decay=models.DecayParamsExpression(
+                    x=score, target=0.0, scale=SENSOR_DISTANCE_SCALE, midpoint=0.5
+                ))
+                defaults[f"$score[{i}]"] = SENSOR_MISSING_DISTANCE
+            elif item.using == SOIL_KEYWORD_VECTOR:
+                # Sparse scores count matched terms; normalize by the query's term count
+                weight = weight / max(len(item.query.indices), 1)
+            terms.append(models.MultExpression(mult=[weight, score]))
+        query = models.FormulaQuery(formula=models.SumExpression(sum=terms), defaults=defaults)
+    else:
+        query = models.FusionQuery(fusion=models.Fusion.RRF)
+
+    return {
+        "prefetch": prefetch,
+        "query": query,
+        "query_filter": query_filter,
+        "limit": limit,
+        "with_payload": True,
+        "with_vectors": False,
+    }
+
+
+# Payload field holding {"lat", "lon"} of soil samples and wisdom snippets
+GEO_FIELD = "location"
+# Integer unix-second copies of the date strings, range-filtered by since= / until=
+SOIL_DATE_FIELD = "date_ts"
+WISDOM_DATE_FIELD = "date_recorded_ts"
+
+# Similar soils fetched once per recommendation and re-ranked client-side
+RECOMMENDATION_POOL_SIZE = 500
+# Payload fields the ranker reads
+RANKING_FIELDS = ["id", "traditional_methods", "success_count", "anchored_score", "yield_quality", "date", "date_ts"]
+
+# Materialized stats are checked against the collection's point count this often, so
+# points written by other processes don't go unnoticed for long
+STATS_RECONCILE_INTERVAL = 60.0
+
+# Seconds between checks of the soil meta record for a new layout_version (reindex / rollback)
+LAYOUT_CHECK_INTERVAL = 30.0
+
+# Small side collection holding per-collection metadata (e.g. the sensor feature scaler)
+META_COLLECTION = "bhu_smruti_meta"
+
+
+def collection_meta_id(collection_name):
+    """Stable point id of a collection's metadata record"""
+    return zlib.crc32(collection_name.encode("utf-8"))
+
+
+def client_identity(client):
+    """Where a client's data lives: Qdrant URL (or host:port) or the embedded index's path"""
+    options = getattr(client, "init_options", None)
+    if options:
+        return (options.get("url") or options.get("path") or options.get("location")
+                or f"{options.get('host') or 'localhost'}:{options.get('port') or 6333}")
+    path = getattr(client, "path", None)
+    return os.path.abspath(path) if path else type(client).__name__
+
+
+def resolve_alias(client, alias_name):
+    """Collection an alias points to (None if the name is not an alias)"""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == alias_name:
+            return alias.collection_name
+    return None
+
+
+def _vector_schema(vectors, sparse_vectors=None):
+    """{name: (size, distance)} of a vectors config ("" for a single unnamed vector)"""
+    if isinstance(vectors, VectorParams):
+        vectors = {"": vectors}
+    schema = {name: (params.size, params.distance) for name, params in (vectors or {}).items()}
+    schema.update({name: "sparse" for name in (sparse_vectors or {})})
+    return schema
+
+
+def _vectors_on_disk(vectors):
+    if isinstance(vectors, VectorParams):
+        return bool(vectors.on_disk)
+    return any(params.on_disk for params in vectors.values())
+
+
+def _quantization_kind(quantization_config):
+    if isinstance(quantization_config, models.ScalarQuantization):
+        return "int8"
+    if isinstance(quantization_config, models.BinaryQuantization):
+        return "binary"
+    return None
+
+def season_filter_for(season_filter):
+    """Filter restricting soil samples to one season (None for no filter)"""
+    if not season_filter:
+        return None
+    return Filter(
+        must=[FieldCondition(key="season", match=MatchValue(value=season_filter))]
+    )
+
+
+def soil_type_filter_for(soil_type_filter):
+    """Filter restricting wisdom snippets to one applicable soil type"""
+    if not soil_type_filter:
+        return None
+    return Filter(
+        must=[FieldCondition(
+            key="soil_types_applicable",
+            match=MatchValue(value=soil_type_filter)
+        )]
+    )
+
+
+def geo_filter_for(near):
+    """Filter keeping points within radius_km of near=(lat, lon, radius_km) (None for no filter)"""
+    if not near:
+        return None
+    lat, lon, radius_km = near
+    return Filter(
+        must=[FieldCondition(
+            key=GEO_FIELD,
+            geo_radius=models.GeoRadius(center=models.GeoPoint(lat=lat, lon=lon), radius=radius_km * 1000)
+        )]
+    )
+
+
+def combine_filters(*filters):
+    """AND of several must-filters (None if all are None)"""
+    must = [condition for query_filter in filters if query_filter is not None for condition in query_filter.must]
+    return Filter(must=must) if must else None
+
+
+def supports_formula_queries(client):
+    """Whether server-side score formulas are available (qdrant-client >= 1.14, not the embedded index)"""
+    return hasattr(models, "FormulaQuery") and not isinstance(client, LocalVectorIndex)
+
+
+def geo_decay_query(prefetch, near, geo_weight, limit):
+    """query_points arguments scoring prefetched candidates as score + geo_weight * distance decay
+
+    The decay is 1 at the query point and halves every radius_km / 2, so the blend runs
+    inside Qdrant on the candidates the prefetch already filtered to the radius.
+    """
+    lat, lon, radius_km = near
+    decay = models.ExpDecayExpression(exp_decay=models.DecayParamsExpression(
+        x=models.GeoDistance(geo_distance=models.GeoDistanceParams(
+            origin=models.GeoPoint(lat=lat, lon=lon), to=GEO_FIELD
+        )),
+        scale=radius_km * 1000 / 2,
+        midpoint=0.5
+    ))
+    return {
+        "prefetch": prefetch,
+        "query": models.FormulaQuery(
+            formula=models.SumExpression(sum=["$score", models.MultExpression(mult=[geo_weight, decay])])
+        ),
+        "limit": limit,
+        "with_payload": True,
+        "with_vectors": False,
+    }
+
+
+def rescore_by_distance(results, near, geo_weight, limit):
+    """geo_decay_query's blend applied to already fetched results, for clients without formulas"""
+    if not results:
+        return results
+    lat, lon, radius_km = near
+    locations = [(result.payload or {}).get(GEO_FIELD) or {} for result in results]
+    distances = geo_distance_m(
+        lat, lon,
+        np.array([location.get("lat", np.nan) for location in locations], dtype=np.float64),
+        np.array([location.get("lon", np.nan) for location in locations], dtype=np.float64)
+    )
+    decay = np.nan_to_num(0.5 ** (distances / (radius_km * 1000 / 2)))
+    scores = np.array([result.score for result in results]) + geo_weight * decay
+    order = np.argsort(-scores, kind="stable")[:limit]
+    return [results[i].model_copy(update={"score": float(scores[i])}) for i in order]
+
+
+def cache_key_value(value):
+    """Hashable form of a near / since / until argument (lists become tuples) for result cache keys"""
+    return tuple(value) if isinstance(value, (list, np.ndarray)) else value
+
+
+def copy_result(value):
+    """Deep copy of a cached read result (scored points or (method, score) pairs)"""
+    return [item.model_copy(deep=True) if hasattr(item, "model_copy") else item for item in value]
+
+
+def to_timestamp(value):
+    """Unix seconds of a 'YYYY-MM-DD' / ISO string, date, datetime or number (naive times are UTC)
+
+    A timedelta counts back from now, so since=timedelta(days=240) means the last 240 days.
+    """
+    if isinstance(value, timedelta):
+        return int(time.time() - value.total_seconds())
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def date_filter_for(key, since=None, until=None):
+    """Filter keeping points whose timestamp field lies in [since, until] (None for no filter)"""
+    if since is None and until is None:
+        return None
+    return Filter(
+        must=[FieldCondition(key=key, range=models.Range(
+            gte=to_timestamp(since) if since is not None else None,
+            lte=to_timestamp(until) if until is not None else None
+        ))]
+    )
+
+
+def recommendation_filter_for(soil_type, good_yield_only=True):
+    """Filter for similar soils (with good yield unless the ranker weighs yield itself)"""
+    must = []
+    if good_yield_only:
+        must.append(FieldCondition(key="yield_quality", match=MatchValue(value="good")))
+    if soil_type:
+        must.append(FieldCondition(key="soil_type", match=MatchValue(value=soil_type)))
+    return Filter(must=must) if must else None
+
+
+def extract_methods(results, exclude_id=None, max_methods=5):
+    """Collect distinct traditional methods from search results in rank order"""
+    recommendations = []
+    for result in results:
+        if result.payload["id"] != exclude_id:  # Exclude self
+            for method in result.payload["traditional_methods"]:
+                if method not in recommendations:
+                    recommendations.append(method)
+                    if len(recommendations) >= max_methods:
+                        return recommendations
+    return recommendations
+
+
+@instrumented
 class BhuSmrutiQdrant:
-    def __init__(self, use_cloud=True):
-        self.embedding_gen = EmbeddingGenerator()
+    def __init__(self, use_cloud=True, embedding_cache_path="data/embedding_cache.sqlite",
+                 embedding_gen=None, warm_up=False, backend="qdrant", local_path=None, client=None,
+                 stats_path="data/soil_stats.json", storage_profile="memory", normalize_features=True,
+                 soil_layout="combined", result_cache_size=1024, result_cache_ttl=300.0, encoder_backend="torch"):
+        # Embedding cache opened by this bank, closed with it (a passed-in generator's cache is the caller's)
+        self._owned_cache = None
+        if embedding_gen is None:
+            # Persistent embedding cache so unchanged texts and repeated queries skip the model
+            cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+            self._owned_cache = cache
+            # The model itself is loaded on first encode and shared across instances
+            embedding_gen = EmbeddingGenerator(cache=cache, backend=encoder_backend)
+        self.embedding_gen = embedding_gen
+
+        if warm_up:
+            self.embedding_gen.warm_up()
         
-        if use_cloud:
+        if storage_profile not in STORAGE_PROFILES:
+            raise ValueError(f"Unknown storage profile: {storage_profile}")
+        self.storage_profile = storage_profile
+        self.search_params = search_params_for(storage_profile)
+
+        if soil_layout not in SOIL_LAYOUTS:
+            raise ValueError(f"Unknown soil layout: {soil_layout}")
+        if soil_layout == "named" and backend == "embedded" and client is None:
+            raise ValueError("The embedded backend only supports the 'combined' soil layout")
+        self.soil_layout = soil_layout
+
+        if client is not None:
+            # Any object implementing the QdrantClient methods used below
+            self.client = client
+        elif backend == "embedded":
+            # In-process index: no server needed (offline deployments, tests)
+            self.client = LocalVectorIndex(path=local_path)
+        elif backend != "qdrant":
+            raise ValueError(f"Unknown backend: {backend}")
+        elif use_cloud:
             # For Qdrant Cloud (sign up at cloud.qdrant.io)
             # You'll need to set these as environment variables
             self.client = QdrantClient(
@@ -23,253 +428,798 @@ class BhuSmrutiQdrant:
         
         self.soil_collection = "soil_samples"
         self.wisdom_collection = "wisdom_audio"
+        self.meta_collection = META_COLLECTION
+
+        # Sensor features are scaled with parameters fit on the corpus and stored in the meta collection
+        self.normalize_features = normalize_features
+        self._scaler_loaded = False
+        self._scaler_decided = False
+        # layout_version of the installed scaler / layout and when the meta record was last read
+        self._layout_version = None
+        self._layout_checked_at = 0.0
+
+        # Materialized soil stats, updated on every write path; one file per cluster and collection
+        if backend == "embedded" and not local_path:
+            stats_path = None  # the index itself is not persisted either
+        self.stats_store = SoilStatsStore(
+            stats_path, identity=f"{client_identity(self.client)}/{self.soil_collection}"
+        )
+        self._stats_reconciled_at = None
+
+        # Scores methods over a pool of similar soils for get_recommendations
+        self.ranker = MethodRanker()
+
+        # Read results, dropped by tag when a write could change them (size 0 disables);
+        # entries are copied in and out so callers may edit the payloads they get back
+        self.result_cache = ResultCache(max_items=result_cache_size, ttl=result_cache_ttl, copy=copy_result)
+
+        # Coalesces reinforcement events into batched payload updates
+        self.feedback = FeedbackAggregator(self.client, self.soil_collection, on_flush=self._on_feedback_flush)
         
-    def setup_collections(self):
-        """Create collections in Qdrant if they don't exist"""
+    def setup_collections(self, hnsw_m=16, hnsw_ef_construct=100, hnsw_on_disk=False, recreate_on_mismatch=False):
+        """Create collections in Qdrant if they don't exist, and bring existing ones up to schema"""
+        hnsw_config = models.HnswConfigDiff(m=hnsw_m, ef_construct=hnsw_ef_construct, on_disk=hnsw_on_disk)
         
         # Soil samples collection
+        created = self._ensure_collection(
+            self.soil_collection,
+            hnsw_config=hnsw_config,
+            recreate_on_mismatch=recreate_on_mismatch,
+            **self.collection_schema("soil")
+        )
+        # Metadata collection (feature scaler parameters)
         try:
-            self.client.get_collection(self.soil_collection)
-            print(f"Collection '{self.soil_collection}' already exists")
-        except:
+            self.client.get_collection(self.meta_collection)
+        except Exception:
             self.client.create_collection(
-                collection_name=self.soil_collection,
-                vectors_config=VectorParams(
-                    size=388,  # 384 (MiniLM) + 4 (sensor features)
-                    distance=Distance.COSINE
-                )
+                collection_name=self.meta_collection,
+                vectors_config=VectorParams(size=1, distance=Distance.COSINE)
             )
-            print(f"Created collection '{self.soil_collection}'")
+
+        if created:
+            # A fresh collection is empty, so empty stats are accurate
+            self.stats_store.reset()
+            self.stats_store.initialized = True
+            self.stats_store.save()
+
+            # ...and the next load fits a new feature scaler
+            self.save_collection_meta(self.soil_collection, feature_scaler=None)
+            self.embedding_gen.feature_scaler = None
+            self._scaler_loaded = True
+            self._scaler_decided = False
+            self.result_cache.clear()
         
         # Wisdom audio collection
+        self._ensure_collection(
+            self.wisdom_collection,
+            hnsw_config=hnsw_config,
+            recreate_on_mismatch=recreate_on_mismatch,
+            **self.collection_schema("wisdom")
+        )
+
+    def collection_schema(self, kind):
+        """Vector config and payload indexes of the soil or wisdom collection"""
+        on_disk = STORAGE_PROFILES[self.storage_profile]["on_disk"]
+        if kind == "soil":
+            vectors_config, sparse_vectors_config = soil_vectors_config(self.soil_layout, on_disk)
+            payload_indexes = SOIL_PAYLOAD_INDEXES
+        elif kind == "wisdom":
+            # MiniLM embedding size
+            vectors_config, sparse_vectors_config = VectorParams(size=384, distance=Distance.COSINE, on_disk=on_disk), None
+            payload_indexes = WISDOM_PAYLOAD_INDEXES
+        else:
+            raise ValueError(f"Unknown record kind: {kind}")
+        return {
+            "vectors_config": vectors_config,
+            "sparse_vectors_config": sparse_vectors_config,
+            "payload_indexes": payload_indexes
+        }
+
+    def _ensure_collection(self, collection_name, vectors_config, payload_indexes, hnsw_config,
+                           sparse_vectors_config=None, recreate_on_mismatch=False):
+        """Create or migrate one collection (or the one an alias points to); returns True if it was (re)created"""
+        # Versioned collections (see reindex.py) are reached through an alias of the same name
+        aliased = resolve_alias(self.client, collection_name)
+        if aliased is not None:
+            collection_name = aliased
+
         try:
-            self.client.get_collection(self.wisdom_collection)
-            print(f"Collection '{self.wisdom_collection}' already exists")
-        except:
-            self.client.create_collection(
-                collection_name=self.wisdom_collection,
-                vectors_config=VectorParams(
-                    size=384,  # MiniLM embedding size
-                    distance=Distance.COSINE
+            info = self.client.get_collection(collection_name)
+        except Exception:
+            info = None
+        
+        if info is not None:
+            vectors = info.config.params.vectors
+            current_schema = _vector_schema(vectors, info.config.params.sparse_vectors)
+            expected_schema = _vector_schema(vectors_config, sparse_vectors_config)
+            if current_schema != expected_schema:
+                # Vectors of another shape or layout can't be converted in place; they must be re-embedded
+                if aliased is not None:
+                    raise ValueError(
+                        f"Collection '{collection_name}' has vectors {current_schema}, expected {expected_schema}; "
+                        f"build a new version with reindex.py instead of recreating it"
+                    )
+                if not recreate_on_mismatch:
+                    raise ValueError(
+                        f"Collection '{collection_name}' has vectors {current_schema}, "
+                        f"expected {expected_schema}; re-run with recreate_on_mismatch=True and reload the data"
+                    )
+                self.client.delete_collection(collection_name)
+                print(f"Dropped collection '{collection_name}' (vector schema mismatch)")
+                info = None
+            else:
+                print(f"Collection '{collection_name}' already exists")
+                current = info.config.hnsw_config
+                if (current.m, current.ef_construct, bool(current.on_disk)) != \
+                        (hnsw_config.m, hnsw_config.ef_construct, bool(hnsw_config.on_disk)):
+                    self.client.update_collection(collection_name=collection_name, hnsw_config=hnsw_config)
+                    print(f"Updated HNSW config of '{collection_name}'")
+
+                profile = STORAGE_PROFILES[self.storage_profile]
+                current_storage = (
+                    _quantization_kind(info.config.quantization_config),
+                    _vectors_on_disk(vectors),
+                    bool(info.config.params.on_disk_payload)
                 )
-            )
-            print(f"Created collection '{self.wisdom_collection}'")
-    
-    def load_initial_data(self):
-        """Load synthetic data into Qdrant"""
-        with open("data/soil_samples.json", "r") as f:
-            soil_samples = json.load(f)
+                if current_storage != (profile["quantization"], profile["on_disk"], profile["on_disk"]):
+                    # Qdrant re-quantizes / moves segments in the background; searches keep working
+                    self.client.update_collection(
+                        collection_name=collection_name,
+                        quantization_config=quantization_config_for(self.storage_profile) or models.Disabled.DISABLED,
+                        vectors_config={
+                            name: models.VectorParamsDiff(on_disk=params.on_disk)
+                            for name, params in (
+                                {"": vectors_config} if isinstance(vectors_config, VectorParams) else vectors_config
+                            ).items()
+                        },
+                        collection_params=models.CollectionParamsDiff(on_disk_payload=profile["on_disk"])
+                    )
+                    print(f"Switched '{collection_name}' to storage profile '{self.storage_profile}'")
         
-        with open("data/wisdom_audio.json", "r") as f:
-            wisdom_data = json.load(f)
+        created = info is None
+        if created:
+            on_disk = STORAGE_PROFILES[self.storage_profile]["on_disk"]
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=vectors_config,
+                sparse_vectors_config=sparse_vectors_config,
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config_for(self.storage_profile),
+                on_disk_payload=on_disk
+            )
+            print(f"Created collection '{collection_name}'")
         
-        # Upload soil samples
-        soil_points = []
-        for sample in soil_samples:
-            embedding = self.embedding_gen.generate_soil_embedding(sample)
-            
-            point = PointStruct(
-                id=int(sample["id"].split("_")[1]),  # soil_001 -> 1
-                vector=embedding,
-                payload={
-                    "id": sample["id"],
-                    "soil_type": sample["soil_type"],
-                    "location": sample["location"],
-                    "crop_grown": sample["crop_grown"],
-                    "traditional_methods": sample["traditional_methods"],
-                    "sensor_data": sample["sensor_data"],
-                    "yield_quality": sample["yield_quality"],
-                    "date": sample["date"],
-                    "success_count": sample["success_count"],
-                    "reinforcement_score": sample["reinforcement_score"],
-                    "season": sample["season"],
-                    "farmer_feedback": sample["farmer_feedback"]
-                }
+        # Payload indexes for every filtered field; wrong types are rebuilt
+        existing_indexes = {} if created else (info.payload_schema or {})
+        for field_name, field_schema in payload_indexes.items():
+            existing = existing_indexes.get(field_name)
+            if existing is not None and existing.data_type == field_schema:
+                continue
+            if existing is not None:
+                self.client.delete_payload_index(collection_name=collection_name, field_name=field_name, wait=True)
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+                wait=True
             )
-            soil_points.append(point)
+            print(f"Indexed '{collection_name}.{field_name}' as {field_schema.value}")
         
+        return created
+    
+    def load_collection_meta(self, collection_name):
+        """Metadata stored for a collection ({} if none)"""
+        try:
+            records = self.client.retrieve(
+                collection_name=self.meta_collection,
+                ids=[collection_meta_id(collection_name)],
+                with_payload=True
+            )
+        except Exception:
+            return {}
+        return records[0].payload if records else {}
+
+    def save_collection_meta(self, collection_name, **fields):
+        """Merge fields into a collection's metadata record"""
+        payload = self.load_collection_meta(collection_name)
+        payload.update(fields, collection=collection_name)
         self.client.upsert(
-            collection_name=self.soil_collection,
-            points=soil_points
+            collection_name=self.meta_collection,
+            points=[PointStruct(id=collection_meta_id(collection_name), vector=[1.0], payload=payload)],
+            wait=True
         )
+
+    def _load_feature_scaler(self):
+        """Install the soil collection's stored feature scaler (and layout, once reindexed)
+
+        Loaded once, then re-checked every LAYOUT_CHECK_INTERVAL seconds: a reindex or rollback
+        in any process bumps layout_version in the meta record when it switches the alias.
+        """
+        now = time.monotonic()
+        if self._scaler_loaded and now - self._layout_checked_at < LAYOUT_CHECK_INTERVAL:
+            return
+        first_load = not self._scaler_loaded
+        self._scaler_loaded = True
+        self._layout_checked_at = now
+        meta = self.load_collection_meta(self.soil_collection)
+        version = meta.get("layout_version")
+        if not first_load and version == self._layout_version:
+            return
+
+        self._layout_version = version
+        scaler = meta.get("feature_scaler")
+        self.embedding_gen.feature_scaler = SensorFeatureScaler.from_dict(scaler) if scaler else None
+        if meta.get("soil_layout"):
+            self.soil_layout = meta["soil_layout"]
+        if not first_load:
+            print(f"'{self.soil_collection}' switched to {meta.get('live_collection')}; reloaded its scaler and layout")
+            self.result_cache.clear()
+
+    def _prepare_feature_scaler(self, soil_samples):
+        """Fit the feature scaler on the first samples loaded into an empty soil collection"""
+        self._load_feature_scaler()
+        if self.embedding_gen.feature_scaler is not None or not self.normalize_features or self._scaler_decided:
+            return
+        self._scaler_decided = True
+
+        if self.client.count(collection_name=self.soil_collection, exact=True).count > 0:
+            # Existing vectors were built with raw features; stay consistent with them
+            print(f"'{self.soil_collection}' has unscaled sensor features; reload it to enable normalization")
+            return
+
+        scaler = self.embedding_gen.fit_feature_scaler(soil_samples)
+        self.save_collection_meta(self.soil_collection, feature_scaler=scaler.to_dict())
+        print(f"Fitted sensor feature scaler on {len(soil_samples)} samples")
+
+    def _soil_payload(self, sample):
+        """Payload stored alongside a soil sample vector"""
+        date_ts = to_timestamp(sample["date"])
+        return {
+            "id": sample["id"],
+            "soil_type": sample["soil_type"],
+            "location": sample["location"],
+            "crop_grown": sample["crop_grown"],
+            "traditional_methods": sample["traditional_methods"],
+            "sensor_data": sample["sensor_data"],
+            "yield_quality": sample["yield_quality"],
+            "date": sample["date"],
+            "date_ts": date_ts,
+            "success_count": sample["success_count"],
+            "reinforcement_score": sample["reinforcement_score"],
+            # Successes count as of the sample's date; a reindex keeps the reinforced history
+            "anchored_score": sample.get(
+                "anchored_score", round(sample["success_count"] * float(anchor_weight(date_ts)), 6)
+            ),
+            "season": sample["season"],
+            "farmer_feedback": sample["farmer_feedback"]
+        }
+
+    def _wisdom_payload(self, wisdom):
+        """Payload stored alongside a wisdom snippet vector"""
+        return {
+            "id": wisdom["id"],
+            "farmer_name": wisdom["farmer_name"],
+            "experience_years": wisdom["experience_years"],
+            "topic": wisdom["topic"],
+            "advice": wisdom["advice"],
+            "language": wisdom["language"],
+            "season_applicable": wisdom["season_applicable"],
+            "soil_types_applicable": wisdom["soil_types_applicable"],
+            "popularity_score": wisdom["popularity_score"],
+            "date_recorded": wisdom["date_recorded"],
+            "date_recorded_ts": to_timestamp(wisdom["date_recorded"]),
+            # Where the farmer works; older data has none and never matches a near= filter
+            "location": wisdom.get("location")
+        }
+
+    def _soil_points(self, soil_samples, batch_size=64, text_embeddings=None):
+        """Embed a list of soil samples and build their points (text_embeddings: precomputed)"""
+        self._prepare_feature_scaler(soil_samples)
+        if self.soil_layout == "named":
+            with METRICS.stage("embed"):
+                text_vectors, sensor_vectors, keywords = self.embedding_gen.generate_soil_named_vectors(
+                    soil_samples, batch_size=batch_size, text_embeddings=text_embeddings
+                )
+            return [
+                PointStruct(
+                    id=int(sample["id"].split("_")[1]),
+                    vector={
+                        SOIL_TEXT_VECTOR: text_vector.tolist(),
+                        SOIL_SENSOR_VECTOR: sensor_vector.tolist(),
+                        SOIL_KEYWORD_VECTOR: models.SparseVector(indices=indices, values=values),
+                    },
+                    payload=self._soil_payload(sample)
+                )
+                for sample, text_vector, sensor_vector, (indices, values)
+                in zip(soil_samples, text_vectors, sensor_vectors, keywords)
+            ]
+
+        with METRICS.stage("embed"):
+            soil_embeddings = self.embedding_gen.generate_soil_embeddings(
+                soil_samples, batch_size=batch_size, text_embeddings=text_embeddings
+            )
+        return [
+            PointStruct(
+                id=int(sample["id"].split("_")[1]),  # soil_001 -> 1
+                vector=embedding.tolist(),
+                payload=self._soil_payload(sample)
+            )
+            for sample, embedding in zip(soil_samples, soil_embeddings)
+        ]
+
+    def _wisdom_points(self, wisdom_data, batch_size=64, text_embeddings=None):
+        """Embed a list of wisdom snippets and build their points (text_embeddings: precomputed)"""
+        if text_embeddings is None:
+            with METRICS.stage("embed"):
+                wisdom_embeddings = self.embedding_gen.generate_wisdom_embeddings(wisdom_data, batch_size=batch_size)
+        else:
+            wisdom_embeddings = text_embeddings
+        return [
+            PointStruct(
+                id=int(wisdom["id"].split("_")[1]),  # wisdom_001 -> 1
+                vector=embedding.tolist(),
+                payload=self._wisdom_payload(wisdom)
+            )
+            for wisdom, embedding in zip(wisdom_data, wisdom_embeddings)
+        ]
+
+    def load_initial_data(self, batch_size=64, streaming=False, chunk_size=1000, data_dir="data",
+                          soil_path=None, wisdom_path=None):
+        """Load synthetic data into Qdrant
+
+        Reads soil_samples / wisdom_audio from data_dir as .json, .jsonl or .parquet (whichever
+        exists, in that order) unless soil_path / wisdom_path name the files.
+        """
+        soil_path = soil_path or find_data_file(data_dir, "soil_samples")
+        wisdom_path = wisdom_path or find_data_file(data_dir, "wisdom_audio")
+        if streaming:
+            self.ingest_stream(soil_path, kind="soil", chunk_size=chunk_size, batch_size=batch_size)
+            self.ingest_stream(wisdom_path, kind="wisdom", chunk_size=chunk_size, batch_size=batch_size)
+            return
+
+        soil_samples = load_records(soil_path)
+        wisdom_data = load_records(wisdom_path)
+        
+        # Upload soil samples (one encode call for the whole set)
+        soil_points = self._soil_points(soil_samples, batch_size=batch_size)
+        
+        self._upsert_soil_points(soil_points)
         print(f"Loaded {len(soil_points)} soil samples")
         
         # Upload wisdom audio
-        wisdom_points = []
-        for wisdom in wisdom_data:
-            embedding = self.embedding_gen.generate_wisdom_embedding(wisdom)
-            
-            point = PointStruct(
-                id=int(wisdom["id"].split("_")[1]),  # wisdom_001 -> 1
-                vector=embedding,
-                payload={
-                    "id": wisdom["id"],
-                    "farmer_name": wisdom["farmer_name"],
-                    "experience_years": wisdom["experience_years"],
-                    "topic": wisdom["topic"],
-                    "advice": wisdom["advice"],
-                    "language": wisdom["language"],
-                    "season_applicable": wisdom["season_applicable"],
-                    "soil_types_applicable": wisdom["soil_types_applicable"],
-                    "popularity_score": wisdom["popularity_score"],
-                    "date_recorded": wisdom["date_recorded"]
-                }
-            )
-            wisdom_points.append(point)
+        wisdom_points = self._wisdom_points(wisdom_data, batch_size=batch_size)
         
-        self.client.upsert(
-            collection_name=self.wisdom_collection,
-            points=wisdom_points
-        )
+        self._upsert_wisdom_points(wisdom_points)
         print(f"Loaded {len(wisdom_points)} wisdom snippets")
-    
-    def search_similar_soil(self, query_text, sensor_data=None, season_filter=None, limit=5):
-        """Search for similar soil samples"""
-        query_vector = self.embedding_gen.generate_query_embedding(query_text, sensor_data)
-        
-        # Build filter if needed
-        query_filter = None
-        if season_filter:
-            query_filter = Filter(
-                must=[FieldCondition(key="season", match=MatchValue(value=season_filter))]
+
+    def ingest_stream(self, path, kind="soil", chunk_size=1000, batch_size=64):
+        """Stream a JSON array or JSON Lines file into Qdrant one chunk at a time"""
+        if kind == "soil":
+            collection_name, build_points = self.soil_collection, self._soil_points
+            upsert = self._upsert_soil_points
+        elif kind == "wisdom":
+            collection_name, build_points = self.wisdom_collection, self._wisdom_points
+            upsert = self._upsert_wisdom_points
+        else:
+            raise ValueError(f"Unknown record kind: {kind}")
+
+        total = 0
+        started = time.perf_counter()
+
+        # Only one chunk of records and points is held in memory at a time
+        for chunk_number, records in enumerate(iter_chunks(iter_records(path), chunk_size), 1):
+            chunk_started = time.perf_counter()
+
+            points = build_points(records, batch_size=batch_size)
+            upsert(points)
+
+            total += len(points)
+            chunk_elapsed = time.perf_counter() - chunk_started
+            overall_rate = total / (time.perf_counter() - started)
+            print(
+                f"[{collection_name}] chunk {chunk_number}: {len(points)} records in {chunk_elapsed:.2f}s "
+                f"({len(points) / chunk_elapsed:.1f} rec/s), {total} total ({overall_rate:.1f} rec/s overall)"
             )
-        
-        results = self.client.search(
-            collection_name=self.soil_collection,
-            query_vector=query_vector,
-            query_filter=query_filter,
-            limit=limit,
-            with_payload=True,
-            with_vectors=False
+
+        self.stats_store.save()
+        print(f"Streamed {total} {kind} records into '{collection_name}'")
+        return total
+
+    def _upsert_soil_points(self, points):
+        """Upsert soil points and keep the materialized stats in step"""
+        METRICS.batch("upsert", len(points))
+        with METRICS.stage("qdrant"):
+            # Points being overwritten must leave the aggregates before the new payloads enter
+            existing = self.client.retrieve(
+                collection_name=self.soil_collection,
+                ids=[point.id for point in points],
+                with_payload=STATS_FIELDS
+            )
+            self.client.upsert(
+                collection_name=self.soil_collection,
+                points=points,
+                wait=True
+            )
+        self.stats_store.replace_samples(
+            [record.payload for record in existing],
+            [point.payload for point in points]
         )
-        
-        return results
-    
-    def search_wisdom(self, query_text, soil_type_filter=None, limit=5):
-        """Search for relevant wisdom snippets"""
-        query_vector = self.embedding_gen.generate_query_embedding(query_text)
-        
-        query_filter = None
-        if soil_type_filter:
-            query_filter = Filter(
-                must=[FieldCondition(
-                    key="soil_types_applicable", 
-                    match=MatchValue(value=soil_type_filter)
-                )]
+        self.stats_store.maybe_save()
+
+        # New or changed points can enter any unfiltered search, searches of their season,
+        # recommendation pools of their soil type, and results they were already in
+        tags = {("season", "*")}
+        for point in points:
+            tags.update({
+                ("point", point.id),
+                ("season", point.payload["season"]),
+                ("soil_type", point.payload["soil_type"])
+            })
+        self.result_cache.invalidate_tags(tags)
+
+    def _upsert_wisdom_points(self, points):
+        METRICS.batch("upsert", len(points))
+        with METRICS.stage("qdrant"):
+            self.client.upsert(
+                collection_name=self.wisdom_collection,
+                points=points,
+                wait=True
             )
-        
-        results = self.client.search(
-            collection_name=self.wisdom_collection,
-            query_vector=query_vector,
-            query_filter=query_filter,
-            limit=limit,
-            with_payload=True,
-            with_vectors=False
+        self.result_cache.invalidate_tags([("wisdom",)])
+    
+    def search_similar_soil(self, query_text, sensor_data=None, season_filter=None, limit=5, weights=None,
+                            near=None, geo_weight=0.0, since=None, until=None):
+        """Search for similar soil samples
+
+        weights ({"text": ..., "sensors": ..., "keywords": ...}) sets how much each part counts;
+        with the named layout all parts are fused server-side in one query_points request.
+        near=(lat, lon, radius_km) keeps samples within the radius (filtered in Qdrant); a
+        geo_weight > 0 also adds geo_weight * distance decay to the similarity score.
+        since / until (dates, ISO strings, timestamps; since may be a timedelta back from now)
+        restrict samples to a date window with a range filter on the indexed date_ts.
+        """
+        cache_key = (
+            "search_similar_soil", query_text, json.dumps(sensor_data, sort_keys=True),
+            season_filter, limit, json.dumps(weights, sort_keys=True), cache_key_value(near), geo_weight,
+            cache_key_value(since), cache_key_value(until)
+        )
+        hit, results = self.result_cache.get(cache_key)
+        if hit:
+            return results
+
+        generation = self.result_cache.generation()
+        results = self._search_similar_soil(
+            query_text, sensor_data, season_filter, limit, weights, near, geo_weight, since, until
         )
+        # Vector scores ignore payloads, so only writes to returned points or new points
+        # matching the filter can change the result
+        self.result_cache.put(
+            cache_key, results,
+            tags=[("season", season_filter or "*")] + [("point", result.id) for result in results],
+            generation=generation
+        )
+        return results
+
+    def _search_similar_soil(self, query_text, sensor_data, season_filter, limit, weights, near=None, geo_weight=0.0,
+                             since=None, until=None):
+        self._load_feature_scaler()
         
+        # Build filter if needed
+        query_filter = combine_filters(
+            season_filter_for(season_filter), geo_filter_for(near), date_filter_for(SOIL_DATE_FIELD, since, until)
+        )
+        # Distance blending re-scores a larger candidate pool
+        blend = bool(near and geo_weight)
+        pool = limit * HYBRID_PREFETCH_FACTOR if blend else limit
+
+        if self.soil_layout == "named":
+            with METRICS.stage("embed"):
+                query_vectors = soil_query_vectors(self.embedding_gen, query_text, sensor_data)
+            query = hybrid_soil_query(query_vectors, query_filter, pool, weights, self.search_params)
+            with METRICS.stage("qdrant"):
+                if blend and supports_formula_queries(self.client):
+                    fused = models.Prefetch(prefetch=query["prefetch"], query=query["query"], limit=pool)
+                    return self.client.query_points(
+                        collection_name=self.soil_collection, **geo_decay_query([fused], near, geo_weight, limit)
+                    ).points
+                results = self.client.query_points(collection_name=self.soil_collection, **query).points
+        else:
+            with METRICS.stage("embed"):
+                query_vector = self.embedding_gen.generate_soil_query_embedding(query_text, sensor_data, weights)
+
+            with METRICS.stage("qdrant"):
+                if blend and supports_formula_queries(self.client):
+                    candidates = models.Prefetch(
+                        query=query_vector, filter=query_filter, limit=pool, params=self.search_params
+                    )
+                    return self.client.query_points(
+                        collection_name=self.soil_collection, **geo_decay_query([candidates], near, geo_weight, limit)
+                    ).points
+                results = self.client.search(
+                    collection_name=self.soil_collection,
+                    query_vector=query_vector,
+                    query_filter=query_filter,
+                    limit=pool,
+                    with_payload=True,
+                    with_vectors=False,
+                    search_params=self.search_params
+                )
+
+        if blend:
+            with METRICS.stage("rank"):
+                results = rescore_by_distance(results, near, geo_weight, limit)
         return results
     
-    def get_recommendations(self, soil_sample_id, limit=3):
-        """Get recommendations based on similar successful cases"""
-        # First, get the soil sample
-        soil_sample = self.client.retrieve(
-            collection_name=self.soil_collection,
-            ids=[int(soil_sample_id.split("_")[1])],
-            with_payload=True,
-            with_vectors=True
-        )[0]
-        
-        # Search for similar soils with good yield
-        query_filter = Filter(
-            must=[
-                FieldCondition(key="yield_quality", match=MatchValue(value="good")),
-                FieldCondition(key="soil_type", match=MatchValue(value=soil_sample.payload["soil_type"]))
-            ]
+    def search_wisdom(self, query_text, soil_type_filter=None, limit=5, near=None, geo_weight=0.0,
+                      since=None, until=None):
+        """Search for relevant wisdom snippets (near / geo_weight / since / until as in search_similar_soil)"""
+        cache_key = (
+            "search_wisdom", query_text, soil_type_filter, limit, cache_key_value(near), geo_weight,
+            cache_key_value(since), cache_key_value(until)
         )
+        hit, results = self.result_cache.get(cache_key)
+        if hit:
+            return results
+
+        generation = self.result_cache.generation()
+        with METRICS.stage("embed"):
+            query_vector = self.embedding_gen.generate_query_embedding(query_text)
         
-        results = self.client.search(
-            collection_name=self.soil_collection,
-            query_vector=soil_sample.vector,
-            query_filter=query_filter,
-            limit=limit,
-            with_payload=True,
-            with_vectors=False
+        query_filter = combine_filters(
+            soil_type_filter_for(soil_type_filter), geo_filter_for(near),
+            date_filter_for(WISDOM_DATE_FIELD, since, until)
         )
+        blend = bool(near and geo_weight)
+        pool = limit * HYBRID_PREFETCH_FACTOR if blend else limit
+        server_blend = blend and supports_formula_queries(self.client)
         
-        # Extract successful methods
-        recommendations = []
-        for result in results:
-            if result.payload["id"] != soil_sample_id:  # Exclude self
-                for method in result.payload["traditional_methods"]:
-                    if method not in recommendations:
-                        recommendations.append(method)
-                        if len(recommendations) >= 5:
-                            break
+        with METRICS.stage("qdrant"):
+            if server_blend:
+                candidates = models.Prefetch(
+                    query=query_vector, filter=query_filter, limit=pool, params=self.search_params
+                )
+                results = self.client.query_points(
+                    collection_name=self.wisdom_collection, **geo_decay_query([candidates], near, geo_weight, limit)
+                ).points
+            else:
+                results = self.client.search(
+                    collection_name=self.wisdom_collection,
+                    query_vector=query_vector,
+                    query_filter=query_filter,
+                    limit=pool,
+                    with_payload=True,
+                    with_vectors=False,
+                    search_params=self.search_params
+                )
+        if blend and not server_blend:
+            with METRICS.stage("rank"):
+                results = rescore_by_distance(results, near, geo_weight, limit)
         
-        return recommendations[:5]
+        self.result_cache.put(cache_key, results, tags=[("wisdom",)], generation=generation)
+        return results
     
-    def reinforce_memory(self, soil_sample_id, worked_well=True):
-        """Reinforce memory when a method works well"""
-        # Get current success count
-        soil_sample = self.client.retrieve(
-            collection_name=self.soil_collection,
-            ids=[int(soil_sample_id.split("_")[1])],
-            with_payload=True
-        )[0]
+    def get_recommendations(self, soil_sample_id, limit=5, pool_size=RECOMMENDATION_POOL_SIZE, with_scores=False):
+        """Get up to limit methods ranked over pool_size similar soils ([(method, score)] with_scores)
+
+        limit is the number of methods returned. It used to be the number of good-yield
+        neighbours searched (default 3), with at most 5 methods returned; a call without
+        limit still returns up to 5 methods. pool_size (default RECOMMENDATION_POOL_SIZE)
+        same-type neighbours of any yield are scored, so a larger pool costs one bigger
+        search, not more requests.
+        """
+        cache_key = ("get_recommendations", soil_sample_id, limit, pool_size)
+        hit, ranked = self.result_cache.get(cache_key)
+        if not hit:
+            generation = self.result_cache.generation()
+            ranked, pool_ids, soil_type = self._rank_recommendations(soil_sample_id, limit, pool_size)
+            # Reinforcing any pooled point re-weights the ranking; new points of the type may join the pool
+            self.result_cache.put(
+                cache_key, ranked,
+                tags=[("soil_type", soil_type), ("point", int(soil_sample_id.split("_")[1]))]
+                + [("point", point_id) for point_id in pool_ids],
+                generation=generation
+            )
+        return ranked if with_scores else [method for method, _ in ranked]
+
+    def _rank_recommendations(self, soil_sample_id, limit, pool_size):
+        # The layout decides how the pool is searched; pick up a reindex done elsewhere
+        self._load_feature_scaler()
+        # First, get the soil sample
+        with METRICS.stage("qdrant"):
+            soil_sample = self.client.retrieve(
+                collection_name=self.soil_collection,
+                ids=[int(soil_sample_id.split("_")[1])],
+                with_payload=True,
+                with_vectors=True
+            )[0]
         
-        current_count = soil_sample.payload.get("success_count", 0)
-        new_count = current_count + 1 if worked_well else current_count
+        # One search for a large pool of similar soils; yield is weighed by the ranker, not filtered
+        query_filter = recommendation_filter_for(soil_sample.payload["soil_type"], good_yield_only=False)
+
+        with METRICS.stage("qdrant"):
+            if self.soil_layout == "named":
+                # The sample's own stored vectors are the query, fused like a farmer query
+                results = self.client.query_points(
+                    collection_name=self.soil_collection,
+                    **hybrid_soil_query(soil_sample.vector, query_filter, pool_size, search_params=self.search_params)
+                ).points
+            else:
+                results = self.client.search(
+                    collection_name=self.soil_collection,
+                    query_vector=soil_sample.vector,
+                    query_filter=query_filter,
+                    limit=pool_size,
+                    with_payload=RANKING_FIELDS,
+                    with_vectors=False,
+                    search_params=self.search_params
+                )
         
-        # Update the point
-        self.client.set_payload(
-            collection_name=self.soil_collection,
-            payload={
-                "success_count": new_count,
-                "reinforcement_score": round(new_count / 20, 2),
-                "farmer_feedback": "Method confirmed effective" if worked_well else "Needs adjustment"
-            },
-            points=[int(soil_sample_id.split("_")[1])]
-        )
+        # Score methods over the whole pool
+        with METRICS.stage("rank"):
+            ranked = self.ranker.rank(results, exclude_id=soil_sample_id, max_methods=limit)
+        return ranked, [result.id for result in results], soil_sample.payload["soil_type"]
+    
+    def get_recommendations_bulk(self, soil_sample_ids, limit=5, pool_size=100, chunk_size=64, max_workers=4,
+                                 with_scores=False):
+        """get_recommendations for many samples: {soil_sample_id: methods}
+
+        One retrieve fetches every vector, the pool searches go out as batch requests of
+        chunk_size run on max_workers threads, and all pools are ranked in one pass.
+        Unknown ids are left out of the result. The default pool is smaller than
+        get_recommendations' to bound the payloads transferred for thousands of samples.
+        """
+        self._load_feature_scaler()
+        with METRICS.stage("qdrant"):
+            soil_samples = self.client.retrieve(
+                collection_name=self.soil_collection,
+                ids=[int(soil_sample_id.split("_")[1]) for soil_sample_id in soil_sample_ids],
+                with_payload=["id", "soil_type"],
+                with_vectors=True
+            )
+
+        requests = []
+        for soil_sample in soil_samples:
+            query_filter = recommendation_filter_for(soil_sample.payload["soil_type"], good_yield_only=False)
+            if self.soil_layout == "named":
+                query = hybrid_soil_query(soil_sample.vector, query_filter, pool_size, search_params=self.search_params)
+                requests.append(models.QueryRequest(
+                    prefetch=query["prefetch"],
+                    query=query["query"],
+                    filter=query_filter,
+                    limit=pool_size,
+                    with_payload=RANKING_FIELDS
+                ))
+            else:
+                requests.append(models.SearchRequest(
+                    vector=soil_sample.vector,
+                    filter=query_filter,
+                    limit=pool_size,
+                    with_payload=RANKING_FIELDS,
+                    params=self.search_params
+                ))
+
+        def run_chunk(chunk):
+            if self.soil_layout == "named":
+                responses = self.client.query_batch_points(collection_name=self.soil_collection, requests=chunk)
+                return [response.points for response in responses]
+            return self.client.search_batch(collection_name=self.soil_collection, requests=chunk)
+
+        chunks = [requests[i:i + chunk_size] for i in range(0, len(requests), chunk_size)]
+        for chunk in chunks:
+            METRICS.batch("search", len(chunk))
+        with METRICS.stage("qdrant"), ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pools = [results for chunk_results in executor.map(run_chunk, chunks) for results in chunk_results]
+
+        sample_ids = [soil_sample.payload["id"] for soil_sample in soil_samples]
+        with METRICS.stage("rank"):
+            ranked = self.ranker.rank_many(pools, exclude_ids=sample_ids, max_methods=limit)
+        return {
+            sample_id: methods if with_scores else [method for method, _ in methods]
+            for sample_id, methods in zip(sample_ids, ranked)
+        }
+
+    def reinforce_memory(self, soil_sample_id, worked_well=True, sync=True):
+        """Reinforce memory when a method works well; returns the new success_count
+
+        Concurrent calls are coalesced: each flush writes every queued event in one batched
+        update. sync=False only queues the event for the aggregator's background flusher
+        (every flush_interval seconds, sooner once max_pending points wait, and at exit) and
+        returns None.
+        """
+        # Events go through the aggregator so concurrent callers never lose increments
+        point_id = int(soil_sample_id.split("_")[1])
+        self.feedback.record(point_id, worked_well)
+        if not sync:
+            return None
+
+        with METRICS.stage("qdrant"):
+            self.feedback.flush()
+        new_count = self.feedback.last_counts.get(point_id)
+        if new_count is None:
+            raise ValueError(f"Unknown soil sample: {soil_sample_id}")
         
         print(f"Reinforced memory for {soil_sample_id}: success_count = {new_count}")
         return new_count
+
+    def _on_feedback_flush(self, changes):
+        """Fold reinforcement score changes from a feedback flush into the stats and cached results"""
+        self.stats_store.add_reinforcement(sum(new - old for _, old, new in changes))
+        self.stats_store.maybe_save()
+        # success_count / anchored_score feed recommendation ranking and show in search payloads
+        self.result_cache.invalidate_tags([("point", point_id) for point_id, _, _ in changes])
+
+    def close(self):
+        """Flush queued feedback and materialized stats, then close the client and embedding cache"""
+        self.feedback.close()
+        self.stats_store.save()
+        # The embedded index only writes its points, aliases and meta collection to local_path here
+        close_client = getattr(self.client, "close", None)
+        if close_client is not None:
+            close_client()
+        if self._owned_cache is not None:
+            self._owned_cache.close()
     
-    def get_soil_stats(self):
+    def get_soil_stats(self, page_size=1000, materialized=True):
         """Get statistics about soil data"""
-        # Get all points (simplified - in production would use scroll)
-        points = self.client.scroll(
-            collection_name=self.soil_collection,
-            limit=100,
-            with_payload=True
-        )[0]
-        
-        stats = {
-            "total_samples": len(points),
-            "soil_types": {},
-            "avg_reinforcement": 0,
-            "successful_methods": []
-        }
-        
-        method_counts = {}
-        total_reinforcement = 0
+        if not materialized:
+            return self.scan_soil_stats(page_size=page_size).summary()
+
+        # O(1) read of the aggregates maintained on write; built by one scan if missing
+        if not self.stats_store.initialized:
+            self.check_soil_stats(fix=True, page_size=page_size)
+            self._stats_reconciled_at = time.monotonic()
+        elif (self._stats_reconciled_at is None
+              or time.monotonic() - self._stats_reconciled_at >= STATS_RECONCILE_INTERVAL):
+            self.reconcile_soil_stats(page_size=page_size)
+        return self.stats_store.summary()
+
+    def reconcile_soil_stats(self, page_size=1000):
+        """Rebuild the materialized stats if their total no longer matches the collection
+
+        Other processes writing to the same collection keep their own aggregates, so a
+        count mismatch means these are stale. Returns True if they were rebuilt.
+        """
+        with METRICS.stage("qdrant"):
+            count = self.client.count(collection_name=self.soil_collection, exact=True).count
+        self._stats_reconciled_at = time.monotonic()
+        if count == self.stats_store.total:
+            return False
+        print(f"Soil stats count {self.stats_store.total} != {count} points, rebuilding")
+        self.check_soil_stats(fix=True, page_size=page_size)
+        return True
+
+    def scan_soil_stats(self, page_size=1000):
+        """Aggregate soil stats with a full paginated scan of the collection"""
+        scanned = SoilStatsStore()
         
-        for point in points:
-            soil_type = point.payload["soil_type"]
-            stats["soil_types"][soil_type] = stats["soil_types"].get(soil_type, 0) + 1
+        # Page through the whole collection, keeping only running aggregates
+        offset = None
+        while True:
+            with METRICS.stage("qdrant"):
+                points, offset = self.client.scroll(
+                    collection_name=self.soil_collection,
+                    limit=page_size,
+                    offset=offset,
+                    with_payload=STATS_FIELDS,
+                    with_vectors=False
+                )
             
-            total_reinforcement += point.payload.get("reinforcement_score", 0)
+            for point in points:
+                scanned.add_sample(point.payload)
             
-            for method in point.payload["traditional_methods"]:
-                method_counts[method] = method_counts.get(method, 0) + 1
-        
-        if points:
-            stats["avg_reinforcement"] = round(total_reinforcement / len(points), 2)
-        
-        # Top 5 successful methods
-        stats["successful_methods"] = sorted(
-            method_counts.items(), 
-            key=lambda x: x[1], 
-            reverse=True
-        )[:5]
+            if offset is None:
+                break
         
-        return stats
\ No newline at end of file
+        scanned.initialized = True
+        return scanned
+
+    def check_soil_stats(self, fix=False, page_size=1000):
+        """Compare the materialized stats with a full scan; rebuild them if asked"""
+        scanned = self.scan_soil_stats(page_size=page_size)
+        differences = self.stats_store.differences(scanned)
+
+        if fix or not self.stats_store.initialized:
+            self.stats_store.copy_from(scanned)
+            self.stats_store.save()
+
+        return differences
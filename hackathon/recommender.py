@@ -0,0 +1,131 @@
+from datetime import date
+
+import numpy as np
+
+from feedback import decayed_score
+
+YIELD_SCORES = {"good": 1.0, "average": 0.5, "poor": 0.0}
+
+
+class MethodRanker:
+    """Ranks traditional methods over a pool of similar soil samples
+
+    Each candidate gets one score from its (min-max normalized) similarity, its successes,
+    yield and recency. Successes come from the stored anchored_score, decayed to today, so they
+    already fade with age and such candidates get no separate recency term. Data loaded before
+    anchored scores existed falls back to success_count plus an exponential recency decay on
+    its date.
+
+    A method's score is the share of the pool's total candidate score held by the candidates
+    that use it, computed as one matrix-vector product over the candidate x method incidence
+    matrix.
+    """
+
+    DEFAULT_WEIGHTS = {"similarity": 1.0, "success": 0.5, "yield": 0.5, "recency": 0.25}
+
+    def __init__(self, weights=None, half_life_days=730, max_success=20):
+        self.weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
+        self.half_life_days = half_life_days
+        self.max_success = max_success
+
+    def candidate_scores(self, similarities, successes, yields, dates, today=None, pool_starts=None, decayed=None):
+        """Per-candidate scores from parallel arrays (dates as 'YYYY-MM-DD' strings or unix seconds)
+
+        pool_starts marks where each (non-empty) pool begins when several are scored together;
+        similarities are normalized within their own pool. decayed marks candidates whose
+        successes are already decayed by age; their recency term is dropped.
+        """
+        similarities = np.asarray(similarities, dtype=np.float32)
+        if len(similarities) == 0:
+            return similarities
+        pool_starts = np.zeros(1, dtype=np.intp) if pool_starts is None else np.asarray(pool_starts)
+        pool_sizes = np.diff(np.append(pool_starts, len(similarities)))
+        low = np.repeat(np.minimum.reduceat(similarities, pool_starts), pool_sizes)
+        spread = np.repeat(np.maximum.reduceat(similarities, pool_starts), pool_sizes) - low
+        similarity = np.where(spread > 0, (similarities - low) / np.where(spread > 0, spread, 1), 1.0)
+
+        success = np.minimum(np.asarray(successes, dtype=np.float32) / self.max_success, 1.0)
+        yield_score = np.array([YIELD_SCORES.get(y, 0.0) for y in yields], dtype=np.float32)
+
+        dates = np.asarray(dates)
+        if dates.dtype.kind not in "iuf":
+            dates = dates.astype("datetime64[s]").astype(np.int64)
+        today = np.datetime64(today or date.today(), "D").astype("datetime64[s]").astype(np.int64)
+        age_days = ((today - dates) / 86400).astype(np.float32)
+        recency = np.exp2(-np.maximum(age_days, 0) / self.half_life_days)
+        if decayed is not None:
+            recency = np.where(decayed, 0.0, recency)
+
+        w = self.weights
+        return (
+            w["similarity"] * similarity + w["success"] * success
+            + w["yield"] * yield_score + w["recency"] * recency
+        )
+
+    def rank(self, results, exclude_id=None, max_methods=5, today=None):
+        """[(method, score)] best first, from search results carrying soil payloads"""
+        return self.rank_many([results], [exclude_id], max_methods=max_methods, today=today)[0]
+
+    def rank_many(self, result_lists, exclude_ids=None, max_methods=5, today=None):
+        """rank() for many pools at once: one scoring pass and one pool x method matrix"""
+        exclude_ids = exclude_ids or [None] * len(result_lists)
+        pools = [
+            [result for result in results if result.payload["id"] != exclude_id]
+            for results, exclude_id in zip(result_lists, exclude_ids)
+        ]
+        ranked = [[] for _ in pools]
+        candidates = [candidate for pool in pools for candidate in pool]
+        if not candidates:
+            return ranked
+        payloads = [candidate.payload for candidate in candidates]
+
+        pool_sizes = np.array([len(pool) for pool in pools])
+        pool_starts = np.cumsum(pool_sizes) - pool_sizes
+        dates = [payload.get("date_ts") for payload in payloads]
+        if None in dates:  # data loaded before date_ts
+            dates = [payload.get("date", "1970-01-01") for payload in payloads]
+        anchored = np.array([payload.get("anchored_score", np.nan) for payload in payloads], dtype=np.float64)
+        decayed = ~np.isnan(anchored)
+        now = np.datetime64(today or date.today(), "D").astype("datetime64[s]").astype(np.int64)
+        successes = np.where(
+            decayed, decayed_score(np.nan_to_num(anchored), now),
+            [payload.get("success_count", 0) for payload in payloads]
+        )
+        scores = self.candidate_scores(
+            [candidate.score for candidate in candidates],
+            successes,
+            [payload.get("yield_quality") for payload in payloads],
+            dates,
+            today=today,
+            pool_starts=pool_starts[pool_sizes > 0],
+            decayed=decayed
+        )
+
+        # Pool x method score matrix: every (candidate, method) pair adds the candidate's score
+        method_lists = [payload["traditional_methods"] for payload in payloads]
+        method_counts = [len(methods) for methods in method_lists]
+        flat_methods = [method for methods in method_lists for method in methods]
+        # Alphabetical columns, so ties rank the same whichever pools are scored together
+        method_index = {method: i for i, method in enumerate(sorted(set(flat_methods)))}
+        cols = np.fromiter((method_index[method] for method in flat_methods), dtype=np.intp, count=len(flat_methods))
+        pool_of_candidate = np.repeat(np.arange(len(pools)), pool_sizes)
+        rows = np.repeat(pool_of_candidate, method_counts)
+
+        shape = (len(pools), len(method_index))
+        method_scores = np.bincount(
+            rows * shape[1] + cols, weights=np.repeat(scores, method_counts), minlength=shape[0] * shape[1]
+        ).reshape(shape)
+        # Each method's share of its pool's total candidate score
+        totals = np.bincount(pool_of_candidate, weights=scores, minlength=shape[0])
+        method_scores /= np.where(totals > 0, totals, 1.0)[:, None]
+
+        # The method vocabulary is small (tens), so a full stable sort per pool is cheap
+        top = np.argsort(-method_scores, axis=1, kind="stable")[:, :max_methods]
+
+        methods = list(method_index)
+        for i in np.flatnonzero(pool_sizes):
+            ranked[i] = [
+                (methods[j], round(float(method_scores[i, j]), 4))
+                for j in top[i] if method_scores[i, j] > 0
+            ]
+        return ranked
@@ -0,0 +1,372 @@
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from qdrant_client.http import models
+
+from data_stream import iter_records, iter_chunks
+from embedding import EmbeddingGenerator
+from quadrant import BhuSmrutiQdrant, resolve_alias, SOIL_TEXT_VECTOR
+
+# Reinforcement fields written to the live collection while a new version is being built
+FEEDBACK_FIELDS = ["success_count", "reinforcement_score", "farmer_feedback"]
+# Decay bookkeeping, copied along with changed feedback but not compared (it only changes with it)
+DECAY_FIELDS = ["anchored_score"]
+# Qdrant's default indexing threshold, restored once a bulk load is done
+INDEXING_THRESHOLD = 20000
+
+
+class Reservoir:
+    """Uniform random sample of at most size items from a stream of unknown length"""
+
+    def __init__(self, size, rng=random):
+        self.size = size
+        self.rng = rng
+        self.items = []
+        self.seen = 0
+
+    def add(self, items):
+        for item in items:
+            self.seen += 1
+            if len(self.items) < self.size:
+                self.items.append(item)
+            else:
+                # Keep each of the seen items with probability size / seen
+                slot = self.rng.randrange(self.seen)
+                if slot < self.size:
+                    self.items[slot] = item
+
+
+def version_name(alias_name, version):
+    return f"{alias_name}_v{version}"
+
+
+def list_versions(client, alias_name):
+    """[(version, collection name)] of an alias' versioned collections, oldest first"""
+    pattern = re.compile(rf"^{re.escape(alias_name)}_v(\d+)$")
+    versions = []
+    for collection in client.get_collections().collections:
+        match = pattern.match(collection.name)
+        if match:
+            versions.append((int(match.group(1)), collection.name))
+    return sorted(versions)
+
+
+def promoted_versions(bank, alias_name):
+    """[(version, collection name)] of an alias' versions that went live, oldest first
+
+    Builds that failed verification are left in place but never promoted, so garbage
+    collection and rollback must not count them as working versions.
+    """
+    return [
+        (version, name) for version, name in list_versions(bank.client, alias_name)
+        if bank.load_collection_meta(name).get("promoted")
+    ]
+
+
+def swap_alias(client, alias_name, collection_name):
+    """Point an alias at another collection in one atomic operation"""
+    operations = []
+    if resolve_alias(client, alias_name) is not None:
+        operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias_name)))
+    operations.append(models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name=collection_name, alias_name=alias_name)
+    ))
+    client.update_collection_aliases(change_aliases_operations=operations)
+
+
+def wait_until_green(client, collection_name, poll_interval=0.5, timeout=3600):
+    started = time.monotonic()
+    while client.get_collection(collection_name).status != models.CollectionStatus.GREEN:
+        if time.monotonic() - started > timeout:
+            raise TimeoutError(f"Collection '{collection_name}' did not finish indexing in {timeout}s")
+        time.sleep(poll_interval)
+
+
+def scroll_payloads(client, collection_name, page_size=1000, with_payload=True):
+    """Yield every payload of a collection"""
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=page_size,
+            offset=offset,
+            with_payload=with_payload,
+            with_vectors=False
+        )
+        for point in points:
+            yield point.id, point.payload
+        if offset is None:
+            return
+
+
+def sync_live_points(client, source, target, add_records, feedback=True, page_size=1000):
+    """Catch target up with writes to source during its build; returns (points updated, points added)
+
+    Points missing from target (inserted after the build read them) are re-embedded through
+    add_records(payloads). With feedback, points whose FEEDBACK_FIELDS differ get source's
+    FEEDBACK_FIELDS and DECAY_FIELDS.
+    """
+    fields = FEEDBACK_FIELDS + DECAY_FIELDS if feedback else False
+    updated = added = 0
+    for chunk in iter_chunks(scroll_payloads(client, source, page_size, with_payload=fields), page_size):
+        current = {
+            record.id: record.payload
+            for record in client.retrieve(collection_name=target, ids=[point_id for point_id, _ in chunk],
+                                          with_payload=FEEDBACK_FIELDS if feedback else False)
+        }
+        missing = [point_id for point_id, _ in chunk if point_id not in current]
+        if missing:
+            records = client.retrieve(collection_name=source, ids=missing, with_payload=True)
+            add_records([record.payload for record in records])
+            added += len(records)
+        if not feedback:
+            continue
+
+        grouped = {}
+        for point_id, payload in chunk:
+            if point_id not in current:
+                continue
+            if any(current[point_id].get(field) != payload.get(field) for field in FEEDBACK_FIELDS):
+                changed = {field: payload[field] for field in FEEDBACK_FIELDS + DECAY_FIELDS if field in payload}
+                grouped.setdefault(json.dumps(changed, sort_keys=True), []).append(point_id)
+        if grouped:
+            client.batch_update_points(
+                collection_name=target,
+                update_operations=[
+                    models.SetPayloadOperation(set_payload=models.SetPayload(payload=json.loads(key), points=ids))
+                    for key, ids in grouped.items()
+                ],
+                wait=True
+            )
+            updated += sum(len(ids) for ids in grouped.values())
+    return updated, added
+
+
+def publish_layout(bank, alias_name, collection_name, soil_layout, feature_scaler):
+    """Record the live version's layout and scaler under the alias and bump layout_version
+
+    Banks in other processes compare layout_version on their next check and reload both.
+    """
+    version = bank.load_collection_meta(alias_name).get("layout_version", 0) + 1
+    bank.save_collection_meta(alias_name, feature_scaler=feature_scaler, soil_layout=soil_layout,
+                              live_collection=collection_name, layout_version=version)
+    # Reload in this process right away
+    bank._scaler_loaded = False
+    bank._load_feature_scaler()
+    return version
+
+
+def self_retrieval_rate(client, collection_name, point_ids, named=False):
+    """Share of sampled points that are their own nearest neighbour"""
+    if not point_ids:
+        return 1.0
+    records = client.retrieve(collection_name=collection_name, ids=point_ids, with_vectors=True)
+    requests = [
+        models.SearchRequest(
+            vector=models.NamedVector(name=SOIL_TEXT_VECTOR, vector=record.vector[SOIL_TEXT_VECTOR])
+            if named else record.vector,
+            limit=1,
+            with_payload=False
+        )
+        for record in records
+    ]
+    results = client.search_batch(collection_name=collection_name, requests=requests)
+    found = sum(1 for record, hits in zip(records, results) if hits and hits[0].id == record.id)
+    return found / len(point_ids)
+
+
+def reindex(bank, kind="soil", source=None, workers=1, chunk_size=1000, batch_size=64, soil_layout=None,
+            storage_profile=None, refit_scaler=False, verify_sample=50, min_self_recall=0.95, keep_versions=1):
+    """Build the next version of a collection, verify it, swap the alias and drop old versions
+
+    Searches keep using the live collection through its alias until the swap. The new
+    version is filled from a data file (source; with workers > 1 through backfill's process
+    pool) or, by default, by re-embedding the live payloads. It is bulk-loaded with indexing
+    deferred, then verified: every loaded record must be present and a sample of points must
+    find themselves as nearest neighbour. Just before the swap, reinforcements that hit the
+    live collection during the build are copied over and points inserted meanwhile are
+    embedded into the new version. A failed verification leaves the alias untouched and the
+    new version in place for inspection; it is never marked promoted, so rollback skips it
+    and the next successful reindex deletes it.
+    """
+    client = bank.client
+    alias_name = {"soil": bank.soil_collection, "wisdom": bank.wisdom_collection}[kind]
+    live = resolve_alias(client, alias_name)
+    if live is None and client.collection_exists(alias_name):
+        live = alias_name  # unversioned collection from before reindexing existed
+
+    versions = list_versions(client, alias_name)
+    target = version_name(alias_name, versions[-1][0] + 1 if versions else 1)
+    if live is not None and live != alias_name:
+        # Versions built before promotion was recorded: the live one certainly went live
+        bank.save_collection_meta(live, promoted=True)
+
+    # Shadow bank writing to the new version; its own generator so the live scaler is untouched
+    live_gen = bank.embedding_gen
+    shadow = BhuSmrutiQdrant(
+        client=client,
+        embedding_gen=EmbeddingGenerator(live_gen.model_name, cache=live_gen.cache, backend=live_gen.backend,
+                                         threads=live_gen.threads),
+        stats_path=None,
+        storage_profile=storage_profile or bank.storage_profile,
+        soil_layout=soil_layout or bank.soil_layout,
+        normalize_features=bank.normalize_features,
+        result_cache_size=0
+    )
+    setattr(shadow, f"{kind}_collection", target)
+
+    print(f"Building '{target}' for alias '{alias_name}' (live: {live})")
+    shadow._ensure_collection(target, hnsw_config=None, **shadow.collection_schema(kind))
+    # Defer HNSW building until every point is in
+    client.update_collection(collection_name=target,
+                             optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0))
+
+    if kind == "soil":
+        scaler = None if refit_scaler else bank.load_collection_meta(alias_name).get("feature_scaler")
+        # Keeping the live scaler keeps query vectors valid for both versions
+        shadow.save_collection_meta(target, feature_scaler=scaler, soil_layout=shadow.soil_layout)
+
+    export_path = None
+    if source is None and live is not None and workers > 1:
+        # The process pool reads files; dump the live payloads first
+        export_path = f"data/reindex_{target}.jsonl"
+        os.makedirs(os.path.dirname(export_path), exist_ok=True)
+        with open(export_path, "w") as f:
+            for _, payload in scroll_payloads(client, live, chunk_size):
+                f.write(json.dumps(payload) + "\n")
+        source = export_path
+
+    started = time.perf_counter()
+    if source is not None:
+        id_field_records = iter_records(source)
+    elif live is not None:
+        id_field_records = (payload for _, payload in scroll_payloads(client, live, chunk_size))
+    else:
+        raise ValueError(f"Nothing to reindex: '{alias_name}' does not exist and no source was given")
+
+    # Point ids to verify, sampled as the chunks stream by so memory doesn't grow with the source
+    sample = Reservoir(verify_sample)
+    if workers > 1:
+        from backfill import run_backfill
+        work_dir = f"data/backfill_{target}"
+        loaded = run_backfill(shadow, source, kind=kind, workers=workers, shard_size=chunk_size,
+                              batch_size=batch_size, work_dir=work_dir,
+                              on_points=lambda points: sample.add(point.id for point in points))
+        os.rmdir(work_dir)  # shard files are removed as they are upserted
+    else:
+        build_points = shadow._soil_points if kind == "soil" else shadow._wisdom_points
+        upsert = shadow._upsert_soil_points if kind == "soil" else shadow._upsert_wisdom_points
+        loaded = 0
+        for records in iter_chunks(id_field_records, chunk_size):
+            points = build_points(records, batch_size=batch_size)
+            upsert(points)
+            loaded += len(points)
+            sample.add(point.id for point in points)
+    sample_ids = sample.items
+    print(f"Loaded {loaded} records into '{target}' in {time.perf_counter() - started:.1f}s")
+
+    client.update_collection(collection_name=target,
+                             optimizers_config=models.OptimizersConfigDiff(indexing_threshold=INDEXING_THRESHOLD))
+    wait_until_green(client, target)
+
+    # Verify before any traffic moves
+    count = client.count(collection_name=target, exact=True).count
+    if count < loaded:
+        raise RuntimeError(f"'{target}' has {count} points, expected {loaded}; alias not switched")
+    recall = self_retrieval_rate(client, target, sample_ids, named=kind == "soil" and shadow.soil_layout == "named")
+    if recall < min_self_recall:
+        raise RuntimeError(f"'{target}' self-retrieval {recall:.2f} < {min_self_recall}; alias not switched")
+    print(f"Verified '{target}': {count} points, self-retrieval {recall:.2f} on {len(sample_ids)} samples")
+
+    if live is not None:
+        bank.feedback.flush()
+        build_points = shadow._soil_points if kind == "soil" else shadow._wisdom_points
+        upsert = shadow._upsert_soil_points if kind == "soil" else shadow._upsert_wisdom_points
+        synced, added = sync_live_points(
+            client, live, target, lambda records: upsert(build_points(records, batch_size=batch_size)),
+            feedback=kind == "soil", page_size=chunk_size
+        )
+        if synced or added:
+            print(f"Copied reinforcement from {synced} live points, added {added} points inserted during the build")
+
+    # Only verified builds are promoted; rollback and garbage collection look at no others
+    bank.save_collection_meta(target, promoted=True)
+    if live == alias_name:
+        # A plain collection can't become an alias in place; reads fail only between these two calls
+        client.delete_collection(alias_name)
+    swap_alias(client, alias_name, target)
+    print(f"Alias '{alias_name}' -> '{target}'")
+
+    if kind == "soil":
+        scaler = shadow.load_collection_meta(target).get("feature_scaler")
+        publish_layout(bank, alias_name, target, shadow.soil_layout, scaler)
+        bank.check_soil_stats(fix=True)
+    bank.result_cache.clear()
+
+    # Keep the newest keep_versions old promoted versions for rollback; failed builds older
+    # than this one have been superseded
+    promoted = {name for _, name in promoted_versions(bank, alias_name)}
+    old_versions = [name for _, name in list_versions(client, alias_name) if name != target]
+    old_promoted = [name for name in old_versions if name in promoted]
+    for name in old_versions:
+        if name not in promoted:
+            client.delete_collection(name)
+            print(f"Deleted failed build '{name}'")
+    for name in old_promoted[:max(len(old_promoted) - keep_versions, 0)]:
+        client.delete_collection(name)
+        print(f"Deleted old version '{name}'")
+
+    if export_path:
+        os.remove(export_path)
+    return target
+
+
+def rollback(bank, kind="soil"):
+    """Point the alias back at the previous promoted version (kept by reindex's keep_versions)"""
+    alias_name = {"soil": bank.soil_collection, "wisdom": bank.wisdom_collection}[kind]
+    current = resolve_alias(bank.client, alias_name)
+    previous = [name for _, name in promoted_versions(bank, alias_name) if name != current]
+    if current is None or not previous:
+        raise ValueError(f"No previous version of '{alias_name}' to roll back to")
+    swap_alias(bank.client, alias_name, previous[-1])
+    if kind == "soil":
+        # The old version was built with its own scaler and layout
+        meta = bank.load_collection_meta(previous[-1])
+        publish_layout(bank, alias_name, previous[-1], meta.get("soil_layout", bank.soil_layout),
+                       meta.get("feature_scaler"))
+        bank.check_soil_stats(fix=True)
+    bank.result_cache.clear()
+    print(f"Alias '{alias_name}' -> '{previous[-1]}'")
+    return previous[-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild a collection as a new version and switch its alias")
+    parser.add_argument("--kind", choices=["soil", "wisdom"], default="soil")
+    parser.add_argument("--source", default=None, help="JSON/JSON Lines file (default: re-embed the live payloads)")
+    parser.add_argument("--workers", type=int, default=1, help="Encoder processes (>1 uses the backfill pool)")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--layout", choices=["combined", "named"], default=None)
+    parser.add_argument("--storage-profile", default=None)
+    parser.add_argument("--refit-scaler", action="store_true")
+    parser.add_argument("--keep", type=int, default=1, help="Old versions kept for rollback")
+    parser.add_argument("--rollback", action="store_true", help="Switch back to the previous version")
+    parser.add_argument("--local", action="store_true", help="Use the local Qdrant server instead of Qdrant Cloud")
+    args = parser.parse_args()
+
+    bank = BhuSmrutiQdrant(use_cloud=not args.local)
+    try:
+        if args.rollback:
+            rollback(bank, kind=args.kind)
+        else:
+            reindex(
+                bank, kind=args.kind, source=args.source, workers=args.workers, chunk_size=args.chunk_size,
+                soil_layout=args.layout, storage_profile=args.storage_profile, refit_scaler=args.refit_scaler,
+                keep_versions=args.keep
+            )
+    finally:
+        bank.close()
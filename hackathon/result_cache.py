@@ -0,0 +1,168 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from metrics import METRICS
+
+# Live caches; their stats are summed per cache name into the rendered metrics
+_CACHES = weakref.WeakSet()
+# stats() fields exported as counters
+COUNTED_STATS = ("hits", "misses", "evictions", "expirations", "invalidations", "stale_puts")
+
+
+class ResultCache:
+    """TTL + LRU cache of read results, invalidated by tags
+
+    Each entry carries tags (e.g. ("point", 12) or ("season", "monsoon")) naming the writes
+    that could change it; invalidate_tags drops exactly the entries sharing a tag. With a
+    copy function values are copied on put and on every hit, so callers can't edit an entry.
+
+    A read racing a write could otherwise cache what it computed before the write landed:
+    take generation() before computing and pass it to put, which drops the value if any of
+    its tags was invalidated in between.
+    """
+
+    def __init__(self, max_items=1024, ttl=300.0, clock=time.monotonic, name="results", copy=None):
+        self.name = name
+        self.copy = copy
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires_at, tags, value), least recently used first
+        self._entries = OrderedDict()
+        # tag -> keys of the entries carrying it
+        self._tag_index = {}
+        # Bumped by every invalidation; tag -> generation of its last invalidation
+        self._generation = 0
+        self._tag_generations = {}
+        # Puts computed before this generation are dropped (tag generations older than it are forgotten)
+        self._generation_floor = 0
+        self.reset_stats()
+        if max_items > 0:
+            _CACHES.add(self)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def generation(self):
+        """Token to take before computing a value and pass to put"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key):
+        """(True, value) for a live entry, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+        return True, self.copy(value) if self.copy is not None else value
+
+    def put(self, key, value, tags=(), generation=None):
+        """Cache value under key; with a generation token, only if none of its tags changed since"""
+        if self.max_items <= 0:
+            return
+        if self.copy is not None:
+            value = self.copy(value)
+        tags = frozenset(tags)
+        with self._lock:
+            if generation is not None and (
+                generation < self._generation_floor
+                or any(self._tag_generations.get(tag, 0) > generation for tag in tags)
+            ):
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self.clock() + self.ttl, tags, value)
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_items:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate_tags(self, tags):
+        """Drop every entry carrying any of the tags; returns how many were dropped"""
+        with self._lock:
+            self._generation += 1
+            if len(self._tag_generations) >= 4 * max(self.max_items, 1):
+                # Bound the history: puts started before now are dropped as if every tag changed
+                self._tag_generations.clear()
+                self._generation_floor = self._generation
+            keys = set()
+            for tag in tags:
+                self._tag_generations[tag] = self._generation
+                keys.update(self._tag_index.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            # Nothing computed before the clear may be cached after it
+            self._generation += 1
+            self._tag_generations.clear()
+            self._generation_floor = self._generation
+
+    def _remove(self, key):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_index[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts
+            }
+
+
+def collect_metrics():
+    """Hit, miss, eviction, expiration and invalidation counts, hit rate and size per cache name"""
+    totals = {}
+    for cache in list(_CACHES):
+        stats = cache.stats()
+        total = totals.setdefault(cache.name, dict.fromkeys(COUNTED_STATS + ("size",), 0))
+        for key in total:
+            total[key] += stats[key]
+
+    samples = []
+    for name, total in totals.items():
+        labels = (("cache", name),)
+        lookups = total["hits"] + total["misses"]
+        samples.extend((f"bhu_result_cache_{key}_total", "counter", labels, total[key]) for key in COUNTED_STATS)
+        samples.append(("bhu_result_cache_hit_rate", "gauge", labels,
+                        round(total["hits"] / lookups, 4) if lookups else 0.0))
+        samples.append(("bhu_result_cache_size", "gauge", labels, total["size"]))
+    return samples
+
+
+METRICS.register_collector(collect_metrics)
@@ -1,157 +1,322 @@
-import os
+import argparse
 import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
 import numpy as np
-from datetime import datetime, timedelta
-import random
 
-def generate_synthetic_data():
-    """Generate realistic synthetic soil and wisdom data"""
-    
-    # Soil types and characteristics
-    soil_types = [
-        "Red Loam", "Black Cotton", "Alluvial", "Laterite", 
-        "Mountain", "Desert", "Peaty", "Saline", "Clay", "Sandy"
-    ]
-    
-    crops = ["Rice", "Wheat", "Millet", "Maize", "Pulses", "Vegetables", "Fruits", "Spices"]
-    
-    traditional_methods = [
-        "Crop Rotation", "Natural Compost", "Green Manure", "Mulching",
-        "Terrace Farming", "Rainwater Harvesting", "Intercropping",
-        "Agroforestry", "Zero Tillage", "Biodynamic Preparation"
-    ]
-    
-    locations = [
-        {"state": "Odisha", "lat": 20.9517, "lon": 85.0985},
-        {"state": "Karnataka", "lat": 15.3173, "lon": 75.7139},
-        {"state": "Rajasthan", "lat": 27.0238, "lon": 74.2179},
-        {"state": "Punjab", "lat": 31.1471, "lon": 75.3412},
-        {"state": "Kerala", "lat": 10.8505, "lon": 76.2711}
-    ]
-    
-    farmer_names = [
-        "Rajesh Patel", "Lakshmi Devi", "Arun Kumar", "Meera Singh",
-        "Gopal Sharma", "Sunita Reddy", "Vikram Joshi", "Anjali Mehta"
+# Soil types and characteristics
+SOIL_TYPES = [
+    "Red Loam", "Black Cotton", "Alluvial", "Laterite",
+    "Mountain", "Desert", "Peaty", "Saline", "Clay", "Sandy"
+]
+
+CROPS = ["Rice", "Wheat", "Millet", "Maize", "Pulses", "Vegetables", "Fruits", "Spices"]
+
+TRADITIONAL_METHODS = [
+    "Crop Rotation", "Natural Compost", "Green Manure", "Mulching",
+    "Terrace Farming", "Rainwater Harvesting", "Intercropping",
+    "Agroforestry", "Zero Tillage", "Biodynamic Preparation"
+]
+# Methods that make a good yield more likely
+YIELD_BOOSTING_METHODS = [TRADITIONAL_METHODS.index("Crop Rotation"), TRADITIONAL_METHODS.index("Natural Compost")]
+
+LOCATIONS = [
+    {"state": "Odisha", "lat": 20.9517, "lon": 85.0985},
+    {"state": "Karnataka", "lat": 15.3173, "lon": 75.7139},
+    {"state": "Rajasthan", "lat": 27.0238, "lon": 74.2179},
+    {"state": "Punjab", "lat": 31.1471, "lon": 75.3412},
+    {"state": "Kerala", "lat": 10.8505, "lon": 76.2711}
+]
+
+FARMER_NAMES = [
+    "Rajesh Patel", "Lakshmi Devi", "Arun Kumar", "Meera Singh",
+    "Gopal Sharma", "Sunita Reddy", "Vikram Joshi", "Anjali Mehta"
+]
+
+SOIL_SEASONS = ["pre-monsoon", "monsoon", "post-monsoon", "winter", "summer"]
+WISDOM_SEASONS = ["monsoon", "winter", "summer", "all"]
+YIELDS = ["good", "average", "poor"]
+
+FARMER_FEEDBACK = [
+    "Traditional method worked well",
+    "Good yield this season",
+    "Soil health improved",
+    "Needs more composting",
+    "Water retention improved"
+]
+
+WISDOM_TOPICS = [
+    ("Monsoon Preparation", [
+        "Start preparing soil 2 weeks before monsoon",
+        "Add organic compost to improve water retention",
+        "Create proper drainage channels",
+        "Use mulch to prevent soil erosion"
+    ]),
+    ("Soil Revival", [
+        "For acidic soil, add lime or wood ash",
+        "Grow green manure crops between seasons",
+        "Earthworms are friends of the soil",
+        "Never burn crop residue - it kills soil life"
+    ]),
+    ("Water Conservation", [
+        "Dig small pits to capture rainwater",
+        "Plant trees on farm boundaries for shade",
+        "Use drip irrigation for vegetables",
+        "Morning irrigation reduces evaporation"
+    ]),
+    ("Natural Pest Control", [
+        "Neem leaves soaked in water make good pesticide",
+        "Plant marigold around crops to repel insects",
+        "Mix chili and garlic paste for pest spray",
+        "Attract birds with perches for natural pest control"
+    ])
+]
+
+# (low, high) of moisture, pH and temperature per soil type; other types use DEFAULT_SENSOR_RANGES
+DEFAULT_SENSOR_RANGES = [(0.2, 0.5), (5.0, 8.0), (20, 35)]
+SENSOR_RANGES = {
+    "Red Loam": [(0.25, 0.45), (5.5, 6.5), (25, 32)],
+    "Black Cotton": [(0.35, 0.55), (7.0, 8.5), (28, 35)],
+}
+# Cumulative probabilities of good / average / poor yields with and without a yield-boosting method
+YIELD_CDF_BOOSTED = [0.75, 1.0, 1.0]
+YIELD_CDF_OTHER = [0.25, 0.75, 1.0]
+
+# Farms are spread around their state's centre (standard deviation in degrees)
+LOCATION_SPREAD_DEG = 1.0
+
+FORMATS = ("json", "jsonl", "parquet")
+# Separate random streams per record kind, so soil data doesn't change with the wisdom count
+KIND_STREAMS = {"soil": 0, "wisdom": 1}
+
+
+def _sample_subsets(rng, count, population, max_size):
+    """count random subsets of 1..max_size distinct indices of range(population)"""
+    order = rng.random((count, population)).argsort(axis=1)[:, :max_size]
+    sizes = rng.integers(1, max_size + 1, count)
+    return order, np.arange(max_size) < sizes[:, None]
+
+
+def _sample_locations(rng, count):
+    """count {"state", "lat", "lon"} dicts scattered around the state centres"""
+    states = rng.integers(0, len(LOCATIONS), count)
+    centres = np.array([[location["lat"], location["lon"]] for location in LOCATIONS])
+    points = np.round(centres[states] + rng.normal(0, LOCATION_SPREAD_DEG, (count, 2)), 4)
+    return [
+        {"state": LOCATIONS[state]["state"], "lat": lat, "lon": lon}
+        for state, (lat, lon) in zip(states.tolist(), points.tolist())
     ]
-    
-    # Generate 50 soil samples
-    soil_samples = []
-    for i in range(50):
-        location = random.choice(locations)
-        soil_type = random.choice(soil_types)
-        crop = random.choice(crops)
-        method = random.sample(traditional_methods, k=random.randint(1, 3))
-        
-        # Generate realistic sensor data
-        if soil_type == "Red Loam":
-            moisture = round(random.uniform(0.25, 0.45), 2)
-            ph = round(random.uniform(5.5, 6.5), 2)
-            temp = round(random.uniform(25, 32), 1)
-        elif soil_type == "Black Cotton":
-            moisture = round(random.uniform(0.35, 0.55), 2)
-            ph = round(random.uniform(7.0, 8.5), 2)
-            temp = round(random.uniform(28, 35), 1)
-        else:
-            moisture = round(random.uniform(0.2, 0.5), 2)
-            ph = round(random.uniform(5.0, 8.0), 2)
-            temp = round(random.uniform(20, 35), 1)
-        
-        # Yield quality (reinforcement score influenced by method)
-        if "Natural Compost" in method or "Crop Rotation" in method:
-            yield_quality = random.choice(["good", "good", "good", "average"])
-            success_count = random.randint(5, 15)
-        else:
-            yield_quality = random.choice(["good", "average", "average", "poor"])
-            success_count = random.randint(1, 8)
-        
-        # Generate random date in last 5 years
-        date = (datetime.now() - timedelta(days=random.randint(0, 1825))).strftime("%Y-%m-%d")
-        
-        soil_samples.append({
-            "id": f"soil_{i+1:03d}",
-            "soil_type": soil_type,
+
+
+def _days_ago(rng, today, count, max_days):
+    days = rng.integers(0, max_days + 1, count)
+    return np.datetime_as_string(np.datetime64(today, "D") - days, unit="D").tolist()
+
+
+def generate_soil_samples(rng, start, count, today):
+    """count soil samples with ids start+1 .. start+count"""
+    soil_types = rng.integers(0, len(SOIL_TYPES), count)
+    locations = _sample_locations(rng, count)
+    crops = rng.integers(0, len(CROPS), count)
+    methods, method_mask = _sample_subsets(rng, count, len(TRADITIONAL_METHODS), 3)
+
+    # Realistic sensor data: uniform within the soil type's ranges
+    ranges = np.array([SENSOR_RANGES.get(soil_type, DEFAULT_SENSOR_RANGES) for soil_type in SOIL_TYPES])
+    low, high = ranges[soil_types, :, 0], ranges[soil_types, :, 1]
+    sensors = low + (high - low) * rng.random((count, 3))
+    moisture, ph = np.round(sensors[:, 0], 2), np.round(sensors[:, 1], 2)
+    temperature = np.round(sensors[:, 2], 1)
+    nutrients = np.round(rng.uniform([0.1, 0.05, 0.2], [0.8, 0.6, 0.9], (count, 3)), 2)
+
+    # Yield quality (reinforcement score influenced by method)
+    boosted = (np.isin(methods, YIELD_BOOSTING_METHODS) & method_mask).any(axis=1)
+    cdf = np.where(boosted[:, None], YIELD_CDF_BOOSTED, YIELD_CDF_OTHER)
+    yields = (rng.random(count)[:, None] >= cdf).sum(axis=1)
+    success_counts = np.where(boosted, rng.integers(5, 16, count), rng.integers(1, 9, count))
+
+    # Random date in the last 5 years
+    dates = _days_ago(rng, today, count, 1825)
+    seasons = rng.integers(0, len(SOIL_SEASONS), count)
+    feedback = rng.integers(0, len(FARMER_FEEDBACK), count)
+
+    return [
+        {
+            "id": f"soil_{start + i + 1:03d}",
+            "soil_type": SOIL_TYPES[soil_type],
             "location": location,
-            "crop_grown": crop,
-            "traditional_methods": method,
+            "crop_grown": CROPS[crop],
+            "traditional_methods": [TRADITIONAL_METHODS[j] for j, keep in zip(method_row, mask_row) if keep],
             "sensor_data": {
-                "moisture": moisture,
-                "pH": ph,
-                "temperature": temp,
-                "nitrogen": round(random.uniform(0.1, 0.8), 2),
-                "phosphorus": round(random.uniform(0.05, 0.6), 2),
-                "potassium": round(random.uniform(0.2, 0.9), 2)
+                "moisture": moisture_value,
+                "pH": ph_value,
+                "temperature": temperature_value,
+                "nitrogen": nitrogen,
+                "phosphorus": phosphorus,
+                "potassium": potassium
             },
-            "yield_quality": yield_quality,
-            "date": date,
+            "yield_quality": YIELDS[yield_index],
+            "date": sample_date,
             "success_count": success_count,
             "reinforcement_score": round(success_count / 20, 2),  # Normalized score
-            "season": random.choice(["pre-monsoon", "monsoon", "post-monsoon", "winter", "summer"]),
-            "farmer_feedback": random.choice([
-                "Traditional method worked well",
-                "Good yield this season",
-                "Soil health improved",
-                "Needs more composting",
-                "Water retention improved"
-            ])
-        })
-    
-    # Generate 20 wisdom audio snippets
-    wisdom_audio = []
-    wisdom_topics = [
-        ("Monsoon Preparation", [
-            "Start preparing soil 2 weeks before monsoon",
-            "Add organic compost to improve water retention",
-            "Create proper drainage channels",
-            "Use mulch to prevent soil erosion"
-        ]),
-        ("Soil Revival", [
-            "For acidic soil, add lime or wood ash",
-            "Grow green manure crops between seasons",
-            "Earthworms are friends of the soil",
-            "Never burn crop residue - it kills soil life"
-        ]),
-        ("Water Conservation", [
-            "Dig small pits to capture rainwater",
-            "Plant trees on farm boundaries for shade",
-            "Use drip irrigation for vegetables",
-            "Morning irrigation reduces evaporation"
-        ]),
-        ("Natural Pest Control", [
-            "Neem leaves soaked in water make good pesticide",
-            "Plant marigold around crops to repel insects",
-            "Mix chili and garlic paste for pest spray",
-            "Attract birds with perches for natural pest control"
-        ])
+            "season": SOIL_SEASONS[season],
+            "farmer_feedback": FARMER_FEEDBACK[feedback_index]
+        }
+        for i, (soil_type, location, crop, method_row, mask_row, moisture_value, ph_value, temperature_value,
+                (nitrogen, phosphorus, potassium), yield_index, sample_date, success_count, season, feedback_index)
+        in enumerate(zip(
+            soil_types.tolist(), locations, crops.tolist(), methods.tolist(), method_mask.tolist(),
+            moisture.tolist(), ph.tolist(), temperature.tolist(), nutrients.tolist(), yields.tolist(), dates,
+            success_counts.tolist(), seasons.tolist(), feedback.tolist()
+        ))
     ]
-    
-    for i in range(20):
-        topic, advice_list = random.choice(wisdom_topics)
-        farmer = random.choice(farmer_names)
-        
-        wisdom_audio.append({
-            "id": f"wisdom_{i+1:03d}",
-            "farmer_name": farmer,
-            "experience_years": random.randint(20, 60),
-            "topic": topic,
-            "advice": random.choice(advice_list),
+
+
+def generate_wisdom_snippets(rng, start, count, today):
+    """count wisdom snippets with ids start+1 .. start+count"""
+    topics = rng.integers(0, len(WISDOM_TOPICS), count)
+    advice = rng.integers(0, 4, count)
+    farmers = rng.integers(0, len(FARMER_NAMES), count)
+    experience = rng.integers(20, 61, count)
+    seasons = rng.integers(0, len(WISDOM_SEASONS), count)
+    soil_types, soil_mask = _sample_subsets(rng, count, len(SOIL_TYPES), 3)
+    popularity = rng.integers(1, 101, count)
+    dates = _days_ago(rng, today, count, 365)
+    locations = _sample_locations(rng, count)
+
+    return [
+        {
+            "id": f"wisdom_{start + i + 1:03d}",
+            "farmer_name": FARMER_NAMES[farmer],
+            "experience_years": years,
+            "topic": WISDOM_TOPICS[topic][0],
+            "advice": WISDOM_TOPICS[topic][1][a],
             "language": "Odia/Hindi/English",
-            "season_applicable": random.choice(["monsoon", "winter", "summer", "all"]),
-            "soil_types_applicable": random.sample(soil_types, k=random.randint(1, 3)),
-            "popularity_score": random.randint(1, 100),
-            "date_recorded": (datetime.now() - timedelta(days=random.randint(0, 365))).strftime("%Y-%m-%d")
-        })
-    
-    # Save to files
-    os.makedirs("data", exist_ok=True)
-    
-    with open("data/soil_samples.json", "w") as f:
-        json.dump(soil_samples, f, indent=2)
-    
-    with open("data/wisdom_audio.json", "w") as f:
-        json.dump(wisdom_audio, f, indent=2)
-    
-    print(f"Generated {len(soil_samples)} soil samples and {len(wisdom_audio)} wisdom snippets")
-    print("Data saved to data/ directory")
+            "season_applicable": WISDOM_SEASONS[season],
+            "soil_types_applicable": [SOIL_TYPES[t] for t, keep in zip(type_row, mask_row) if keep],
+            "popularity_score": score,
+            "date_recorded": recorded,
+            "location": location
+        }
+        for i, (topic, a, farmer, years, season, type_row, mask_row, score, recorded, location) in enumerate(zip(
+            topics.tolist(), advice.tolist(), farmers.tolist(), experience.tolist(), seasons.tolist(),
+            soil_types.tolist(), soil_mask.tolist(), popularity.tolist(), dates, locations
+        ))
+    ]
+
+
+def _write_part(kind, chunk_number, start, count, entropy, today, part_path, fmt):
+    """Generate one chunk into a part file; returns (part_path, count)"""
+    # The stream depends only on (seed, kind, chunk), not on the worker that runs it
+    rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(KIND_STREAMS[kind], chunk_number)))
+    generate = generate_soil_samples if kind == "soil" else generate_wisdom_snippets
+    records = generate(rng, start, count, today)
+
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.Table.from_pylist(records), part_path)
+    else:
+        with open(part_path, "w") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+    return part_path, count
+
+
+def _append_part(out, part_path, fmt, first):
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        out.write_table(pq.read_table(part_path).cast(out.schema))
+    elif fmt == "json":
+        with open(part_path, "r") as part:
+            for line in part:
+                out.write(("" if first else ",\n") + line.rstrip("\n"))
+                first = False
+    else:
+        with open(part_path, "r") as part:
+            shutil.copyfileobj(part, out)
+    os.remove(part_path)
+
+
+def write_dataset(kind, count, path, fmt="jsonl", entropy=None, chunk_size=100_000, workers=1, today=None):
+    """Generate count records of one kind into path, chunk by chunk on a process pool
+
+    Chunks go to part files next to path and are appended in order, so memory stays at a few
+    chunks however large count is, and the output only depends on the seed and chunk_size.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    today = today or date.today().isoformat()
+    jobs = [
+        (kind, chunk_number, start, min(chunk_size, count - start), entropy, today,
+         f"{path}.part{chunk_number:06d}", fmt)
+        for chunk_number, start in enumerate(range(0, count, chunk_size))
+    ]
+
+    def run(executor_map):
+        written = 0
+        out = None
+        try:
+            for part_path, rows in executor_map(_write_part, *zip(*jobs)):
+                if out is None:
+                    if fmt == "parquet":
+                        import pyarrow.parquet as pq
+                        out = pq.ParquetWriter(path, pq.read_schema(part_path))
+                    else:
+                        out = open(path, "w")
+                        if fmt == "json":
+                            out.write("[\n")
+                _append_part(out, part_path, fmt, first=written == 0)
+                written += rows
+            if fmt == "json":
+                out.write("\n]\n")
+        finally:
+            if out is not None:
+                out.close()
+        return written
+
+    if not jobs:
+        with open(path, "w") as f:
+            f.write("[]\n" if fmt == "json" else "")
+        return 0
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return run(executor.map)
+    return run(map)
+
+
+def generate_synthetic_data(soil_count=50, wisdom_count=20, seed=None, fmt="json", out_dir="data",
+                            chunk_size=100_000, workers=1, today=None):
+    """Generate realistic synthetic soil and wisdom data"""
+    seed_sequence = np.random.SeedSequence(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    paths = []
+    for kind, count, name in (("soil", soil_count, "soil_samples"), ("wisdom", wisdom_count, "wisdom_audio")):
+        path = os.path.join(out_dir, f"{name}.{fmt}")
+        write_dataset(kind, count, path, fmt=fmt, entropy=seed_sequence.entropy, chunk_size=chunk_size,
+                      workers=workers, today=today)
+        paths.append(path)
+
+    print(f"Generated {soil_count} soil samples and {wisdom_count} wisdom snippets (seed {seed_sequence.entropy})")
+    print(f"Data saved to {', '.join(paths)}")
+    return paths
+
 
 if __name__ == "__main__":
-    generate_synthetic_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate synthetic soil samples and wisdom snippets")
+    parser.add_argument("--soil", type=int, default=50, help="Number of soil samples")
+    parser.add_argument("--wisdom", type=int, default=20, help="Number of wisdom snippets")
+    parser.add_argument("--seed", type=int, default=None, help="Same seed, same data (default: random, printed)")
+    parser.add_argument("--format", choices=FORMATS, default="json", help="parquet needs pyarrow")
+    parser.add_argument("--out", default="data")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--today", default=None, help="YYYY-MM-DD that record dates count back from")
+    args = parser.parse_args()
+
+    generate_synthetic_data(
+        soil_count=args.soil, wisdom_count=args.wisdom, seed=args.seed, fmt=args.format, out_dir=args.out,
+        chunk_size=args.chunk_size, workers=args.workers, today=args.today
+    )
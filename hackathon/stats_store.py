@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import threading
+import time
+import zlib
+
+# Payload fields the aggregates are built from
+STATS_FIELDS = ["soil_type", "reinforcement_score", "traditional_methods", "season", "location"]
+
+
+def keyed_path(path, identity):
+    """Per-identity file next to path: data/soil_stats.json -> data/soil_stats.<crc32>.json"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{zlib.crc32(identity.encode()):08x}{ext}"
+
+
+class SoilStatsStore:
+    """Soil aggregates maintained on write and persisted as JSON
+
+    identity names the data the aggregates describe (e.g. Qdrant URL + collection). It keys
+    the file name and is stored in the file; a file written for another identity is ignored.
+    """
+
+    def __init__(self, path=None, save_interval=1.0, identity=None):
+        self.identity = identity
+        self.path = keyed_path(path, identity) if path and identity else path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.reset()
+
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if data.get("identity") == identity:
+                self._load(data)
+
+    def reset(self):
+        """Forget everything (e.g. when the collection is recreated)"""
+        self.initialized = False
+        self.total = 0
+        self.reinforcement_sum = 0.0
+        self.soil_types = {}
+        self.methods = {}
+        self.seasons = {}
+        self.states = {}
+        self._dirty = True
+
+    def _load(self, data):
+        self.initialized = data.get("initialized", True)
+        self.total = data["total"]
+        self.reinforcement_sum = data["reinforcement_sum"]
+        self.soil_types = data["soil_types"]
+        self.methods = data["methods"]
+        self.seasons = data["seasons"]
+        self.states = data["states"]
+        self._dirty = False
+
+    def to_dict(self):
+        return {
+            "identity": self.identity,
+            "initialized": self.initialized,
+            "total": self.total,
+            "reinforcement_sum": self.reinforcement_sum,
+            "soil_types": self.soil_types,
+            "methods": self.methods,
+            "seasons": self.seasons,
+            "states": self.states
+        }
+
+    @staticmethod
+    def _bump(counts, key, delta):
+        if key is None:
+            return
+        counts[key] = counts.get(key, 0) + delta
+        if counts[key] <= 0:
+            del counts[key]
+
+    def _apply(self, payload, sign):
+        self.total += sign
+        self.reinforcement_sum += sign * payload.get("reinforcement_score", 0)
+        self._bump(self.soil_types, payload.get("soil_type"), sign)
+        self._bump(self.seasons, payload.get("season"), sign)
+        self._bump(self.states, (payload.get("location") or {}).get("state"), sign)
+        for method in payload.get("traditional_methods", []):
+            self._bump(self.methods, method, sign)
+
+    def copy_from(self, other):
+        """Replace these aggregates with another store's (e.g. a fresh scan)"""
+        data = other.to_dict()
+        with self._lock:
+            self._load(data)
+            self._dirty = True
+
+    def add_sample(self, payload):
+        with self._lock:
+            self._apply(payload, 1)
+            self._dirty = True
+
+    def remove_sample(self, payload):
+        with self._lock:
+            self._apply(payload, -1)
+            self._dirty = True
+
+    def replace_samples(self, old_payloads, new_payloads):
+        """Swap previously counted payloads for new ones (upsert over existing points)"""
+        with self._lock:
+            for payload in old_payloads:
+                self._apply(payload, -1)
+            for payload in new_payloads:
+                self._apply(payload, 1)
+            self._dirty = True
+
+    def add_reinforcement(self, delta):
+        with self._lock:
+            self.reinforcement_sum += delta
+            self._dirty = True
+
+    def summary(self):
+        """Same shape as BhuSmrutiQdrant.get_soil_stats, plus season/state breakdowns"""
+        with self._lock:
+            return {
+                "total_samples": self.total,
+                "soil_types": dict(self.soil_types),
+                "avg_reinforcement": round(self.reinforcement_sum / self.total, 2) if self.total else 0,
+                # Top 5 successful methods
+                "successful_methods": sorted(self.methods.items(), key=lambda x: x[1], reverse=True)[:5],
+                "seasons": dict(self.seasons),
+                "states": dict(self.states)
+            }
+
+    def save(self):
+        """Write the aggregates atomically (temp file + rename)"""
+        with self._lock:
+            if not self.path:
+                self._dirty = False
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            self._last_save = time.monotonic()
+
+    def maybe_save(self):
+        """Save if there are changes and the last save is older than save_interval"""
+        if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+
+    def differences(self, other):
+        """Fields whose values differ from another store (reinforcement compared to 2 decimals)"""
+        mine, theirs = self.to_dict(), other.to_dict()
+        mine["reinforcement_sum"] = round(mine["reinforcement_sum"], 2)
+        theirs["reinforcement_sum"] = round(theirs["reinforcement_sum"], 2)
+        return {
+            key: {"stored": mine[key], "scanned": theirs[key]}
+            for key in mine
+            if key not in ("identity", "initialized") and mine[key] != theirs[key]
+        }
+
+
+if __name__ == "__main__":
+    from quadrant import BhuSmrutiQdrant
+
+    parser = argparse.ArgumentParser(description="Check materialized soil stats against a full scan")
+    parser.add_argument("--local", action="store_true", help="Use the local Qdrant server instead of Qdrant Cloud")
+    parser.add_argument("--fix", action="store_true", help="Replace the stored stats with the scanned ones")
+    args = parser.parse_args()
+
+    bank = BhuSmrutiQdrant(use_cloud=not args.local, embedding_cache_path=None)
+    differences = bank.check_soil_stats(fix=args.fix)
+    if not differences:
+        print("Materialized stats are consistent with the collection")
+    else:
+        for key, values in differences.items():
+            print(f"{key}: stored={values['stored']} scanned={values['scanned']}")
+        print("Rebuilt materialized stats" if args.fix else "Run with --fix to rebuild")
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from feedback import DECAY_HALF_LIFE_DAYS, FeedbackAggregator, decayed_score
+from local_index import LocalVectorIndex
+
+
+def make_index():
+    index = LocalVectorIndex()
+    index.create_collection(
+        collection_name="soil",
+        vectors_config=VectorParams(size=3, distance=Distance.COSINE)
+    )
+    index.upsert("soil", points=[
+        PointStruct(id=i, vector=[1.0, float(i), 0.5], payload={"success_count": 5}) for i in (1, 2)
+    ])
+    return index
+
+
+def success_count(index, point_id):
+    return index.retrieve("soil", ids=[point_id], with_payload=True)[0].payload["success_count"]
+
+
+def test_concurrent_records_and_flushes_lose_no_increments():
+    index = make_index()
+    aggregator = FeedbackAggregator(index, "soil", flush_interval=0.01, max_pending=1)
+
+    def worker(point_id):
+        for i in range(200):
+            aggregator.record(point_id)
+            if i % 10 == 0:
+                aggregator.flush()
+
+    threads = [threading.Thread(target=worker, args=(1 + i % 2,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    aggregator.close()
+
+    assert success_count(index, 1) == 5 + 4 * 200
+    assert success_count(index, 2) == 5 + 4 * 200
+
+
+def test_failed_callback_does_not_requeue_written_events():
+    index = make_index()
+
+    def on_flush(changes):
+        raise RuntimeError("callback failed")
+
+    aggregator = FeedbackAggregator(index, "soil", on_flush=on_flush)
+    aggregator.record(1)
+    assert aggregator.flush() == {1: 6}
+    assert aggregator.flush() == {}
+    aggregator.close()
+
+    assert success_count(index, 1) == 6
+
+
+def test_failed_write_requeues_events():
+    index = make_index()
+    aggregator = FeedbackAggregator(index, "soil")
+    write = index.batch_update_points
+
+    def failing(*args, **kwargs):
+        raise ConnectionError("qdrant unavailable")
+
+    index.batch_update_points = failing
+    aggregator.record(1)
+    with pytest.raises(ConnectionError):
+        aggregator.flush()
+    assert success_count(index, 1) == 5
+
+    index.batch_update_points = write
+    assert aggregator.flush() == {1: 6}
+    aggregator.close()
+
+
+def test_anchored_score_decays_at_read_time():
+    index = make_index()
+    now = [1767225600.0]  # 2026-01-01
+    aggregator = FeedbackAggregator(index, "soil", clock=lambda: now[0])
+    aggregator.record(1)
+    aggregator.flush()
+    now[0] += DECAY_HALF_LIFE_DAYS * 86400
+    aggregator.record(1)
+    aggregator.flush()
+    aggregator.close()
+
+    # The 5 existing successes (no date_ts: counted at the first flush) and the first new one
+    # have lost half their weight a half-life later, without any rewrite
+    anchored = index.retrieve("soil", ids=[1], with_payload=True)[0].payload["anchored_score"]
+    assert abs(float(decayed_score(anchored, now[0])) - (6 / 2 + 1)) < 1e-6
@@ -0,0 +1,24 @@
+import math
+
+from qdrant_client.http import models
+
+from quadrant import SENSOR_DISTANCE_SCALE, hybrid_soil_query
+
+
+def test_weighted_fusion_terms_are_bounded_similarities():
+    query_vectors = {
+        "text": [0.1] * 384,
+        "sensors": [0.0, 0.0, 0.0, 0.0],
+        "keywords": models.SparseVector(indices=[1, 2, 3, 4], values=[1.0] * 4),
+    }
+    query = hybrid_soil_query(query_vectors, limit=3, weights={"text": 1.0, "sensors": 0.5, "keywords": 0.2})["query"]
+    text, sensors, keywords = query.formula.sum
+
+    assert text.mult == [1.0, "$score[0]"]
+    # Closer readings score higher, and a candidate without a sensor score gets the worst one
+    decay = sensors.mult[1].exp_decay
+    assert (decay.x, decay.target, decay.scale) == ("$score[1]", 0.0, SENSOR_DISTANCE_SCALE)
+    assert math.exp(math.log(decay.midpoint) * query.defaults["$score[1]"] / decay.scale) < 1e-6
+    # Matching every query term adds the full keyword weight
+    assert keywords.mult == [0.2 / 4, "$score[2]"]
+    assert query.defaults["$score[0]"] == query.defaults["$score[2]"] == 0.0
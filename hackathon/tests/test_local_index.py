@@ -0,0 +1,74 @@
+import os
+import time
+
+from qdrant_client.http import models
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from local_index import LocalVectorIndex
+
+
+def make_index(path, persist_interval=None):
+    index = LocalVectorIndex(path=str(path), persist_interval=persist_interval)
+    index.create_collection(
+        collection_name="soil_v1",
+        vectors_config=VectorParams(size=3, distance=Distance.COSINE, on_disk=True),
+        hnsw_config=models.HnswConfigDiff(m=32, ef_construct=200, on_disk=False),
+        quantization_config=models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, quantile=0.99, always_ram=True)
+        ),
+        on_disk_payload=True
+    )
+    index.create_payload_index("soil_v1", "season", models.PayloadSchemaType.KEYWORD)
+    index.update_collection_aliases(change_aliases_operations=[models.CreateAliasOperation(
+        create_alias=models.CreateAlias(collection_name="soil_v1", alias_name="soil")
+    )])
+    index.upsert("soil", points=[
+        PointStruct(id=i, vector=[1.0, float(i), 0.5], payload={"season": "monsoon", "n": i}) for i in range(1, 6)
+    ])
+    return index
+
+
+def test_reload_keeps_points_aliases_and_collection_config(tmp_path):
+    make_index(tmp_path).close()
+
+    reloaded = LocalVectorIndex(path=str(tmp_path))
+    assert reloaded.count("soil").count == 5
+    assert reloaded.retrieve("soil", ids=[3])[0].payload == {"season": "monsoon", "n": 3}
+
+    info = reloaded.get_collection("soil_v1")
+    assert info.payload_schema["season"].data_type == models.PayloadSchemaType.KEYWORD
+    assert (info.config.hnsw_config.m, info.config.hnsw_config.ef_construct) == (32, 200)
+    assert isinstance(info.config.quantization_config, models.ScalarQuantization)
+    assert info.config.params.vectors.on_disk and info.config.params.on_disk_payload
+
+
+def test_writes_persist_without_close(tmp_path):
+    index = make_index(tmp_path, persist_interval=0)
+    # Persisting is throttled to ~10% of the time; the next write after the pause goes to disk
+    time.sleep(max(index._next_persist - time.monotonic(), 0))
+    index.set_payload("soil", payload={"n": 42}, points=[1])
+
+    # No close(): a crash here keeps everything written so far
+    reloaded = LocalVectorIndex(path=str(tmp_path))
+    assert reloaded.retrieve("soil", ids=[1])[0].payload["n"] == 42
+
+
+def test_interrupted_write_falls_back_to_previous_copy(tmp_path):
+    make_index(tmp_path).close()
+    # A crash between the two renames leaves only <name>.old and a partial <name>.tmp
+    os.rename(tmp_path / "soil_v1", tmp_path / "soil_v1.old")
+    os.makedirs(tmp_path / "soil_v1.tmp")
+
+    reloaded = LocalVectorIndex(path=str(tmp_path))
+    assert reloaded.count("soil").count == 5
+
+
+def test_deleted_collection_stays_deleted(tmp_path):
+    index = make_index(tmp_path)
+    index.close()
+    index.delete_collection("soil_v1")
+    index.close()
+
+    reloaded = LocalVectorIndex(path=str(tmp_path))
+    assert not reloaded.collection_exists("soil_v1")
+    assert not reloaded.collection_exists("soil")
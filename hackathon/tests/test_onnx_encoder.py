@@ -0,0 +1,51 @@
+import os
+
+import numpy as np
+import pytest
+
+from onnx_encoder import MIN_COSINE_AGREEMENT, VALIDATION_TEXTS, _publish, check_agreement, export_onnx
+
+
+def test_agreement_gate_accepts_close_vectors_and_rejects_drift():
+    rng = np.random.default_rng(0)
+    reference = rng.normal(size=(6, 384)).astype(np.float32)
+
+    close = reference + rng.normal(scale=0.01, size=reference.shape)
+    assert check_agreement(reference, close).mean() >= MIN_COSINE_AGREEMENT
+
+    drifted = reference + rng.normal(scale=0.5, size=reference.shape)
+    with pytest.raises(ValueError, match="agrees with PyTorch"):
+        check_agreement(reference, drifted)
+
+
+def test_publish_moves_the_model_file_last(tmp_path):
+    directory = tmp_path / "model"
+    directory.mkdir()
+    (directory / "model.onnx").write_text("fp32")
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    for name, text in (("model.onnx", "other fp32"), ("model-int8.onnx", "int8"), ("encoder.json", "{}")):
+        (work_dir / name).write_text(text)
+
+    _publish(str(work_dir), str(directory), "model-int8.onnx")
+
+    # The published fp32 model is kept; the new int8 model and missing files are added
+    assert (directory / "model.onnx").read_text() == "fp32"
+    assert (directory / "model-int8.onnx").read_text() == "int8"
+    assert (directory / "encoder.json").exists()
+
+
+def test_rejected_export_leaves_nothing_behind(tmp_path):
+    pytest.importorskip("torch")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+
+    with pytest.raises(ValueError):
+        # No export can agree above 1.0, so the gate always rejects it
+        export_onnx("all-MiniLM-L6-v2", model_dir=str(tmp_path), validation_texts=VALIDATION_TEXTS[:2],
+                    min_cosine=1.01)
+    assert os.listdir(tmp_path) == []
+
+    model_path = export_onnx("all-MiniLM-L6-v2", model_dir=str(tmp_path), validation_texts=VALIDATION_TEXTS[:2])
+    assert os.path.exists(model_path)
+    assert sorted(os.listdir(tmp_path)) == ["all-MiniLM-L6-v2"]
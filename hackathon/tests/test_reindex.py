@@ -0,0 +1,62 @@
+from qdrant_client.http.models import Distance, PointStruct, VectorParams
+
+from local_index import LocalVectorIndex
+from quadrant import BhuSmrutiQdrant
+from reindex import publish_layout, sync_live_points
+
+
+def make_index(live_points, target_points):
+    index = LocalVectorIndex()
+    for name, points in (("soil_samples_v1", live_points), ("soil_samples_v2", target_points)):
+        index.create_collection(collection_name=name, vectors_config=VectorParams(size=3, distance=Distance.COSINE))
+        index.upsert(name, points=[PointStruct(id=i, vector=[1.0, float(i), 0.5], payload=p) for i, p in points])
+    return index
+
+
+def feedback(count, anchored_score):
+    return {"success_count": count, "reinforcement_score": count / 20,
+            "farmer_feedback": "Method confirmed effective", "anchored_score": anchored_score}
+
+
+def test_sync_copies_changed_feedback_and_adds_new_points():
+    index = make_index(
+        live_points=[(1, feedback(5, 40.0)), (2, feedback(9, 90.0)), (3, feedback(1, 10.0))],
+        # Only point 2 was reinforced during the build and 3 is new; 1's anchored score differs
+        # in rounding only and must not be rewritten
+        target_points=[(1, feedback(5, 40.000001)), (2, feedback(8, 80.0))]
+    )
+    added = []
+
+    def add_records(payloads):
+        added.extend(payloads)
+        index.upsert("soil_samples_v2", points=[
+            PointStruct(id=3, vector=[1.0, 3.0, 0.5], payload=payload) for payload in payloads
+        ])
+
+    assert sync_live_points(index, "soil_samples_v1", "soil_samples_v2", add_records) == (1, 1)
+    assert [payload["success_count"] for payload in added] == [1]
+    target = {record.id: record.payload for record in index.retrieve("soil_samples_v2", ids=[1, 2, 3])}
+    assert target[1] == feedback(5, 40.000001)
+    assert target[2] == feedback(9, 90.0)
+    assert sync_live_points(index, "soil_samples_v1", "soil_samples_v2", add_records) == (0, 0)
+
+
+def test_other_banks_reload_a_published_layout():
+    index = LocalVectorIndex()
+    writer = BhuSmrutiQdrant(client=index, embedding_cache_path=None, stats_path=None)
+    reader = BhuSmrutiQdrant(client=index, embedding_cache_path=None, stats_path=None)
+    writer.setup_collections()
+    reader._load_feature_scaler()
+    assert reader.embedding_gen.feature_scaler is None
+
+    scaler = {"method": "zscore", "weights": [1.0] * 4, "center": [0.0] * 4, "scale": [1.0] * 4}
+    publish_layout(writer, "soil_samples", "soil_samples_v2", "named", scaler)
+    assert writer.soil_layout == "named"
+
+    # Within the check interval the reader keeps what it has, then picks the new version up
+    reader._load_feature_scaler()
+    assert reader.soil_layout == "combined"
+    reader._layout_checked_at -= 3600
+    reader._load_feature_scaler()
+    assert reader.soil_layout == "named"
+    assert reader.embedding_gen.feature_scaler.to_dict() == scaler
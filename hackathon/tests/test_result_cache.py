@@ -0,0 +1,36 @@
+from result_cache import ResultCache
+
+
+def test_put_after_an_invalidation_of_its_tags_is_dropped():
+    cache = ResultCache(max_items=8)
+    generation = cache.generation()
+    # A write lands while the read is computing its result
+    cache.invalidate_tags([("point", 1)])
+    cache.put("a", "stale", tags=[("point", 1)], generation=generation)
+    cache.put("b", "fresh", tags=[("point", 2)], generation=generation)
+
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, "fresh")
+    assert cache.stats()["stale_puts"] == 1
+
+
+def test_put_after_clear_is_dropped():
+    cache = ResultCache(max_items=8)
+    generation = cache.generation()
+    cache.clear()
+    cache.put("a", "stale", tags=[("point", 1)], generation=generation)
+    cache.put("b", "fresh", tags=[("point", 1)], generation=cache.generation())
+
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (True, "fresh")
+
+
+def test_bounded_tag_history_drops_older_puts():
+    cache = ResultCache(max_items=1)
+    generation = cache.generation()
+    for point_id in range(10):
+        cache.invalidate_tags([("point", point_id)])
+    assert len(cache._tag_generations) <= 4
+    cache.put("a", "stale", tags=[("point", 99)], generation=generation)
+
+    assert cache.get("a") == (False, None)
@@ -0,0 +1,52 @@
+import numpy as np
+from qdrant_client.http.models import PointStruct
+
+from quadrant import BhuSmrutiQdrant
+from setup import generate_soil_samples
+from stats_store import SoilStatsStore
+
+
+def open_bank(directory):
+    return BhuSmrutiQdrant(
+        backend="embedded",
+        local_path=str(directory / "index"),
+        stats_path=str(directory / "soil_stats.json"),
+        embedding_cache_path=None
+    )
+
+
+def soil_points(bank, start, count):
+    rng = np.random.default_rng(start)
+    samples = generate_soil_samples(rng, start, count, "2026-01-01")
+    return [
+        PointStruct(id=int(sample["id"].split("_")[1]), vector=rng.random(388).tolist(),
+                    payload=bank._soil_payload(sample))
+        for sample in samples
+    ]
+
+
+def test_stats_file_is_keyed_by_identity(tmp_path):
+    path = str(tmp_path / "soil_stats.json")
+    store = SoilStatsStore(path, identity="http://a:6333/soil_samples")
+    store.add_sample({"soil_type": "Black Cotton", "reinforcement_score": 0.5})
+    store.initialized = True
+    store.save()
+
+    assert SoilStatsStore(path, identity="http://a:6333/soil_samples").total == 1
+    other = SoilStatsStore(path, identity="http://b:6333/soil_samples")
+    assert other.path != store.path
+    assert (other.total, other.initialized) == (0, False)
+
+
+def test_stats_rebuilt_when_another_writer_changed_the_collection(tmp_path):
+    bank = open_bank(tmp_path)
+    bank.setup_collections()
+    bank._upsert_soil_points(soil_points(bank, 0, 20))
+    assert bank.get_soil_stats()["total_samples"] == 20
+
+    # Points written behind this bank's back (another process) leave its aggregates stale
+    bank.client.upsert(bank.soil_collection, points=soil_points(bank, 20, 5))
+    assert bank.reconcile_soil_stats()
+    assert bank.get_soil_stats()["total_samples"] == 25
+    assert not bank.check_soil_stats()
+    bank.close()